@@ -25,14 +25,85 @@ class ActionRecognizer:
         "moving": {"name": "移动 Moving", "icon": "🏃", "color": "#ffdd44"},
     }
 
-    def __init__(self, window_size: int = 15, debounce_frames: int = 10):
+    # 识别阈值（像素坐标系，按 960px 宽度标定）
+    DEFAULT_THRESHOLDS = {
+        "serve_elbow_angle": 140,       # 发球：手臂伸展
+        "serve_shoulder_angle": 120,    # 发球：手臂上举
+        "serve_wrist_drop": 3,          # 发球：手腕从高到低
+        "lob_wrist_rise": -5,           # 高吊：手腕向上挥动
+        "swing_wrist_speed": 8,         # 挥拍：手腕速度
+        "forehand_lateral_speed": 3,    # 正手：向右横向速度
+        "backhand_lateral_speed": -3,   # 反手：向左横向速度
+        "moving_body_speed": 5,         # 移动：髋部速度
+    }
+
+    # 声明式规则：(动作, 置信度, [(特征, 比较符, 特征或阈值名), ...])
+    # 按顺序匹配，第一条全部条件满足的规则生效
+    RULES = [
+        # 特征：手腕在头顶以上 + 手臂伸展 + 从高到低的轨迹
+        ("serve", 0.85, [
+            ("wrist_y", "<", "nose_y"),
+            ("elbow_angle", ">", "serve_elbow_angle"),
+            ("shoulder_angle", ">", "serve_shoulder_angle"),
+            ("wrist_vertical_speed", ">", "serve_wrist_drop"),
+        ]),
+        # 特征：手腕从低位向上快速挥动
+        ("lob", 0.70, [
+            ("wrist_y", ">", "hip_y"),
+            ("wrist_vertical_speed", "<", "lob_wrist_rise"),
+            ("wrist_speed", ">", "swing_wrist_speed"),
+        ]),
+        # 手腕在身体同侧（右侧）= 正手
+        ("forehand", 0.75, [
+            ("wrist_speed", ">", "swing_wrist_speed"),
+            ("wrist_x", ">", "shoulder_x"),
+            ("lateral_speed", ">", "forehand_lateral_speed"),
+        ]),
+        # 手腕穿过身体到对侧 = 反手
+        ("backhand", 0.70, [
+            ("wrist_speed", ">", "swing_wrist_speed"),
+            ("wrist_x", "<", "shoulder_x"),
+            ("lateral_speed", "<", "backhand_lateral_speed"),
+        ]),
+        ("moving", 0.60, [
+            ("body_speed", ">", "moving_body_speed"),
+        ]),
+    ]
+    DEFAULT_ACTION = ("ready", 0.50)
+
+    # 缺失时直接判为 ready 的关键点
+    REQUIRED_KEYPOINTS = ("right_wrist", "right_shoulder", "nose")
+
+    # 不计入动作事件的持续状态
+    STATES = ("ready", "moving")
+
+    # 开始识别所需的最少缓冲帧数
+    MIN_BUFFER = 5
+
+    # 批量识别输入的关键点顺序（与 PoseAnalyzer.LANDMARK_NAMES 一致）
+    KEYPOINT_NAMES = (
+        "nose", "left_shoulder", "right_shoulder",
+        "left_elbow", "right_elbow", "left_wrist", "right_wrist",
+        "left_hip", "right_hip", "left_knee", "right_knee",
+        "left_ankle", "right_ankle",
+    )
+
+    def __init__(self, window_size: int = 15, debounce_frames: int = 10,
+                 thresholds: Optional[dict] = None):
         """
         Args:
             window_size: 滑动窗口大小（帧数）
             debounce_frames: 动作去抖动间隔（防止同一动作重复触发）
+            thresholds: 覆盖 DEFAULT_THRESHOLDS 中的部分阈值
         """
         self.window_size = window_size
         self.debounce_frames = debounce_frames
+        self.thresholds = dict(self.DEFAULT_THRESHOLDS)
+        if thresholds:
+            unknown = set(thresholds) - set(self.DEFAULT_THRESHOLDS)
+            if unknown:
+                raise ValueError(f"Unknown thresholds: {sorted(unknown)}")
+            self.thresholds.update(thresholds)
         # 关键点历史缓冲
         self.keypoint_buffer: deque = deque(maxlen=window_size)
         # 动作历史
@@ -65,7 +136,7 @@ class ActionRecognizer:
             kp_map[kp["name"]] = kp
         self.keypoint_buffer.append(kp_map)
 
-        if len(self.keypoint_buffer) < 5:
+        if len(self.keypoint_buffer) < self.MIN_BUFFER:
             return self._make_result("ready", 0.5, False)
 
         # 识别动作
@@ -73,7 +144,7 @@ class ActionRecognizer:
 
         # 去抖动
         is_new = False
-        if action != self.last_action and action not in ("ready", "moving"):
+        if action != self.last_action and action not in self.STATES:
             if self.frame_count - self.last_action_frame >= self.debounce_frames:
                 is_new = True
                 self.last_action = action
@@ -84,73 +155,51 @@ class ActionRecognizer:
                     "frame": self.frame_count,
                     "confidence": confidence,
                 })
-        elif action in ("ready", "moving"):
+        elif action in self.STATES:
             self.last_action = action
 
         return self._make_result(action, confidence, is_new)
 
     def _recognize(self, kp: dict, angles: dict) -> tuple:
-        """核心识别逻辑"""
-
-        # 提取关键指标
-        right_wrist = kp.get("right_wrist", {})
-        left_wrist = kp.get("left_wrist", {})
-        right_shoulder = kp.get("right_shoulder", {})
-        right_elbow = kp.get("right_elbow", {})
-        right_hip = kp.get("right_hip", {})
-        nose = kp.get("nose", {})
-
-        if not all([right_wrist, right_shoulder, nose]):
+        """核心识别逻辑：按 RULES 顺序匹配第一条满足的规则"""
+        # 核心关键点缺失
+        if not all(kp.get(name) for name in self.REQUIRED_KEYPOINTS):
             return "ready", 0.3
 
-        wrist_y = right_wrist.get("y", 0)
-        shoulder_y = right_shoulder.get("y", 0)
-        hip_y = right_hip.get("y", 0)
-        nose_y = nose.get("y", 0)
-
-        wrist_x = right_wrist.get("x", 0)
-        shoulder_x = right_shoulder.get("x", 0)
+        features = self._extract_features(kp, angles)
+        for action, confidence, conditions in self.RULES:
+            if all(self._compare(features[lhs], op, self._operand(features, rhs))
+                   for lhs, op, rhs in conditions):
+                return action, confidence
+        return self.DEFAULT_ACTION
 
-        # 计算手腕速度（帧间差异）
-        wrist_speed = self._get_wrist_speed()
-        wrist_vertical_speed = self._get_wrist_vertical_speed()
+    def _operand(self, features: dict, rhs):
+        """规则右值：特征名 → 特征值；阈值名 → 阈值"""
+        if rhs in features:
+            return features[rhs]
+        return self.thresholds[rhs]
 
-        # 肘部角度
-        elbow_angle = angles.get("right_elbow", 90)
-        shoulder_angle = angles.get("right_shoulder", 90)
+    @staticmethod
+    def _compare(lhs, op: str, rhs):
+        return lhs > rhs if op == ">" else lhs < rhs
 
-        # === 发球检测 ===
-        # 特征：手腕在头顶以上 + 手臂伸展 + 从高到低的轨迹
-        if (wrist_y < nose_y and
-            elbow_angle > 140 and
-            shoulder_angle > 120 and
-            wrist_vertical_speed > 3):
-            return "serve", 0.85
-
-        # === 高吊检测 ===
-        # 特征：手腕从低位向上快速挥动
-        if (wrist_y > hip_y and
-            wrist_vertical_speed < -5 and
-            wrist_speed > 8):
-            return "lob", 0.70
-
-        # === 正手/反手检测 ===
-        # 基于手腕相对身体的横向位置和运动方向
-        lateral_speed = self._get_wrist_lateral_speed()
-        if wrist_speed > 8:
-            # 手腕在身体同侧（右侧）= 正手
-            if wrist_x > shoulder_x and lateral_speed > 3:
-                return "forehand", 0.75
-            # 手腕穿过身体到对侧 = 反手
-            elif wrist_x < shoulder_x and lateral_speed < -3:
-                return "backhand", 0.70
-
-        # === 移动检测 ===
-        body_speed = self._get_body_speed()
-        if body_speed > 5:
-            return "moving", 0.60
-
-        return "ready", 0.50
+    def _extract_features(self, kp: dict, angles: dict) -> dict:
+        """提取规则使用的特征"""
+        return {
+            "wrist_y": kp.get("right_wrist", {}).get("y", 0),
+            "wrist_x": kp.get("right_wrist", {}).get("x", 0),
+            "shoulder_x": kp.get("right_shoulder", {}).get("x", 0),
+            "hip_y": kp.get("right_hip", {}).get("y", 0),
+            "nose_y": kp.get("nose", {}).get("y", 0),
+            # 肘部 / 肩部角度
+            "elbow_angle": angles.get("right_elbow", 90),
+            "shoulder_angle": angles.get("right_shoulder", 90),
+            # 手腕速度（帧间差异）
+            "wrist_speed": self._get_wrist_speed(),
+            "wrist_vertical_speed": self._get_wrist_vertical_speed(),
+            "lateral_speed": self._get_wrist_lateral_speed(),
+            "body_speed": self._get_body_speed(),
+        }
 
     def _get_wrist_speed(self) -> float:
         """计算手腕速度（像素/帧）"""
@@ -200,6 +249,193 @@ class ActionRecognizer:
         py = (prev_lh.get("y", 0) + prev_rh.get("y", 0)) / 2
         return math.sqrt((cx - px) ** 2 + (cy - py) ** 2)
 
+    # ============ 批量（离线）识别 ============
+
+    def recognize_batch(self, keypoints: np.ndarray, joint_angles: dict) -> dict:
+        """
+        对整段关键点序列一次性识别，结果与逐帧调用 update() 完全一致
+        （等价于 reset() 后按顺序 update 每一帧）
+
+        Args:
+            keypoints: (T, 13, 2) 像素坐标，顺序同 KEYPOINT_NAMES，缺失点为 NaN
+            joint_angles: {关节名: (T,) 角度数组}，缺失为 NaN
+
+        Returns:
+            {
+                "actions": (T,) 动作名数组,
+                "confidence": (T,) 置信度数组,
+                "events": [{action, frame, confidence}, ...]  # frame 从 1 开始
+                "action_counts": dict,
+            }
+        """
+        keypoints = np.asarray(keypoints, dtype=np.float64)
+        T = len(keypoints)
+        names = list(self.ACTIONS)
+        code = {name: i for i, name in enumerate(names)}
+
+        warmup = np.ones(T, dtype=bool)
+        if self.window_size >= self.MIN_BUFFER:
+            warmup[self.MIN_BUFFER - 1:] = False
+
+        features, missing = self._batch_features(keypoints, joint_angles)
+        conditions = [missing]
+        choices = [code["ready"]]
+        confidences = [0.3]
+        for action, confidence, rule in self.RULES:
+            mask = np.ones(T, dtype=bool)
+            for lhs, op, rhs in rule:
+                mask &= self._compare(features[lhs], op, self._operand(features, rhs))
+            conditions.append(mask)
+            choices.append(code[action])
+            confidences.append(confidence)
+        default_action, default_conf = self.DEFAULT_ACTION
+
+        action_codes = np.select(conditions, choices, default=code[default_action])
+        action_conf = np.select(conditions, confidences, default=default_conf)
+        action_codes[warmup] = code["ready"]
+        action_conf[warmup] = 0.5
+
+        events = self._batch_debounce(action_codes, warmup, names)
+        action_counts = {k: 0 for k in self.ACTIONS}
+        for ev in events:
+            ev["confidence"] = float(action_conf[ev["frame"] - 1])
+            action_counts[ev["action"]] += 1
+
+        return {
+            "actions": np.array(names, dtype=object)[action_codes],
+            "confidence": action_conf,
+            "events": events,
+            "action_counts": action_counts,
+        }
+
+    def _batch_features(self, keypoints: np.ndarray, joint_angles: dict) -> tuple:
+        """向量化计算规则特征，返回 (特征字典, 核心关键点缺失掩码)"""
+        T = len(keypoints)
+        col = {name: i for i, name in enumerate(self.KEYPOINT_NAMES)}
+        present_all = ~np.isnan(keypoints).any(axis=2)
+        present = {name: present_all[:, i] for name, i in col.items()}
+
+        def coord(name: str, axis: int) -> np.ndarray:
+            return np.where(present[name], np.nan_to_num(keypoints[:, col[name], axis]), 0.0)
+
+        def delta(name: str, axis: int, lag: int) -> np.ndarray:
+            """与 lag 帧前的坐标差，任一端缺失为 0"""
+            out = np.zeros(T)
+            if T > lag:
+                v = coord(name, axis)
+                ok = present[name][lag:] & present[name][:-lag]
+                out[lag:] = np.where(ok, v[lag:] - v[:-lag], 0.0)
+            return out
+
+        def angle(name: str) -> np.ndarray:
+            values = joint_angles.get(name)
+            if values is None:
+                return np.full(T, 90.0)
+            values = np.asarray(values, dtype=np.float64)
+            return np.where(np.isnan(values), 90.0, values)
+
+        dx, dy = delta("right_wrist", 0, 1), delta("right_wrist", 1, 1)
+
+        # 身体速度：四个髋部点在相邻两帧都存在时才计算
+        body_speed = np.zeros(T)
+        if T > 1:
+            hips_ok = present["left_hip"] & present["right_hip"]
+            ok = hips_ok[1:] & hips_ok[:-1]
+            cx = (coord("left_hip", 0) + coord("right_hip", 0)) / 2
+            cy = (coord("left_hip", 1) + coord("right_hip", 1)) / 2
+            speed = np.sqrt((cx[1:] - cx[:-1]) ** 2 + (cy[1:] - cy[:-1]) ** 2)
+            body_speed[1:] = np.where(ok, speed, 0.0)
+
+        features = {
+            "wrist_y": coord("right_wrist", 1),
+            "wrist_x": coord("right_wrist", 0),
+            "shoulder_x": coord("right_shoulder", 0),
+            "hip_y": coord("right_hip", 1),
+            "nose_y": coord("nose", 1),
+            "elbow_angle": angle("right_elbow"),
+            "shoulder_angle": angle("right_shoulder"),
+            "wrist_speed": np.sqrt(dx * dx + dy * dy),
+            "wrist_vertical_speed": delta("right_wrist", 1, 2) / 2,
+            "lateral_speed": delta("right_wrist", 0, 2) / 2,
+            "body_speed": body_speed,
+        }
+        missing = ~np.logical_and.reduce([present[name] for name in self.REQUIRED_KEYPOINTS])
+        return features, missing
+
+    def _batch_debounce(self, action_codes: np.ndarray, warmup: np.ndarray,
+                        names: list) -> list:
+        """
+        向量化去抖动：复现 update() 的状态机，但只在事件之间跳转
+        每次用预计算的"下一个不同动作"表和"上一个状态帧"单调数组二分定位下一事件，
+        复杂度 O(T + 事件数 × log T)
+        """
+        state_codes = [names.index(a) for a in self.STATES]
+        is_state = np.isin(action_codes, state_codes) & ~warmup
+        is_stroke = ~np.isin(action_codes, state_codes) & ~warmup
+
+        strokes = np.flatnonzero(is_stroke)
+        n = len(strokes)
+        if n == 0:
+            return []
+        stroke_codes = action_codes[strokes]
+
+        # 每个挥拍帧之前最近的 ready/moving 帧（单调不减）
+        last_state = np.maximum.accumulate(np.where(is_state, np.arange(len(action_codes)), -1))
+        state_before = last_state[strokes]
+
+        # next_diff[a][p]：挥拍帧序列中位置 >= p 且动作不是 a 的第一个位置
+        positions = np.arange(n)
+        next_diff = {}
+        for a in np.unique(stroke_codes):
+            idx = np.where(stroke_codes != a, positions, n)
+            next_diff[a] = np.minimum.accumulate(idx[::-1])[::-1]
+
+        events = []
+        last_code = None           # 上一次事件的动作（None = 初始 ready 状态）
+        last_idx = -1              # 上一次事件的帧下标
+        last_frame = -self.debounce_frames
+        while True:
+            # 去抖动：frame - last_frame >= debounce_frames（frame 从 1 开始）
+            p0 = int(np.searchsorted(strokes, last_frame + self.debounce_frames - 1))
+            if p0 >= n:
+                break
+            if last_code is None:
+                p = p0
+            else:
+                # 动作与上一事件不同，或两者之间出现过 ready/moving（last_action 已被重置）
+                p_diff = int(next_diff[last_code][p0])
+                p_state = max(p0, int(np.searchsorted(state_before, last_idx, side="right")))
+                p = min(p_diff, p_state)
+            if p >= n:
+                break
+
+            last_idx = int(strokes[p])
+            last_code = int(stroke_codes[p])
+            last_frame = last_idx + 1
+            events.append({"action": names[last_code], "frame": last_frame})
+        return events
+
+    @classmethod
+    def poses_to_arrays(cls, poses: list) -> tuple:
+        """
+        将逐帧姿态（Pipeline._sanitize_pose 格式，跳过 None）转换为 recognize_batch 的输入
+
+        Returns:
+            (keypoints (T, 13, 2), joint_angles {name: (T,)})
+        """
+        poses = [p for p in poses if p]
+        col = {name: i for i, name in enumerate(cls.KEYPOINT_NAMES)}
+        keypoints = np.full((len(poses), len(cls.KEYPOINT_NAMES), 2), np.nan)
+        joint_angles: dict = {}
+        for t, pose in enumerate(poses):
+            for kp in pose["keypoints"]:
+                i = col.get(kp["name"])
+                if i is not None:
+                    keypoints[t, i] = (kp["x"], kp["y"])
+            for name, value in pose["joint_angles"].items():
+                joint_angles.setdefault(name, np.full(len(poses), np.nan))[t] = value
+        return keypoints, joint_angles
+
     def _make_result(self, action: str, confidence: float, is_new: bool) -> dict:
         action_info = self.ACTIONS.get(action, self.ACTIONS["ready"])
         return {
@@ -211,6 +447,15 @@ class ActionRecognizer:
             "action_history": self.action_history[-20:],
         }
 
+    def reset_window(self):
+        """
+        只重置时序窗口与去抖动状态（跳转时使用）
+        动作计数与历史保留；帧计数继续递增，去抖动间隔从当前帧重新起算
+        """
+        self.keypoint_buffer.clear()
+        self.last_action = "ready"
+        self.last_action_frame = self.frame_count - self.debounce_frames
+
     def reset(self):
         """重置状态"""
         self.keypoint_buffer.clear()
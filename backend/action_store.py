@@ -0,0 +1,191 @@
+"""
+Sport Vision — 动作事件存储模块
+将完成分析的动作事件持久化到本地 SQLite，按视频和动作类型建立索引以便快速查询
+"""
+
+import json
+import time
+import uuid
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Optional
+
+
+class ActionStore:
+    """基于 SQLite 的动作事件索引"""
+
+    # 作为独立列存储（可建索引、可范围过滤）的生物力学指标
+    BIOMECHANICS_FIELDS = (
+        "wrist_speed",
+        "body_lean",
+        "knee_bend",
+        "arm_extension",
+        "symmetry_score",
+    )
+
+    # 单次查询返回条数上限
+    MAX_LIMIT = 100000
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._init_schema()
+
+    def _connect(self) -> sqlite3.Connection:
+        """每个线程复用一个连接"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), timeout=10)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _init_schema(self):
+        metric_columns = ",\n".join(f"    {name} REAL" for name in self.BIOMECHANICS_FIELDS)
+        conn = self._connect()
+        with conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS analyses (
+                    id TEXT PRIMARY KEY,
+                    video_id TEXT NOT NULL,
+                    video_path TEXT,
+                    fps REAL,
+                    total_frames INTEGER,
+                    created_at REAL NOT NULL
+                )
+            """)
+            conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS action_events (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    analysis_id TEXT NOT NULL REFERENCES analyses(id),
+                    video_id TEXT NOT NULL,
+                    action TEXT NOT NULL,
+                    frame INTEGER NOT NULL,
+                    timestamp REAL,
+                    confidence REAL,
+                    created_at REAL NOT NULL,
+                    joint_angles TEXT,
+                {metric_columns}
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_events_video_action "
+                         "ON action_events (video_id, action)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_events_action_time "
+                         "ON action_events (action, created_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_events_analysis "
+                         "ON action_events (analysis_id, frame)")
+            # min_ / max_ 指标范围过滤
+            for name in self.BIOMECHANICS_FIELDS:
+                conn.execute(f"CREATE INDEX IF NOT EXISTS idx_events_{name} "
+                             f"ON action_events ({name})")
+
+    def save_analysis(self, video_id: str, video_path: str, events: list,
+                      fps: float = 0.0, total_frames: int = 0) -> str:
+        """
+        保存一次完成的分析及其动作事件
+
+        Args:
+            events: [{action, frame, timestamp, confidence, biomechanics, joint_angles}, ...]
+
+        Returns:
+            analysis_id
+        """
+        analysis_id = uuid.uuid4().hex[:12]
+        created_at = time.time()
+        columns = ("analysis_id", "video_id", "action", "frame", "timestamp",
+                   "confidence", "created_at", "joint_angles") + self.BIOMECHANICS_FIELDS
+        rows = []
+        for ev in events:
+            bio = ev.get("biomechanics") or {}
+            rows.append((
+                analysis_id, video_id, ev["action"], ev["frame"],
+                ev.get("timestamp"), ev.get("confidence"), created_at,
+                json.dumps(ev.get("joint_angles") or {}),
+            ) + tuple(bio.get(name) for name in self.BIOMECHANICS_FIELDS))
+
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT INTO analyses (id, video_id, video_path, fps, total_frames, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (analysis_id, video_id, video_path, fps, total_frames, created_at),
+            )
+            conn.executemany(
+                f"INSERT INTO action_events ({', '.join(columns)}) "
+                f"VALUES ({', '.join('?' * len(columns))})",
+                rows,
+            )
+        return analysis_id
+
+    def query(self, action: Optional[str] = None,
+              video_id: Optional[str] = None,
+              analysis_id: Optional[str] = None,
+              since: Optional[float] = None,
+              until: Optional[float] = None,
+              metric_ranges: Optional[dict] = None,
+              limit: int = 500) -> list:
+        """
+        查询动作事件
+
+        Args:
+            since / until: 分析完成时间范围（Unix 时间戳）
+            metric_ranges: {指标名: (最小值 or None, 最大值 or None)}
+            limit: 返回条数上限（限制在 1 ~ MAX_LIMIT）
+        """
+        clauses, params = [], []
+        if action:
+            clauses.append("action = ?")
+            params.append(action)
+        if video_id:
+            clauses.append("video_id = ?")
+            params.append(video_id)
+        if analysis_id:
+            clauses.append("analysis_id = ?")
+            params.append(analysis_id)
+        if since is not None:
+            clauses.append("created_at >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("created_at < ?")
+            params.append(until)
+        for name, (low, high) in (metric_ranges or {}).items():
+            if name not in self.BIOMECHANICS_FIELDS:
+                raise ValueError(f"Unknown metric: {name}")
+            if low is not None:
+                clauses.append(f"{name} >= ?")
+                params.append(low)
+            if high is not None:
+                clauses.append(f"{name} <= ?")
+                params.append(high)
+
+        sql = "SELECT * FROM action_events"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY created_at DESC, frame ASC LIMIT ?"
+        params.append(max(1, min(int(limit), self.MAX_LIMIT)))
+
+        rows = self._connect().execute(sql, params).fetchall()
+        return [self._row_to_event(row) for row in rows]
+
+    def get_analysis(self, analysis_id: str) -> Optional[dict]:
+        row = self._connect().execute(
+            "SELECT * FROM analyses WHERE id = ?", (analysis_id,)
+        ).fetchone()
+        return dict(row) if row else None
+
+    def _row_to_event(self, row: sqlite3.Row) -> dict:
+        return {
+            "analysis_id": row["analysis_id"],
+            "video_id": row["video_id"],
+            "action": row["action"],
+            "frame": row["frame"],
+            "timestamp": row["timestamp"],
+            "confidence": row["confidence"],
+            "created_at": row["created_at"],
+            "biomechanics": {name: row[name] for name in self.BIOMECHANICS_FIELDS},
+            "joint_angles": json.loads(row["joint_angles"] or "{}"),
+        }
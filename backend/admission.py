@@ -0,0 +1,158 @@
+"""
+Sport Vision — 准入控制模块
+限制全局与单客户端的并发流水线数量，超出时排队并反馈位置，队列满时拒绝
+"""
+
+import os
+import time
+import asyncio
+from collections import deque
+from typing import Awaitable, Callable, Optional
+
+
+class AdmissionRejected(Exception):
+    """准入被拒绝（超出单客户端上限、队列已满或排队超时）"""
+
+
+class _Waiter:
+    def __init__(self, session_id: str, client_id: str):
+        self.session_id = session_id
+        self.client_id = client_id
+        self.event = asyncio.Event()
+        self.admitted = False
+
+
+def current_rss_mb() -> Optional[float]:
+    """当前进程常驻内存（MB），无法获取时返回 None"""
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+class AdmissionController:
+    """
+    流水线准入控制器
+    每个已准入会话占用一个槽位，会话结束时必须调用 release
+    """
+
+    def __init__(self, max_global: int = 4, max_per_client: int = 2,
+                 max_queue: int = 16, queue_timeout: float = 120.0,
+                 max_rss_mb: float = 0):
+        """
+        Args:
+            max_global: 全局并发流水线上限
+            max_per_client: 单客户端（排队 + 运行）上限
+            max_queue: 等待队列长度上限
+            queue_timeout: 最长排队时间（秒）
+            max_rss_mb: 进程常驻内存上限，超过时暂停准入（0 = 不限制）
+        """
+        self.max_global = max_global
+        self.max_per_client = max_per_client
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.max_rss_mb = max_rss_mb
+        # session_id -> (client_id, 准入时间)
+        self.active: dict = {}
+        self.waiters: deque = deque()
+
+    async def acquire(self, session_id: str, client_id: str,
+                      on_position: Optional[Callable[[int], Awaitable]] = None):
+        """
+        申请槽位；需要排队时通过 on_position 推送排队位置（从 1 开始）
+
+        Raises:
+            AdmissionRejected
+        """
+        if session_id in self.active:
+            return
+
+        client_load = sum(1 for cid, _ in self.active.values() if cid == client_id)
+        client_load += sum(1 for w in self.waiters if w.client_id == client_id)
+        if client_load >= self.max_per_client:
+            raise AdmissionRejected(
+                f"Too many concurrent sessions for this client (limit {self.max_per_client})"
+            )
+
+        if not self.waiters and self._has_capacity():
+            self._admit(session_id, client_id)
+            return
+
+        if len(self.waiters) >= self.max_queue:
+            raise AdmissionRejected("Server busy, please retry later")
+
+        waiter = _Waiter(session_id, client_id)
+        self.waiters.append(waiter)
+        deadline = time.monotonic() + self.queue_timeout
+        last_position = None
+        try:
+            while not waiter.admitted:
+                position = self.waiters.index(waiter) + 1
+                if on_position and position != last_position:
+                    last_position = position
+                    await on_position(position)
+                if waiter.admitted:
+                    break
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise AdmissionRejected("Timed out waiting for a free slot")
+                waiter.event.clear()
+                try:
+                    await asyncio.wait_for(waiter.event.wait(), timeout=min(remaining, 5.0))
+                except asyncio.TimeoutError:
+                    # 定期重试：内存回落后也能恢复准入
+                    self._dispatch()
+        except BaseException:
+            if waiter in self.waiters:
+                self.waiters.remove(waiter)
+                self._notify_waiters()
+            if waiter.admitted:
+                self.release(session_id)
+            raise
+
+    def release(self, session_id: str):
+        """释放槽位（可重复调用）"""
+        if self.active.pop(session_id, None) is not None:
+            self._dispatch()
+
+    def _has_capacity(self) -> bool:
+        if len(self.active) >= self.max_global:
+            return False
+        if self.max_rss_mb and self.active:
+            rss = current_rss_mb()
+            if rss is not None and rss > self.max_rss_mb:
+                return False
+        return True
+
+    def _admit(self, session_id: str, client_id: str):
+        self.active[session_id] = (client_id, time.time())
+
+    def _dispatch(self):
+        """按排队顺序准入等待者"""
+        admitted_any = False
+        while self.waiters and self._has_capacity():
+            waiter = self.waiters.popleft()
+            self._admit(waiter.session_id, waiter.client_id)
+            waiter.admitted = True
+            waiter.event.set()
+            admitted_any = True
+        if admitted_any:
+            self._notify_waiters()
+
+    def _notify_waiters(self):
+        """排队位置变化，唤醒等待者推送新位置"""
+        for waiter in self.waiters:
+            waiter.event.set()
+
+    def stats(self) -> dict:
+        return {
+            "active": len(self.active),
+            "queued": len(self.waiters),
+            "max_global": self.max_global,
+            "max_per_client": self.max_per_client,
+            "max_queue": self.max_queue,
+            "rss_mb": current_rss_mb(),
+        }
@@ -0,0 +1,296 @@
+"""
+Sport Vision — 会话统计模块
+逐帧 O(1) 更新的流式统计：关节角度 / 生物力学指标的均值方差与近似分位数、
+各动作触发帧的生物力学、回合与间歇时长，无需保存整场帧历史
+"""
+
+import math
+import bisect
+from typing import Optional
+
+from backend.action_recognizer import ActionRecognizer
+from backend.frame_index import FrameCoverage
+
+
+class RunningStats:
+    """Welford 在线均值 / 方差 + 极值"""
+
+    __slots__ = ("count", "mean", "_m2", "min", "max")
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, x: float):
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (x - self.mean)
+        if x < self.min:
+            self.min = x
+        if x > self.max:
+            self.max = x
+
+    @property
+    def std(self) -> float:
+        """样本标准差（少于 2 个样本时为 0）"""
+        return math.sqrt(self._m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+    def to_dict(self, digits: int = 2) -> dict:
+        if self.count == 0:
+            return {"count": 0}
+        return {
+            "count": self.count,
+            "mean": round(self.mean, digits),
+            "std": round(self.std, digits),
+            "min": round(self.min, digits),
+            "max": round(self.max, digits),
+        }
+
+
+class P2Quantile:
+    """
+    P² 分位数估计（Jain & Chlamtac 1985）
+    只保存 5 个标记点，每个样本 O(1) 更新；前 5 个样本之前返回精确值
+    """
+
+    __slots__ = ("p", "_q", "_n", "_np", "_dn")
+
+    def __init__(self, p: float):
+        self.p = p
+        self._q: list = []                              # 标记点高度
+        self._n = [0, 1, 2, 3, 4]                       # 标记点实际位置
+        self._np = [0.0, 2 * p, 4 * p, 2 + 2 * p, 4.0]  # 标记点期望位置
+        self._dn = [0.0, p / 2, p, (1 + p) / 2, 1.0]
+
+    def add(self, x: float):
+        q = self._q
+        if len(q) < 5:
+            q.append(x)
+            if len(q) == 5:
+                q.sort()
+            return
+
+        # 定位样本所在区间并更新端点
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = 0
+            while x >= q[k + 1]:
+                k += 1
+
+        n = self._n
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self._np[i] += self._dn[i]
+
+        # 调整中间三个标记点
+        for i in range(1, 4):
+            d = self._np[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                s = 1 if d > 0 else -1
+                # 抛物线插值，越界时退化为线性插值
+                qp = q[i] + s / (n[i + 1] - n[i - 1]) * (
+                    (n[i] - n[i - 1] + s) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+                    + (n[i + 1] - n[i] - s) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+                )
+                if not q[i - 1] < qp < q[i + 1]:
+                    qp = q[i] + s * (q[i + s] - q[i]) / (n[i + s] - n[i])
+                q[i] = qp
+                n[i] += s
+
+    def value(self) -> Optional[float]:
+        q = self._q
+        if not q:
+            return None
+        if len(q) < 5:
+            ordered = sorted(q)
+            return ordered[min(len(ordered) - 1, int(round(self.p * (len(ordered) - 1))))]
+        return q[2]
+
+
+class MetricSummary:
+    """单个指标：均值方差 + 若干分位数"""
+
+    __slots__ = ("stats", "quantiles")
+
+    def __init__(self, quantiles: tuple):
+        self.stats = RunningStats()
+        self.quantiles = [P2Quantile(p) for p in quantiles]
+
+    def add(self, x: float):
+        self.stats.add(x)
+        for estimator in self.quantiles:
+            estimator.add(x)
+
+    def to_dict(self) -> dict:
+        result = self.stats.to_dict()
+        if self.stats.count:
+            for estimator in self.quantiles:
+                result[f"p{int(round(estimator.p * 100))}"] = round(estimator.value(), 2)
+        return result
+
+
+class SessionAnalytics:
+    """
+    整场会话的流式统计
+
+    回合（rally）：相邻击球动作间隔不超过 rally_gap 秒视为同一回合；
+    回合之间的间隔计为间歇（idle）。跳转后击球可能乱序到达，
+    因此只保存有序的击球时间戳（每次击球一个），回合在 summary 时切分
+    """
+
+    # 不计入击球的持续状态
+    STATES = ActionRecognizer.STATES
+
+    def __init__(self, fps: float, rally_gap: float = 3.0,
+                 quantiles: tuple = (0.1, 0.5, 0.9), frame_count: int = 0):
+        """
+        Args:
+            fps: 视频帧率（时间戳缺失或跳变时按帧间隔计时）
+            rally_gap: 回合内两次击球的最大间隔（秒）
+            quantiles: 输出的分位数
+            frame_count: 视频总帧数（用于预分配已计入帧的位图，0 = 按需增长）
+        """
+        self.frame_interval = 1.0 / fps if fps > 0 else 1.0 / 30
+        self.rally_gap = rally_gap
+        self.quantiles = quantiles
+        self.frames = 0
+        self.pose_frames = 0
+        self.duration = 0.0
+        self.joint_angles: dict = {}
+        self.biomechanics: dict = {}
+        # 动作 -> {"confidence": RunningStats, "biomechanics": {指标: RunningStats}}
+        self.actions: dict = {}
+        # 每帧识别状态的累计时长（秒）
+        self.state_seconds: dict = {}
+        # 击球时间戳（有序）
+        self.shot_times: list = []
+        self._seen = FrameCoverage(frame_count)
+        self._last_timestamp: Optional[float] = None
+
+    def add_frame(self, frame_number: int, timestamp: float,
+                  pose_result: Optional[dict], action_result: Optional[dict]):
+        """
+        计入一帧（O(1)）
+        跳转回放时已计入的帧号会被忽略，统计不重复；
+        向前跳过、之后再向后跳回处理的帧仍会计入
+        """
+        if not self._seen.add(frame_number):
+            return
+
+        dt = self.frame_interval
+        if self._last_timestamp is not None:
+            elapsed = timestamp - self._last_timestamp
+            if 0 < elapsed <= 10 * self.frame_interval:
+                dt = elapsed
+        self._last_timestamp = timestamp
+        self.frames += 1
+        self.duration += dt
+
+        state = action_result["action"] if action_result else "none"
+        self.state_seconds[state] = self.state_seconds.get(state, 0.0) + dt
+
+        if not pose_result:
+            return
+        self.pose_frames += 1
+        self._add_metrics(self.joint_angles, pose_result["joint_angles"])
+        self._add_metrics(self.biomechanics, pose_result["biomechanics"])
+
+        if action_result and action_result["is_new_action"] \
+                and action_result["action"] not in self.STATES:
+            self._add_event(action_result, pose_result["biomechanics"], timestamp)
+
+    def _add_metrics(self, target: dict, values: dict):
+        for name, value in values.items():
+            if value is None:
+                continue
+            metric = target.get(name)
+            if metric is None:
+                metric = target[name] = MetricSummary(self.quantiles)
+            metric.add(float(value))
+
+    def _add_event(self, action_result: dict, biomechanics: dict, timestamp: float):
+        """击球动作：触发帧的生物力学 + 回合切分"""
+        entry = self.actions.get(action_result["action"])
+        if entry is None:
+            entry = self.actions[action_result["action"]] = {
+                "confidence": RunningStats(),
+                "biomechanics": {},
+            }
+        entry["confidence"].add(action_result["confidence"])
+        for name, value in biomechanics.items():
+            if value is None:
+                continue
+            stats = entry["biomechanics"].get(name)
+            if stats is None:
+                stats = entry["biomechanics"][name] = RunningStats()
+            stats.add(float(value))
+        bisect.insort(self.shot_times, timestamp)
+
+    def rallies(self) -> tuple:
+        """按时间顺序切分回合，返回 (回合时长, 回合击球数, 间歇时长) 三个 RunningStats"""
+        durations, shots, idle = RunningStats(), RunningStats(), RunningStats()
+        start = last = None
+        count = 0
+        for t in self.shot_times:
+            if last is not None and t - last <= self.rally_gap:
+                last = t
+                count += 1
+                continue
+            if last is not None:
+                durations.add(last - start)
+                shots.add(count)
+                idle.add(t - last)
+            start = last = t
+            count = 1
+        # 进行中的回合按已有击球计入
+        if last is not None:
+            durations.add(last - start)
+            shots.add(count)
+        return durations, shots, idle
+
+    def summary(self) -> dict:
+        """当前统计快照"""
+        durations, shots, idle = self.rallies()
+        active = durations.mean * durations.count
+
+        return {
+            "frames": self.frames,
+            "pose_frames": self.pose_frames,
+            "detection_rate": round(self.pose_frames / self.frames, 3) if self.frames else 0.0,
+            "duration_seconds": round(self.duration, 3),
+            "joint_angles": {name: m.to_dict() for name, m in self.joint_angles.items()},
+            "biomechanics": {name: m.to_dict() for name, m in self.biomechanics.items()},
+            "actions": {
+                action: {
+                    "count": entry["confidence"].count,
+                    "confidence": round(entry["confidence"].mean, 3),
+                    "biomechanics": {
+                        name: stats.to_dict() for name, stats in entry["biomechanics"].items()
+                    },
+                }
+                for action, entry in self.actions.items()
+            },
+            "state_seconds": {
+                state: round(seconds, 3) for state, seconds in self.state_seconds.items()
+            },
+            "rallies": {
+                "count": durations.count,
+                "active_seconds": round(active, 3),
+                "duration": durations.to_dict(),
+                "shots": shots.to_dict(),
+            },
+            "idle": {
+                "count": idle.count,
+                "duration": idle.to_dict(),
+            },
+        }
@@ -0,0 +1,292 @@
+"""
+Sport Vision — 关键点归档模块
+分析结果的定长二进制格式：逐帧追加写入，读取时 numpy.memmap 零拷贝切片
+"""
+
+import json
+import time
+import numpy as np
+from pathlib import Path
+from typing import Optional
+
+# 格式版本（字段布局变化时递增）
+FORMAT_VERSION = 1
+MAGIC = b"SVKP"
+HEADER_SIZE = 64
+
+# 关键点顺序（MediaPipe 索引），与 PoseAnalyzer.LANDMARK_NAMES 一致
+KEYPOINT_IDS = (0, 11, 12, 13, 14, 15, 16, 23, 24, 25, 26, 27, 28)
+KEYPOINT_NAMES = (
+    "nose", "left_shoulder", "right_shoulder",
+    "left_elbow", "right_elbow", "left_wrist", "right_wrist",
+    "left_hip", "right_hip", "left_knee", "right_knee",
+    "left_ankle", "right_ankle",
+)
+ANGLE_NAMES = (
+    "left_elbow", "right_elbow", "left_shoulder", "right_shoulder",
+    "left_knee", "right_knee", "left_hip", "right_hip",
+)
+BIOMECHANICS_NAMES = (
+    "wrist_speed", "body_lean", "knee_bend", "arm_extension", "symmetry_score",
+)
+
+HEADER_DTYPE = np.dtype([
+    ("magic", "S4"),
+    ("version", "<u2"),
+    ("header_size", "<u2"),
+    ("record_size", "<u4"),
+    ("width", "<u4"),
+    ("height", "<u4"),
+    ("keypoints", "<u2"),
+    ("angles", "<u2"),
+    ("metrics", "<u2"),
+    ("reserved", "<u2"),
+    ("fps", "<f8"),
+    ("frame_count", "<u8"),
+    ("created_at", "<f8"),
+])
+
+# 每帧一条记录；未检测到人体的帧除 frame / timestamp 外均为 NaN
+RECORD_DTYPE = np.dtype([
+    ("frame", "<i4"),
+    ("timestamp", "<f4"),
+    ("confidence", "<f4"),
+    ("center_of_mass", "<f4", (2,)),
+    ("keypoints", "<f4", (len(KEYPOINT_IDS), 4)),  # 像素 x, y, z, visibility
+    ("joint_angles", "<f4", (len(ANGLE_NAMES),)),
+    ("biomechanics", "<f4", (len(BIOMECHANICS_NAMES),)),
+])
+
+_KP_ROW = {idx: row for row, idx in enumerate(KEYPOINT_IDS)}
+_ANGLE_COL = {name: i for i, name in enumerate(ANGLE_NAMES)}
+_METRIC_COL = {name: i for i, name in enumerate(BIOMECHANICS_NAMES)}
+
+
+def events_path(path: Path) -> Path:
+    """动作事件表（JSON 侧车文件）路径"""
+    path = Path(path)
+    return path.with_name(path.stem + ".events.json")
+
+
+def fill_record(record: np.ndarray, frame_number: int, timestamp: float,
+                pose: Optional[dict]):
+    """把 Pipeline._sanitize_pose 形状的字典写入一条记录（原地）"""
+    record["frame"] = frame_number
+    record["timestamp"] = timestamp
+    record["confidence"] = np.nan
+    record["center_of_mass"] = np.nan
+    record["keypoints"] = np.nan
+    record["joint_angles"] = np.nan
+    record["biomechanics"] = np.nan
+    if not pose:
+        return
+
+    record["confidence"] = pose.get("confidence", np.nan)
+    com = pose.get("center_of_mass")
+    if com:
+        record["center_of_mass"] = (com["x"], com["y"])
+    keypoints = record["keypoints"]
+    for kp in pose.get("keypoints", ()):
+        row = _KP_ROW.get(kp["id"])
+        if row is not None:
+            keypoints[row] = (kp["x"], kp["y"], kp.get("z", 0.0), kp.get("visibility", 1.0))
+    record["keypoints"] = keypoints
+    angles = record["joint_angles"]
+    for name, value in pose.get("joint_angles", {}).items():
+        col = _ANGLE_COL.get(name)
+        if col is not None and value is not None:
+            angles[col] = value
+    record["joint_angles"] = angles
+    metrics = record["biomechanics"]
+    for name, value in pose.get("biomechanics", {}).items():
+        col = _METRIC_COL.get(name)
+        if col is not None and value is not None:
+            metrics[col] = value
+    record["biomechanics"] = metrics
+
+
+def record_to_pose(record) -> Optional[dict]:
+    """记录还原为 Pipeline._sanitize_pose 的字典形状；无人体帧返回 None"""
+    if np.isnan(record["confidence"]):
+        return None
+    keypoints = []
+    for row, idx in enumerate(KEYPOINT_IDS):
+        x, y, z, visibility = record["keypoints"][row]
+        if np.isnan(x):
+            continue
+        keypoints.append({
+            "id": idx,
+            "name": KEYPOINT_NAMES[row],
+            "x": float(x),
+            "y": float(y),
+            "z": float(z),
+            "visibility": float(visibility),
+        })
+    joint_angles = {
+        name: round(float(value), 1)
+        for name, value in zip(ANGLE_NAMES, record["joint_angles"])
+        if not np.isnan(value)
+    }
+    biomechanics = {
+        name: round(float(value), 1)
+        for name, value in zip(BIOMECHANICS_NAMES, record["biomechanics"])
+        if not np.isnan(value)
+    }
+    com = record["center_of_mass"]
+    return {
+        "keypoints": keypoints,
+        "joint_angles": joint_angles,
+        "biomechanics": biomechanics,
+        "center_of_mass": None if np.isnan(com[0]) else {
+            "x": round(float(com[0]), 1), "y": round(float(com[1]), 1),
+        },
+        "confidence": round(float(record["confidence"]), 2),
+    }
+
+
+class KeypointArchiveWriter:
+    """
+    追加写入器：记录先写入内存批次，满一批再顺序写盘
+    close 时回填头部帧数并写出事件表
+    """
+
+    def __init__(self, path: Path, width: int, height: int, fps: float,
+                 batch_size: int = 256):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.frame_count = 0
+        self.created_at = time.time()
+        self._batch = np.empty(batch_size, dtype=RECORD_DTYPE)
+        self._pending = 0
+        self._file = open(self.path, "wb")
+        self._write_header()
+
+    def _write_header(self):
+        header = np.zeros(1, dtype=HEADER_DTYPE)
+        header["magic"] = MAGIC
+        header["version"] = FORMAT_VERSION
+        header["header_size"] = HEADER_SIZE
+        header["record_size"] = RECORD_DTYPE.itemsize
+        header["width"] = self.width
+        header["height"] = self.height
+        header["keypoints"] = len(KEYPOINT_IDS)
+        header["angles"] = len(ANGLE_NAMES)
+        header["metrics"] = len(BIOMECHANICS_NAMES)
+        header["fps"] = self.fps
+        header["frame_count"] = self.frame_count
+        header["created_at"] = self.created_at
+        self._file.seek(0)
+        self._file.write(header.tobytes().ljust(HEADER_SIZE, b"\0"))
+
+    def append(self, frame_number: int, timestamp: float, pose: Optional[dict]):
+        fill_record(self._batch[self._pending], frame_number, timestamp, pose)
+        self._pending += 1
+        self.frame_count += 1
+        if self._pending == len(self._batch):
+            self.flush()
+
+    def flush(self):
+        if self._pending:
+            self._file.write(self._batch[:self._pending].tobytes())
+            self._pending = 0
+        self._file.flush()
+
+    def close(self, events: Optional[list] = None):
+        """结束写入；events 为 Pipeline.action_events 形状的列表"""
+        if self._file.closed:
+            return
+        self.flush()
+        self._write_header()
+        self._file.close()
+        if events is not None:
+            tmp_path = events_path(self.path).with_suffix(".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(events, f, ensure_ascii=False)
+            tmp_path.replace(events_path(self.path))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class KeypointArchive:
+    """只读归档：记录数组为 memmap，切片不复制也不解析"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            raw = f.read(HEADER_SIZE)
+        if len(raw) < HEADER_DTYPE.itemsize:
+            raise ValueError(f"Not a keypoint archive: {path}")
+        header = np.frombuffer(raw[:HEADER_DTYPE.itemsize], dtype=HEADER_DTYPE)[0]
+        if header["magic"] != MAGIC:
+            raise ValueError(f"Not a keypoint archive: {path}")
+        if header["version"] != FORMAT_VERSION \
+                or header["record_size"] != RECORD_DTYPE.itemsize:
+            raise ValueError(
+                f"Unsupported archive version {int(header['version'])} "
+                f"(expected {FORMAT_VERSION})"
+            )
+        self.version = int(header["version"])
+        self.width = int(header["width"])
+        self.height = int(header["height"])
+        self.fps = float(header["fps"])
+        self.created_at = float(header["created_at"])
+
+        # 以文件大小为准：未正常 close 的归档也能读出已写入的完整记录
+        count = (self.path.stat().st_size - HEADER_SIZE) // RECORD_DTYPE.itemsize
+        if count > 0:
+            self.records = np.memmap(self.path, dtype=RECORD_DTYPE, mode="r",
+                                     offset=HEADER_SIZE, shape=(count,))
+        else:
+            self.records = np.empty(0, dtype=RECORD_DTYPE)
+
+        self._events: Optional[list] = None
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    @property
+    def events(self) -> list:
+        if self._events is None:
+            try:
+                with open(events_path(self.path), encoding="utf-8") as f:
+                    self._events = json.load(f)
+            except (OSError, ValueError):
+                self._events = []
+        return self._events
+
+    def frame_slice(self, start_frame: int, end_frame: Optional[int] = None) -> np.ndarray:
+        """帧号区间 [start_frame, end_frame] 的记录（帧号单调递增时二分查找）"""
+        frames = self.records["frame"]
+        lo = int(np.searchsorted(frames, start_frame, side="left"))
+        hi = len(frames) if end_frame is None \
+            else int(np.searchsorted(frames, end_frame, side="right"))
+        return self.records[lo:hi]
+
+    def keypoints_xy(self) -> np.ndarray:
+        """(T, 13, 2) 像素坐标，可直接用于 ActionRecognizer.recognize_batch"""
+        return self.records["keypoints"][:, :, :2]
+
+    def joint_angle_arrays(self) -> dict:
+        """{关节名: (T,) 角度数组}，缺失为 NaN"""
+        angles = self.records["joint_angles"]
+        return {name: angles[:, i] for i, name in enumerate(ANGLE_NAMES)}
+
+    def pose(self, index: int) -> Optional[dict]:
+        return record_to_pose(self.records[index])
+
+    def iter_frames(self, start: int = 0, end: Optional[int] = None):
+        """逐帧产出 (frame, timestamp, pose)，形状同流水线输出"""
+        for record in self.records[start:end]:
+            yield int(record["frame"]), round(float(record["timestamp"]), 3), \
+                record_to_pose(record)
+
+    def close(self):
+        """释放映射（仍被切片引用时由引用方持有到释放为止）"""
+        self.records = np.empty(0, dtype=RECORD_DTYPE)
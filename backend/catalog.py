@@ -0,0 +1,212 @@
+"""
+Sport Vision — Demo 视频目录模块
+启动时扫描 demo 目录并缓存视频元数据、缩略图和封面帧，目录变化时增量刷新
+"""
+
+import json
+import time
+import hashlib
+import threading
+from pathlib import Path
+from typing import Optional
+
+
+class DemoCatalog:
+    """
+    Demo 视频目录索引
+    按 id（文件名去扩展名）O(1) 查找；同名不同扩展名时按 extensions 顺序取第一个
+    """
+
+    def __init__(self, directory: Path, cache_dir: Path, extensions: list,
+                 thumbnail_width: int = 320, poster_width: int = 960,
+                 check_interval: float = 2.0):
+        """
+        Args:
+            directory: demo 视频目录
+            cache_dir: 元数据与图片缓存目录
+            extensions: 识别的视频扩展名（优先级从高到低）
+            thumbnail_width, poster_width: 缩略图 / 封面帧宽度（像素）
+            check_interval: 两次目录变化检查的最短间隔（秒）
+        """
+        self.directory = Path(directory)
+        self.cache_dir = Path(cache_dir)
+        self.extensions = [ext.lower() for ext in extensions]
+        self.thumbnail_width = thumbnail_width
+        self.poster_width = poster_width
+        self.check_interval = check_interval
+        # id -> 条目
+        self.entries: dict = {}
+        self._dir_mtime: Optional[int] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._index_path = self.cache_dir / "index.json"
+
+    def is_stale(self) -> bool:
+        """目录 mtime 变化时需要刷新（检查本身有频率限制）"""
+        now = time.monotonic()
+        if self._dir_mtime is not None and now - self._checked_at < self.check_interval:
+            return False
+        self._checked_at = now
+        try:
+            mtime = self.directory.stat().st_mtime_ns
+        except OSError:
+            return bool(self.entries)
+        return mtime != self._dir_mtime
+
+    def refresh(self, force: bool = False):
+        """重新扫描目录；未变化的文件沿用已有元数据，只探测新增或修改的文件"""
+        with self._lock:
+            if not force and not self.is_stale():
+                return
+            try:
+                self._dir_mtime = self.directory.stat().st_mtime_ns
+            except OSError:
+                self._dir_mtime = None
+                self.entries = {}
+                return
+
+            known = {entry["filename"]: entry for entry in self.entries.values()}
+            if not known:
+                known = self._load_index()
+
+            rank = {ext: i for i, ext in enumerate(self.extensions)}
+            files = sorted(
+                (p for p in self.directory.iterdir()
+                 if p.suffix.lower() in rank and p.is_file()),
+                key=lambda p: (p.stem, rank[p.suffix.lower()]),
+            )
+
+            entries = {}
+            for path in files:
+                if path.stem in entries:
+                    continue
+                stat = path.stat()
+                entry = known.get(path.name)
+                if entry is None or entry["mtime_ns"] != stat.st_mtime_ns \
+                        or entry["size"] != stat.st_size:
+                    entry = self._probe(path, stat)
+                entries[path.stem] = entry
+
+            self.entries = entries
+            self._save_index()
+
+    def get(self, demo_id: str) -> Optional[dict]:
+        return self.entries.get(demo_id)
+
+    def path_of(self, demo_id: str) -> Optional[str]:
+        entry = self.entries.get(demo_id)
+        if entry is None:
+            return None
+        path = self.directory / entry["filename"]
+        return str(path) if path.exists() else None
+
+    def image_path(self, demo_id: str, kind: str) -> Optional[Path]:
+        """缩略图（thumbnail）或封面帧（poster）的缓存路径"""
+        entry = self.entries.get(demo_id)
+        if entry is None or not entry.get(kind):
+            return None
+        path = self.cache_dir / entry[kind]
+        return path if path.exists() else None
+
+    def list(self) -> list:
+        """对外展示的条目列表（不含内部字段）"""
+        result = []
+        for demo_id, entry in self.entries.items():
+            item = {
+                "id": demo_id,
+                "name": demo_id.replace("_", " ").replace("-", " ").title(),
+                "filename": entry["filename"],
+                "size_mb": round(entry["size"] / (1024 * 1024), 1),
+                "frame_count": entry["frame_count"],
+                "fps": entry["fps"],
+                "width": entry["width"],
+                "height": entry["height"],
+                "duration": entry["duration"],
+                "codec": entry["codec"],
+            }
+            if entry.get("thumbnail"):
+                item["thumbnail_url"] = f"/api/demos/{demo_id}/thumbnail"
+            if entry.get("poster"):
+                item["poster_url"] = f"/api/demos/{demo_id}/poster"
+            result.append(item)
+        return result
+
+    def _probe(self, path: Path, stat) -> dict:
+        """读取视频元数据并截取封面帧（约 10% 位置）"""
+        import cv2
+
+        entry = {
+            "filename": path.name,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "frame_count": 0,
+            "fps": 0.0,
+            "width": 0,
+            "height": 0,
+            "duration": 0.0,
+            "codec": None,
+            "thumbnail": None,
+            "poster": None,
+        }
+        cap = cv2.VideoCapture(str(path))
+        if not cap.isOpened():
+            return entry
+        try:
+            frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            fps = cap.get(cv2.CAP_PROP_FPS) or 30
+            fourcc = int(cap.get(cv2.CAP_PROP_FOURCC))
+            codec = "".join(chr((fourcc >> (8 * i)) & 0xFF) for i in range(4)).strip("\x00 ")
+            entry.update({
+                "frame_count": frame_count,
+                "fps": round(fps, 3),
+                "width": int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+                "height": int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+                "duration": round(frame_count / fps, 3) if frame_count > 0 else 0.0,
+                "codec": codec or None,
+            })
+
+            if frame_count > 10:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, frame_count // 10)
+            ret, frame = cap.read()
+            if not ret:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                ret, frame = cap.read()
+        finally:
+            cap.release()
+        if not ret:
+            return entry
+
+        key = hashlib.sha1(
+            f"{path.resolve()}:{stat.st_mtime_ns}:{stat.st_size}".encode("utf-8")
+        ).hexdigest()[:16]
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        for kind, width in (("poster", self.poster_width), ("thumbnail", self.thumbnail_width)):
+            h, w = frame.shape[:2]
+            if w > width:
+                image = cv2.resize(frame, (width, int(h * width / w)),
+                                   interpolation=cv2.INTER_AREA)
+            else:
+                image = frame
+            name = f"{key}_{kind}.jpg"
+            if cv2.imwrite(str(self.cache_dir / name), image,
+                           [cv2.IMWRITE_JPEG_QUALITY, 85]):
+                entry[kind] = name
+        return entry
+
+    def _load_index(self) -> dict:
+        """读取上次的元数据缓存（文件名 -> 条目）"""
+        try:
+            with open(self._index_path, encoding="utf-8") as f:
+                return {entry["filename"]: entry for entry in json.load(f)}
+        except (OSError, ValueError, KeyError, TypeError):
+            return {}
+
+    def _save_index(self):
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp_path = self._index_path.with_suffix(".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(list(self.entries.values()), f, ensure_ascii=False)
+            tmp_path.replace(self._index_path)
+        except OSError:
+            pass
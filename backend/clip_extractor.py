@@ -0,0 +1,327 @@
+"""
+Sport Vision — 精彩片段剪辑模块
+围绕动作事件切出短片段：关键帧对齐部分直接流复制，仅重编码首尾不完整的 GOP；
+首尾按源流的 profile / level / 像素格式编码，拼接结果经完整解码校验，不通过时整段重编码
+"""
+
+import re
+import json
+import shutil
+import subprocess
+import tempfile
+import threading
+import numpy as np
+from pathlib import Path
+from typing import Callable, Optional
+
+
+class ClipExtractor:
+    """基于 ffmpeg 的片段剪辑器（无 ffmpeg 时退回 OpenCV 逐帧重编码片段区间）"""
+
+    # 可与 libx264 重编码片段直接拼接的源编码
+    CONCAT_CODECS = {"h264"}
+
+    # ffprobe 报告的 H.264 profile -> libx264 -profile:v
+    X264_PROFILES = {
+        "Constrained Baseline": "baseline",
+        "Baseline": "baseline",
+        "Main": "main",
+        "High": "high",
+    }
+
+    # libx264 在上述 profile 下可输出的像素格式
+    X264_PIX_FMTS = {"yuv420p", "yuvj420p"}
+
+    def __init__(self, output_dir: Path, ffmpeg: Optional[str] = None,
+                 ffprobe: Optional[str] = None):
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.ffmpeg = ffmpeg or shutil.which("ffmpeg")
+        self.ffprobe = ffprobe or shutil.which("ffprobe")
+        # 探测缓存：(路径, mtime) -> 关键帧时间 np.ndarray / 视频流参数 dict
+        self._keyframe_cache: dict = {}
+        self._stream_cache: dict = {}
+        self._cache_lock = threading.Lock()
+
+    def extract(self, video_path: str, events: list, prefix: str,
+                pre_seconds: float = 1.0, post_seconds: float = 2.0,
+                progress: Optional[Callable[[float], None]] = None) -> list:
+        """
+        为每个事件剪出 [t - pre, t + post] 片段
+
+        Args:
+            events: [{action, frame, timestamp}, ...]；timestamp 为 None 时按 (frame - 1) / fps 推算
+                （帧号从 1 开始，与 Pipeline 的时间戳约定一致）
+            prefix: 输出文件名前缀（通常为任务 id）
+
+        Returns:
+            [{action, frame, start, end, filename, method}, ...]
+        """
+        fps, duration = self._probe_timing(video_path)
+        clips = []
+        for i, ev in enumerate(events):
+            t = ev.get("timestamp")
+            t = (ev["frame"] - 1) / fps if t is None else float(t)
+            start = max(0.0, t - pre_seconds)
+            end = t + post_seconds
+            if duration:
+                end = min(end, duration)
+            if end <= start:
+                continue
+
+            filename = self.clip_filename(prefix, i, ev["action"], ev["frame"])
+            out_path = self.output_dir / filename
+            method = self.cut(video_path, start, end, out_path)
+            clips.append({
+                "action": ev["action"],
+                "frame": ev["frame"],
+                "start": round(start, 3),
+                "end": round(end, 3),
+                "filename": filename,
+                "method": method,
+            })
+            if progress:
+                progress((i + 1) / len(events))
+        return clips
+
+    @staticmethod
+    def clip_filename(prefix: str, index: int, action: str, frame: int) -> str:
+        """输出文件名：各部分只保留字母、数字、下划线和连字符，不会逃出输出目录"""
+        def safe(part) -> str:
+            return re.sub(r"[^A-Za-z0-9_-]+", "_", str(part)).strip("_") or "clip"
+        return f"{safe(prefix)}_{index:03d}_{safe(action)}_{int(frame)}.mp4"
+
+    def cut(self, video_path: str, start: float, end: float, out_path: Path) -> str:
+        """
+        剪出 [start, end] 区间，返回使用的方式：
+        "copy"（纯流复制）/ "smart"（首尾重编码 + 中间复制）/ "reencode" / "opencv"
+        流复制结果校验不通过时退回整段重编码；重编码结果仍不通过时抛出 RuntimeError
+        """
+        if not self.ffmpeg:
+            self._cut_opencv(video_path, start, end, out_path)
+            return "opencv"
+
+        keyframes = self._keyframes(video_path)
+        stream = self._probe_stream(video_path)
+        inside = keyframes[(keyframes >= start) & (keyframes <= end)] if keyframes is not None else []
+
+        if len(inside) > 0 and self.smart_compatible(stream):
+            k_first, k_last = float(inside[0]), float(inside[-1])
+            try:
+                if k_first - start < 1e-3:
+                    # 起点恰好是关键帧：整段复制
+                    self._run_ffmpeg(self._copy_args(video_path, start, end, out_path))
+                    method = "copy"
+                else:
+                    self._smart_cut(video_path, start, end, k_first, k_last, out_path, stream)
+                    method = "smart"
+                if self._verify(out_path, end - start):
+                    return method
+            except subprocess.CalledProcessError:
+                pass
+
+        self._run_ffmpeg(self._encode_args(video_path, start, end, out_path))
+        if not self._verify(out_path, end - start):
+            raise RuntimeError(f"Clip failed verification: {out_path.name}")
+        return "reencode"
+
+    @classmethod
+    def smart_compatible(cls, stream: Optional[dict]) -> bool:
+        """源流能否由 libx264 以相同 profile / 像素格式编码首尾并与流复制段拼接"""
+        if not stream or stream.get("codec_name") not in cls.CONCAT_CODECS:
+            return False
+        return stream.get("profile") in cls.X264_PROFILES \
+            and stream.get("pix_fmt") in cls.X264_PIX_FMTS
+
+    def _smart_cut(self, video_path: str, start: float, end: float,
+                   k_first: float, k_last: float, out_path: Path, stream: dict):
+        """
+        首段 [start, k_first) 与尾段 [k_last, end] 重编码，中间关键帧对齐段直接复制
+        各段转为 Annex B 的 MPEG-TS：每段的 SPS / PPS 随码流携带，拼接处解码器可切换参数集
+        """
+        with tempfile.TemporaryDirectory(dir=self.output_dir) as tmp:
+            tmp_dir = Path(tmp)
+            parts = []
+            if k_first - start > 1e-3:
+                parts.append(self._encode_args(video_path, start, k_first,
+                                               tmp_dir / "head.ts", stream))
+            if k_last > k_first:
+                parts.append(self._copy_args(video_path, k_first, k_last, tmp_dir / "body.ts"))
+            if end - k_last > 1e-3:
+                parts.append(self._encode_args(video_path, k_last, end,
+                                               tmp_dir / "tail.ts", stream))
+
+            list_file = tmp_dir / "parts.txt"
+            lines = []
+            for args in parts:
+                self._run_ffmpeg(args)
+                lines.append(f"file '{args[-1]}'")
+            list_file.write_text("\n".join(lines) + "\n")
+
+            self._run_ffmpeg([
+                "-f", "concat", "-safe", "0", "-i", str(list_file),
+                "-c", "copy", "-movflags", "+faststart",
+            ] + self._timescale_args(stream) + [str(out_path)])
+
+    @staticmethod
+    def _ts_args(out_path: Path) -> list:
+        """中间段输出为 MPEG-TS（Annex B 码流）"""
+        if Path(out_path).suffix != ".ts":
+            return []
+        return ["-bsf:v", "h264_mp4toannexb", "-f", "mpegts"]
+
+    @staticmethod
+    def _timescale_args(stream: Optional[dict]) -> list:
+        """MP4 输出沿用源流的时间基"""
+        time_base = (stream or {}).get("time_base", "")
+        _, _, denominator = time_base.partition("/")
+        if denominator.isdigit() and int(denominator) > 0:
+            return ["-video_track_timescale", denominator]
+        return []
+
+    def _copy_args(self, video_path: str, start: float, end: float, out_path: Path) -> list:
+        return [
+            "-ss", f"{start:.3f}", "-i", video_path, "-t", f"{end - start:.3f}",
+            "-map", "0:v:0", "-c", "copy", "-avoid_negative_ts", "make_zero",
+        ] + self._ts_args(out_path) + [str(out_path)]
+
+    def _encode_args(self, video_path: str, start: float, end: float, out_path: Path,
+                     stream: Optional[dict] = None) -> list:
+        """
+        libx264 重编码；给出源流参数时匹配其 profile / level / 像素格式，
+        否则按 x264 默认（High，yuv420p）输出完整片段
+        """
+        args = [
+            "-ss", f"{start:.3f}", "-i", video_path, "-t", f"{end - start:.3f}",
+            "-map", "0:v:0", "-c:v", "libx264", "-preset", "veryfast", "-crf", "20",
+        ]
+        if stream is None:
+            return args + ["-pix_fmt", "yuv420p", str(out_path)]
+        args += ["-pix_fmt", stream["pix_fmt"],
+                 "-profile:v", self.X264_PROFILES[stream["profile"]]]
+        level = stream.get("level")
+        if isinstance(level, int) and level > 0:
+            args += ["-level:v", f"{level / 10:.1f}"]
+        return args + self._ts_args(out_path) + [str(out_path)]
+
+    def _verify(self, out_path: Path, expected_duration: float) -> bool:
+        """
+        输出校验：ffprobe 能读出视频流且时长与预期相符，并完整解码一遍无错误
+        （拼接处参数集不兼容时解码器会报错）
+        """
+        if not out_path.exists() or out_path.stat().st_size == 0:
+            return False
+        if self.ffprobe:
+            proc = subprocess.run(
+                [self.ffprobe, "-v", "error", "-select_streams", "v:0",
+                 "-show_entries", "format=duration:stream=codec_name",
+                 "-of", "json", str(out_path)],
+                check=False, capture_output=True, text=True,
+            )
+            try:
+                info = json.loads(proc.stdout or "{}")
+                duration = float(info["format"]["duration"])
+            except (ValueError, KeyError, TypeError):
+                return False
+            if proc.returncode != 0 or not info.get("streams"):
+                return False
+            # 允许关键帧对齐与帧时长带来的少量偏差
+            if abs(duration - expected_duration) > max(0.5, expected_duration * 0.2):
+                return False
+        proc = subprocess.run(
+            [self.ffmpeg, "-v", "error", "-i", str(out_path), "-f", "null", "-"],
+            check=False, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+        )
+        return proc.returncode == 0 and not proc.stderr.strip()
+
+    def _run_ffmpeg(self, args: list):
+        subprocess.run(
+            [self.ffmpeg, "-y", "-v", "error"] + [str(a) for a in args],
+            check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+        )
+
+    def _keyframes(self, video_path: str) -> Optional[np.ndarray]:
+        """只解复用不解码地读取视频流的关键帧时间（秒），按文件缓存"""
+        if not self.ffprobe:
+            return None
+        key = (str(Path(video_path).resolve()), Path(video_path).stat().st_mtime_ns)
+        with self._cache_lock:
+            if key in self._keyframe_cache:
+                return self._keyframe_cache[key]
+
+        proc = subprocess.run(
+            [self.ffprobe, "-v", "error", "-select_streams", "v:0",
+             "-show_entries", "packet=pts_time,flags", "-of", "csv=p=0", video_path],
+            check=False, capture_output=True, text=True,
+        )
+        times = []
+        for line in proc.stdout.splitlines():
+            pts, _, flags = line.partition(",")
+            if "K" in flags:
+                try:
+                    times.append(float(pts))
+                except ValueError:
+                    continue
+        keyframes = np.array(sorted(times), dtype=np.float64)
+
+        with self._cache_lock:
+            self._keyframe_cache[key] = keyframes
+        return keyframes
+
+    def _probe_stream(self, video_path: str) -> Optional[dict]:
+        """视频流的编码参数 {codec_name, profile, level, pix_fmt, time_base}，按文件缓存"""
+        if not self.ffprobe:
+            return None
+        key = (str(Path(video_path).resolve()), Path(video_path).stat().st_mtime_ns)
+        with self._cache_lock:
+            if key in self._stream_cache:
+                return self._stream_cache[key]
+
+        proc = subprocess.run(
+            [self.ffprobe, "-v", "error", "-select_streams", "v:0",
+             "-show_entries", "stream=codec_name,profile,level,pix_fmt,time_base",
+             "-of", "json", video_path],
+            check=False, capture_output=True, text=True,
+        )
+        try:
+            streams = json.loads(proc.stdout or "{}").get("streams") or []
+        except ValueError:
+            streams = []
+        stream = streams[0] if streams else None
+
+        with self._cache_lock:
+            self._stream_cache[key] = stream
+        return stream
+
+    def _probe_timing(self, video_path: str) -> tuple:
+        """返回 (fps, 时长秒数 or None)"""
+        import cv2
+
+        cap = cv2.VideoCapture(video_path)
+        try:
+            fps = cap.get(cv2.CAP_PROP_FPS) or 30
+            frames = cap.get(cv2.CAP_PROP_FRAME_COUNT)
+            return fps, (frames / fps if frames > 0 else None)
+        finally:
+            cap.release()
+
+    def _cut_opencv(self, video_path: str, start: float, end: float, out_path: Path):
+        """无 ffmpeg 时的兜底：只解码并重编码片段区间内的帧"""
+        import cv2
+
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            raise ValueError(f"Cannot open video: {video_path}")
+        fps = cap.get(cv2.CAP_PROP_FPS) or 30
+        size = (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+        writer = cv2.VideoWriter(str(out_path), cv2.VideoWriter_fourcc(*"mp4v"), fps, size)
+        try:
+            cap.set(cv2.CAP_PROP_POS_MSEC, start * 1000.0)
+            while True:
+                ret, frame = cap.read()
+                if not ret or cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0 > end:
+                    break
+                writer.write(frame)
+        finally:
+            writer.release()
+            cap.release()
@@ -0,0 +1,172 @@
+"""
+Sport Vision — 帧索引模块
+为每个视频构建一次帧号 ↔ 时间戳索引并缓存，支持按帧号或时间随机定位；
+以及记录已处理帧号的位图，跳转回放时去重并检测遗漏的区间
+"""
+
+import hashlib
+import threading
+import numpy as np
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+# 磁盘缓存目录
+CACHE_DIR = Path(__file__).resolve().parent.parent / "cache" / "frame_index"
+
+# 内存缓存：(路径, mtime, 大小) -> FrameIndex
+_MAX_CACHED = 32
+_cache: "OrderedDict[tuple, FrameIndex]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+class FrameIndex:
+    """
+    视频帧时间戳索引
+    帧号从 1 开始，与 Pipeline 输出的 frame_number 一致
+    """
+
+    def __init__(self, timestamps: np.ndarray, fps: float):
+        self.timestamps = timestamps  # 每帧显示时间（秒），单调不减
+        self.fps = fps
+
+    @property
+    def frame_count(self) -> int:
+        return len(self.timestamps)
+
+    @property
+    def duration(self) -> float:
+        if self.frame_count == 0:
+            return 0.0
+        return float(self.timestamps[-1]) + 1.0 / self.fps
+
+    def clamp(self, frame_number: int) -> int:
+        """将帧号限制在有效范围内"""
+        return int(min(max(frame_number, 1), max(self.frame_count, 1)))
+
+    def frame_at(self, seconds: float) -> int:
+        """返回时间点所在的帧号（显示时间 <= seconds 的最后一帧）"""
+        pos = int(np.searchsorted(self.timestamps, seconds, side="right"))
+        return self.clamp(pos)
+
+    def time_of(self, frame_number: int) -> float:
+        """返回帧号对应的显示时间（秒）"""
+        if self.frame_count == 0:
+            return 0.0
+        return float(self.timestamps[self.clamp(frame_number) - 1])
+
+    @classmethod
+    def build(cls, video_path: str) -> "FrameIndex":
+        """
+        扫描整个视频构建索引
+        只 grab 不 retrieve，跳过像素格式转换；容器不提供时间戳时按 fps 推算
+        """
+        import cv2
+
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            raise ValueError(f"Cannot open video: {video_path}")
+
+        fps = cap.get(cv2.CAP_PROP_FPS) or 30
+        timestamps = []
+        try:
+            while cap.grab():
+                timestamps.append(cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0)
+        finally:
+            cap.release()
+
+        ts = np.asarray(timestamps, dtype=np.float64)
+        if len(ts) > 1 and (np.any(np.diff(ts) < 0) or ts[-1] <= 0):
+            ts = np.arange(len(ts), dtype=np.float64) / fps
+        return cls(ts, fps)
+
+    def save(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp.npz")
+        np.savez(tmp_path, timestamps=self.timestamps, fps=np.float64(self.fps))
+        tmp_path.replace(path)
+
+    @classmethod
+    def load(cls, path: Path) -> "FrameIndex":
+        with np.load(path) as data:
+            return cls(data["timestamps"], float(data["fps"]))
+
+
+class FrameCoverage:
+    """
+    已处理帧号集合（每帧一个字节的位图，帧号从 1 开始）
+    跳转会留下空洞，因此不能用"已处理的最大帧号"判断是否重复：
+    先向前跳、再向后跳时，中间未处理的帧仍需计入
+    """
+
+    def __init__(self, frame_count: int = 0):
+        self._seen = bytearray(max(0, frame_count) + 1)
+        self.count = 0
+        self.last = 0   # 已处理的最大帧号
+
+    def add(self, frame_number: int) -> bool:
+        """标记一帧，返回是否为首次处理（帧号 < 1 视为无效，返回 False）"""
+        if frame_number < 1:
+            return False
+        if frame_number >= len(self._seen):
+            # 容器报告的帧数可能偏小
+            self._seen.extend(bytes(frame_number + 1 - len(self._seen)))
+        if self._seen[frame_number]:
+            return False
+        self._seen[frame_number] = 1
+        self.count += 1
+        if frame_number > self.last:
+            self.last = frame_number
+        return True
+
+    def __contains__(self, frame_number: int) -> bool:
+        return 0 < frame_number < len(self._seen) and bool(self._seen[frame_number])
+
+    def missing(self, step: int = 1, end: Optional[int] = None) -> int:
+        """1..end（默认已处理的最大帧号）中按 step 抽样应处理、但尚未处理的帧数"""
+        end = self.last if end is None else end
+        if end < step:
+            return 0
+        seen = np.frombuffer(bytes(self._seen[:end + 1]), dtype=np.uint8)
+        expected = seen[step::step]
+        return int(len(expected) - np.count_nonzero(expected))
+
+
+def _cache_key(video_path: str) -> tuple:
+    stat = Path(video_path).stat()
+    return (str(Path(video_path).resolve()), stat.st_mtime_ns, stat.st_size)
+
+
+def get_frame_index(video_path: str) -> FrameIndex:
+    """
+    获取视频的帧索引（内存 → 磁盘 → 重新构建）
+    构建过程需要完整扫描视频，应在线程中调用
+    """
+    key = _cache_key(video_path)
+    with _cache_lock:
+        index = _cache.get(key)
+        if index is not None:
+            _cache.move_to_end(key)
+            return index
+
+    digest = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()[:16]
+    disk_path = CACHE_DIR / f"{digest}.npz"
+    index: Optional[FrameIndex] = None
+    if disk_path.exists():
+        try:
+            index = FrameIndex.load(disk_path)
+        except Exception:
+            index = None
+    if index is None:
+        index = FrameIndex.build(video_path)
+        try:
+            index.save(disk_path)
+        except OSError:
+            pass
+
+    with _cache_lock:
+        _cache[key] = index
+        _cache.move_to_end(key)
+        while len(_cache) > _MAX_CACHED:
+            _cache.popitem(last=False)
+    return index
@@ -0,0 +1,151 @@
+"""
+Sport Vision — 热力图累加模块
+整场会话的重心 / 手腕占位网格，逐帧 O(1) 更新，按需输出量化快照
+"""
+
+import cv2
+import base64
+import numpy as np
+from typing import Optional
+
+from backend.frame_index import FrameCoverage
+
+
+class HeatmapAccumulator:
+    """二维占位网格累加器"""
+
+    # 通道：重心 + 双手腕（关键点 id）
+    CHANNELS = {
+        "center_of_mass": None,
+        "left_wrist": 15,
+        "right_wrist": 16,
+    }
+
+    def __init__(self, width: int, height: int, cols: int = 48, rows: int = 27,
+                 change_threshold: float = 0.01, check_interval: int = 5,
+                 max_interval: int = 60, frame_count: int = 0):
+        """
+        Args:
+            width, height: 坐标系尺寸（像素）
+            cols, rows: 网格分辨率
+            change_threshold: 量化网格平均变化超过该比例时才推送快照
+            check_interval: 每隔多少帧检查一次是否需要推送
+            max_interval: 有新数据时最长推送间隔（帧）
+            frame_count: 视频总帧数（用于预分配已计入帧的位图，0 = 按需增长）
+        """
+        self.width = width
+        self.height = height
+        self.cols = cols
+        self.rows = rows
+        self.change_threshold = change_threshold
+        self.check_interval = check_interval
+        self.max_interval = max_interval
+        self.frame_count = frame_count
+        self.grid = np.zeros((len(self.CHANNELS), rows, cols), dtype=np.uint32)
+        self.samples = 0
+        self._last_sent: Optional[np.ndarray] = None
+        self._frames_since_check = 0
+        self._frames_since_sent = 0
+        self._has_new = False
+        self._seen = FrameCoverage(frame_count)
+
+    def _cell(self, x: float, y: float) -> Optional[tuple]:
+        col = int(x * self.cols / self.width)
+        row = int(y * self.rows / self.height)
+        if 0 <= col < self.cols and 0 <= row < self.rows:
+            return row, col
+        return None
+
+    def add(self, frame_number: int, pose_result: Optional[dict]):
+        """
+        累加一帧（O(1)）
+        跳转回放时已计入的帧号会被忽略，占位计数不重复；
+        向前跳过、之后再向后跳回处理的帧仍会计入
+        """
+        if not self._seen.add(frame_number):
+            return
+        self._frames_since_check += 1
+        self._frames_since_sent += 1
+        if not pose_result:
+            return
+        kp_map = {kp["id"]: kp for kp in pose_result["keypoints"]}
+        for channel, (name, kp_id) in enumerate(self.CHANNELS.items()):
+            if kp_id is None:
+                point = pose_result.get("center_of_mass")
+            else:
+                point = kp_map.get(kp_id)
+                if point is not None and point.get("visibility", 1.0) <= 0.5:
+                    point = None
+            if not point:
+                continue
+            cell = self._cell(point["x"], point["y"])
+            if cell is not None:
+                self.grid[channel, cell[0], cell[1]] += 1
+                self._has_new = True
+        self.samples += 1
+
+    def quantize(self) -> np.ndarray:
+        """每个通道按自身最大值归一化到 uint8"""
+        peak = self.grid.reshape(len(self.CHANNELS), -1).max(axis=1).astype(np.float64)
+        peak[peak == 0] = 1
+        return np.round(self.grid * (255.0 / peak[:, None, None])).astype(np.uint8)
+
+    def snapshot(self, force: bool = False) -> Optional[dict]:
+        """
+        变化足够大时返回量化快照，否则返回 None
+
+        Returns:
+            {"cols", "rows", "channels": {name: base64(uint8[rows * cols])}}
+        """
+        if not force:
+            if not self._has_new or self._frames_since_check < self.check_interval:
+                return None
+        self._frames_since_check = 0
+
+        quantized = self.quantize()
+        if not force and self._last_sent is not None \
+                and self._frames_since_sent < self.max_interval:
+            change = np.abs(quantized.astype(np.int16) - self._last_sent).mean() / 255.0
+            if change < self.change_threshold:
+                return None
+
+        self._last_sent = quantized.astype(np.int16)
+        self._frames_since_sent = 0
+        self._has_new = False
+        return {
+            "cols": self.cols,
+            "rows": self.rows,
+            "channels": {
+                name: base64.b64encode(quantized[i].tobytes()).decode("ascii")
+                for i, name in enumerate(self.CHANNELS)
+            },
+        }
+
+    def final(self) -> dict:
+        """会话结束时的完整热力图：原始计数 + 重心热力图 PNG"""
+        quantized = self.quantize()
+        com = cv2.resize(quantized[0], (self.width, self.height),
+                         interpolation=cv2.INTER_LINEAR)
+        colored = cv2.applyColorMap(cv2.GaussianBlur(com, (0, 0), 8), cv2.COLORMAP_JET)
+        _, png = cv2.imencode(".png", colored)
+        return {
+            "cols": self.cols,
+            "rows": self.rows,
+            "width": self.width,
+            "height": self.height,
+            "samples": self.samples,
+            "counts": {
+                name: self.grid[i].tolist()
+                for i, name in enumerate(self.CHANNELS)
+            },
+            "png_base64": base64.b64encode(png.tobytes()).decode("ascii"),
+        }
+
+    def reset(self):
+        self.grid[:] = 0
+        self.samples = 0
+        self._last_sent = None
+        self._frames_since_check = 0
+        self._frames_since_sent = 0
+        self._has_new = False
+        self._seen = FrameCoverage(self.frame_count)
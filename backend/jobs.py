@@ -0,0 +1,200 @@
+"""
+Sport Vision — 后台任务队列
+带优先级和并发上限的异步任务队列，用于耗时的离线处理
+"""
+
+import time
+import uuid
+import asyncio
+import itertools
+from collections import OrderedDict
+from typing import Awaitable, Callable, Optional
+
+
+class Job:
+    """一个后台任务的状态记录"""
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+    def __init__(self, kind: str, params: dict, priority: int = 0):
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.params = params
+        self.priority = priority
+        self.status = self.QUEUED
+        self.progress = 0.0
+        self.result: Optional[dict] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        # 运行中任务的取消请求，由 handler 自行检查
+        self.cancel_requested = False
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (self.DONE, self.FAILED, self.CANCELLED)
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "priority": self.priority,
+            "progress": round(self.progress, 3),
+            "params": self.params,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobQueue:
+    """
+    固定数量 worker 的优先级任务队列
+    priority 越小越先执行，同优先级按提交顺序
+    """
+
+    def __init__(self, kind: str, handler: Callable[[Job], Awaitable[dict]],
+                 workers: int = 2, max_history: int = 500,
+                 on_change: Optional[Callable[[Job], None]] = None,
+                 progress_interval: float = 1.0):
+        """
+        Args:
+            kind: 任务类型名
+            handler: 异步处理函数，返回值写入 job.result；CPU 密集部分应放入线程执行
+            workers: 并发上限
+            max_history: 保留的已完成任务记录数
+            on_change: 任务状态变化（提交、开始、结束、取消）时回调，用于同步到共享存储；
+                运行期间进度有变化时也按 progress_interval 秒的间隔回调
+            progress_interval: 进度回调的最小间隔（秒，0 = 不回调进度）
+        """
+        self.kind = kind
+        self.handler = handler
+        self.on_change = on_change
+        self.progress_interval = progress_interval
+        self.workers = workers
+        self.max_history = max_history
+        self.jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._tasks: list = []
+        self._seq = itertools.count()
+
+    def start(self):
+        """启动 worker（需在事件循环中调用）"""
+        if self._tasks:
+            return
+        self._queue = asyncio.PriorityQueue()
+        for job in self.jobs.values():
+            if job.status == Job.QUEUED:
+                self._queue.put_nowait((job.priority, next(self._seq), job))
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+
+    def submit(self, params: dict, priority: int = 0) -> Job:
+        job = Job(self.kind, params, priority)
+        self.jobs[job.id] = job
+        if self._queue is not None:
+            self._queue.put_nowait((priority, next(self._seq), job))
+        self._trim_history()
+        self._changed(job)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self.jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> bool:
+        """取消任务：排队中的直接取消，运行中的设置取消标记"""
+        job = self.jobs.get(job_id)
+        if job is None or job.finished:
+            return False
+        if job.status == Job.RUNNING:
+            job.cancel_requested = True
+            return True
+        job.status = Job.CANCELLED
+        job.finished_at = time.time()
+        self._changed(job)
+        return True
+
+    def queue_position(self, job_id: str) -> Optional[int]:
+        """排队中任务的位置（从 1 开始）"""
+        job = self.jobs.get(job_id)
+        if job is None or job.status != Job.QUEUED:
+            return None
+        ahead = sum(
+            1 for other in self.jobs.values()
+            if other.status == Job.QUEUED
+            and (other.priority, other.created_at) < (job.priority, job.created_at)
+        )
+        return ahead + 1
+
+    async def _worker(self):
+        while True:
+            _, _, job = await self._queue.get()
+            try:
+                if job.status != Job.QUEUED:
+                    continue
+                job.status = Job.RUNNING
+                job.started_at = time.time()
+                self._changed(job)
+                reporter = None
+                if self.on_change is not None and self.progress_interval > 0:
+                    reporter = asyncio.create_task(self._report_progress(job))
+                try:
+                    job.result = await self.handler(job)
+                    if job.cancel_requested:
+                        job.status = Job.CANCELLED
+                    else:
+                        job.status = Job.DONE
+                        job.progress = 1.0
+                except asyncio.CancelledError:
+                    job.status = Job.CANCELLED
+                    raise
+                except Exception as e:
+                    job.status = Job.FAILED
+                    job.error = str(e)
+                finally:
+                    if reporter is not None:
+                        reporter.cancel()
+                    job.finished_at = time.time()
+                    self._changed(job)
+            finally:
+                self._queue.task_done()
+
+    async def _report_progress(self, job: Job):
+        """运行期间定期发布进度（handler 在线程中更新 job.progress，此处节流后回调）"""
+        last = job.progress
+        while True:
+            await asyncio.sleep(self.progress_interval)
+            if job.progress != last:
+                last = job.progress
+                self._changed(job)
+
+    def _changed(self, job: Job):
+        if self.on_change is None:
+            return
+        try:
+            self.on_change(job)
+        except Exception:
+            # 共享存储不可用时不影响任务本身
+            pass
+
+    def _trim_history(self):
+        finished = [job_id for job_id, job in self.jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(finished) - self.max_history)]:
+            del self.jobs[job_id]
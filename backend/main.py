@@ -3,25 +3,87 @@ Sport Vision — FastAPI 应用入口
 提供 REST API + WebSocket 实时分析流
 """
 
+import time
+_IMPORT_START = time.perf_counter()
+
 import os
 import json
 import uuid
 import asyncio
+from collections import OrderedDict
 from pathlib import Path
-from typing import Optional
+from datetime import datetime
+from typing import TYPE_CHECKING, List, Literal, Optional
 
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, UploadFile, File
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, UploadFile, File, Request
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse, JSONResponse, FileResponse
+from fastapi.responses import (
+    HTMLResponse, JSONResponse, FileResponse, StreamingResponse, PlainTextResponse,
+)
 from fastapi.middleware.cors import CORSMiddleware
+from pydantic import BaseModel, Field
 
-from backend.pipeline import Pipeline
+from backend.frame_index import get_frame_index
+from backend.action_recognizer import ActionRecognizer
+from backend.action_store import ActionStore
+from backend.clip_extractor import ClipExtractor
+from backend.jobs import Job, JobQueue
+from backend.admission import AdmissionController, AdmissionRejected
+from backend.warmup import Warmup
+from backend.catalog import DemoCatalog
+from backend.archive import KeypointArchiveWriter
+from backend.registry import create_registry
+from backend.profiler import SessionProfiler
+from backend.technique import TemplateLibrary
+from backend.serialization import FrameSerializer, dumps, available as serialization_available
+
+# 视觉栈（cv2 / MediaPipe）按需导入，启动时在后台预热
+if TYPE_CHECKING:
+    from backend.pipeline import Pipeline
 
 # 路径配置
 BASE_DIR = Path(__file__).resolve().parent.parent
 FRONTEND_DIR = BASE_DIR / "frontend" / "dist"
 UPLOAD_DIR = BASE_DIR / "uploads"
 DEMO_DIR = BASE_DIR / "demo_videos"
+DATA_DIR = BASE_DIR / "data"
+CLIPS_DIR = BASE_DIR / "clips"
+RESULTS_DIR = DATA_DIR / "results"
+CATALOG_CACHE_DIR = BASE_DIR / "cache" / "catalog"
+
+RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+
+# 同时运行的剪辑任务数
+CLIP_WORKERS = int(os.environ.get("SPORT_VISION_CLIP_WORKERS", "2"))
+# 同时运行的离线分析任务数（每个任务持有一个 MediaPipe 图）
+ANALYSIS_WORKERS = int(os.environ.get("SPORT_VISION_ANALYSIS_WORKERS", "2"))
+
+# 实时分析准入控制
+MAX_PIPELINES = int(os.environ.get("SPORT_VISION_MAX_PIPELINES", "4"))
+MAX_PIPELINES_PER_CLIENT = int(os.environ.get("SPORT_VISION_MAX_PIPELINES_PER_CLIENT", "2"))
+MAX_QUEUE = int(os.environ.get("SPORT_VISION_MAX_QUEUE", "16"))
+QUEUE_TIMEOUT = float(os.environ.get("SPORT_VISION_QUEUE_TIMEOUT", "120"))
+MAX_RSS_MB = float(os.environ.get("SPORT_VISION_MAX_RSS_MB", "0"))
+# 单会话预算（0 = 不限制）；内存预算按帧缓冲估算值在会话开始时检查一次，
+# 不跟踪运行中的实际 RSS（进程级上限见 SPORT_VISION_MAX_RSS_MB，由准入控制检查）
+SESSION_CPU_SECONDS = float(os.environ.get("SPORT_VISION_SESSION_CPU_SECONDS", "0"))
+SESSION_MEMORY_MB = float(os.environ.get("SPORT_VISION_SESSION_MEMORY_MB", "0"))
+# 暂停或无进展超过该时间（秒）的会话会被回收
+SESSION_IDLE_TIMEOUT = float(os.environ.get("SPORT_VISION_SESSION_IDLE_TIMEOUT", "600"))
+# 管理接口令牌（未设置时管理接口只接受本机请求）
+ADMIN_TOKEN = os.environ.get("SPORT_VISION_ADMIN_TOKEN", "")
+# 保留最近结束会话的统计摘要数量
+SESSION_SUMMARY_LIMIT = int(os.environ.get("SPORT_VISION_SESSION_SUMMARY_LIMIT", "200"))
+# 参考动作模板库（python -m backend.technique build 生成；不存在时不做技术比对）
+TECHNIQUE_LIBRARY = Path(os.environ.get(
+    "SPORT_VISION_TECHNIQUE_LIBRARY", str(DATA_DIR / "templates.npz")
+))
+# 多 worker 共享的会话注册表（memory 或 sqlite:///path）
+SESSION_REGISTRY = os.environ.get(
+    "SPORT_VISION_SESSION_REGISTRY", f"sqlite:///{DATA_DIR / 'registry.db'}"
+)
+
+VIDEO_EXTENSIONS = [".mp4", ".avi", ".mov", ".webm"]
 
 UPLOAD_DIR.mkdir(exist_ok=True)
 DEMO_DIR.mkdir(exist_ok=True)
@@ -34,27 +96,321 @@ app.add_middleware(
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Sport-Vision-Worker"],
 )
 
 # 活跃的处理流水线
-active_pipelines: dict[str, Pipeline] = {}
+active_pipelines: "dict[str, Pipeline]" = {}
+# 最近结束会话的统计摘要（session_id -> 摘要，超出上限时淘汰最早的）
+session_summaries: "OrderedDict[str, dict]" = OrderedDict()
+# 技术比对模板库（启动后后台加载，所有会话共享）
+technique_library: Optional[TemplateLibrary] = None
+technique_error: Optional[str] = None
+
+warmup = Warmup()
+warmup.timings["app_import_seconds"] = round(time.perf_counter() - _IMPORT_START, 3)
+
+# 会话 / 任务注册表（跨 worker 查找与控制）
+registry = create_registry(SESSION_REGISTRY)
+WORKER_ID = registry.worker_id
+# 由其它 worker 请求停止的本地会话
+_remote_stops: set = set()
+
+
+@app.middleware("http")
+async def add_worker_header(request: Request, call_next):
+    """响应头携带 worker 标识，负载均衡可据此做会话亲和"""
+    response = await call_next(request)
+    response.headers["X-Sport-Vision-Worker"] = WORKER_ID
+    return response
+
+
+admission = AdmissionController(
+    max_global=MAX_PIPELINES,
+    max_per_client=MAX_PIPELINES_PER_CLIENT,
+    max_queue=MAX_QUEUE,
+    queue_timeout=QUEUE_TIMEOUT,
+    max_rss_mb=MAX_RSS_MB,
+)
+
+# 动作事件索引
+action_store = ActionStore(DATA_DIR / "actions.db")
+
+# 精彩片段剪辑
+clip_extractor = ClipExtractor(CLIPS_DIR)
+
+# Demo 视频目录（元数据 + 缩略图缓存）
+demo_catalog = DemoCatalog(DEMO_DIR, CATALOG_CACHE_DIR, VIDEO_EXTENSIONS)
+
+
+async def _run_clip_job(job: Job) -> dict:
+    """剪辑任务：在线程中逐个事件切片"""
+    params = job.params
+
+    def on_progress(value: float):
+        job.progress = value
+
+    clips = await asyncio.to_thread(
+        clip_extractor.extract,
+        params["video_path"],
+        params["events"],
+        job.id,
+        params["pre"],
+        params["post"],
+        on_progress,
+    )
+    for clip in clips:
+        clip["url"] = f"/clips/{clip['filename']}"
+    return {"clips": clips}
+
+
+# 每个任务最近一次待完成的注册表写入（同一任务的状态按顺序落盘）
+job_publishes: dict = {}
+
+
+async def _save_job(data: dict, previous: Optional[asyncio.Task]):
+    if previous is not None:
+        await asyncio.wait([previous])
+    try:
+        await asyncio.to_thread(registry.save_job, data)
+    except Exception:
+        # 共享存储不可用时不影响任务本身
+        pass
+
+
+def _publish_job(job: Job):
+    """任务状态变化时写入共享注册表（在线程中执行），其它 worker 可查询"""
+    task = asyncio.get_running_loop().create_task(
+        _save_job(job.to_dict(), job_publishes.get(job.id))
+    )
+    job_publishes[job.id] = task
+    task.add_done_callback(
+        lambda t, job_id=job.id: job_publishes.pop(job_id, None)
+        if job_publishes.get(job_id) is t else None
+    )
+
+
+clip_jobs = JobQueue("clips", _run_clip_job, workers=CLIP_WORKERS, on_change=_publish_job)
+
+
+def _analyze_job_sync(job: Job) -> dict:
+    """
+    离线分析任务主体（线程中运行）
+    逐帧结果写入 NDJSON 和关键点归档，完成后持久化动作事件
+    """
+    params = job.params
+    results_path = RESULTS_DIR / f"{job.id}.ndjson"
+    archive: Optional[KeypointArchiveWriter] = None
+    pipeline = warmup.pipeline_class()(technique_library=technique_library,
+                                       pose_analyzer=warmup.take_analyzer(),
+                                       **params.get("pipeline_options", {}))
+    frames = 0
+    try:
+        with open(results_path, "w", encoding="utf-8") as f:
+            for result in pipeline.analyze_video(
+                params["video_path"],
+                skip_frames=params.get("skip_frames", 1),
+                should_stop=lambda: job.cancel_requested,
+            ):
+                if archive is None:
+                    archive = KeypointArchiveWriter(
+                        RESULTS_DIR / f"{job.id}.kpa",
+                        result["width"], result["height"], pipeline.video_fps,
+                    )
+                archive.append(result["frame_number"], result["timestamp"], result["pose"])
+                f.write(dumps(result) + "\n")
+                frames += 1
+                job.progress = result["progress"]
+
+        if archive is not None:
+            archive.close(events=pipeline.action_events)
+        if not pipeline.completed:
+            return {"frames": frames}
+
+        analysis_id = action_store.save_analysis(
+            params["video_id"],
+            params["video_path"],
+            pipeline.action_events,
+            pipeline.video_fps,
+            pipeline.total_frames,
+        )
+        return {
+            "analysis_id": analysis_id,
+            "frames": frames,
+            "action_counts": dict(pipeline.action_counts),
+            "heatmap": pipeline.heatmap.final(),
+            "summary": pipeline.analytics.summary(),
+            "results_url": f"/api/jobs/{job.id}/results",
+            "archive_url": f"/api/jobs/{job.id}/archive" if archive is not None else None,
+        }
+    finally:
+        if archive is not None:
+            archive.close()
+        pipeline.close()
+
+
+async def _run_analysis_job(job: Job) -> dict:
+    return await asyncio.to_thread(_analyze_job_sync, job)
+
+
+analysis_jobs = JobQueue("analysis", _run_analysis_job, workers=ANALYSIS_WORKERS,
+                         on_change=_publish_job)
+
+
+async def _reap_stale_sessions(interval: float = 30.0):
+    """定期清理已关闭、长时间暂停或丢失流水线的会话，归还准入槽位"""
+    while True:
+        await asyncio.sleep(interval)
+        now = time.time()
+        for sid, pipeline in list(active_pipelines.items()):
+            if pipeline.closed or now - pipeline.last_activity > SESSION_IDLE_TIMEOUT:
+                pipeline.close()
+                active_pipelines.pop(sid, None)
+                admission.release(sid)
+        for sid, (_, admitted_at) in list(admission.active.items()):
+            if sid not in active_pipelines and now - admitted_at > 60:
+                admission.release(sid)
+
+
+async def _registry_loop(poll_interval: float = 1.0, heartbeat_interval: float = 10.0):
+    """维持 worker 心跳，执行其它 worker 投递的命令（停止会话、取消任务）"""
+    last_heartbeat = 0.0
+    while True:
+        try:
+            if time.monotonic() - last_heartbeat >= heartbeat_interval:
+                await asyncio.to_thread(registry.heartbeat)
+                last_heartbeat = time.monotonic()
+            for target_id, command in await asyncio.to_thread(registry.poll_commands):
+                if command == "stop":
+                    _stop_local_session(target_id)
+                elif command == "cancel":
+                    analysis_jobs.cancel(target_id) or clip_jobs.cancel(target_id)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # 注册表暂时不可用（如数据库被锁）时下一轮重试
+            pass
+        await asyncio.sleep(poll_interval)
+
+
+def _stop_local_session(session_id: str) -> bool:
+    pipeline = active_pipelines.get(session_id)
+    if pipeline is None:
+        return False
+    _remote_stops.add(session_id)
+    pipeline.stop()
+    return True
+
+
+async def _load_technique_library():
+    global technique_library, technique_error
+    if not TECHNIQUE_LIBRARY.exists():
+        return
+    try:
+        technique_library = await asyncio.to_thread(TemplateLibrary.load, TECHNIQUE_LIBRARY)
+    except (OSError, KeyError, ValueError) as e:
+        technique_error = str(e)
+
+
+@app.on_event("startup")
+async def start_background_workers():
+    warmup.start()
+    asyncio.create_task(_load_technique_library())
+    asyncio.create_task(asyncio.to_thread(demo_catalog.refresh, True))
+    clip_jobs.start()
+    analysis_jobs.start()
+    asyncio.create_task(_reap_stale_sessions())
+    asyncio.create_task(_registry_loop())
+
+
+@app.on_event("shutdown")
+async def stop_background_workers():
+    for job in analysis_jobs.jobs.values():
+        analysis_jobs.cancel(job.id)
+    await clip_jobs.stop()
+    await analysis_jobs.stop()
+    if job_publishes:
+        await asyncio.wait(list(job_publishes.values()))
+    if technique_library is not None:
+        technique_library.close()
+    warmup.close()
+    registry.close()
+
+
+def _int_option(data: dict, key: str) -> int:
+    try:
+        return int(data[key])
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid {key}: {data[key]!r}") from None
+
+
+def _pipeline_options(data: dict) -> dict:
+    """
+    从客户端参数中提取流水线选项（稀疏推理、自适应、平滑、推理 / 显示分辨率、热力图网格）
+    数值参数无法解析时抛出 ValueError
+    """
+    options = {}
+    if data.get("inference_stride") is not None:
+        options["inference_stride"] = max(1, min(_int_option(data, "inference_stride"), 10))
+    if data.get("adaptive_inference") is not None:
+        options["adaptive_inference"] = bool(data["adaptive_inference"])
+    if data.get("smoothing") is not None:
+        options["smoothing"] = bool(data["smoothing"])
+    if data.get("display_width") is not None:
+        options["display_width"] = max(160, min(_int_option(data, "display_width"), 1920))
+    if data.get("inference_size") is not None:
+        size = _int_option(data, "inference_size")
+        options["inference_size"] = 0 if size <= 0 else max(128, min(size, 1920))
+    if data.get("heatmap_grid") is not None:
+        options["heatmap_grid"] = max(8, min(_int_option(data, "heatmap_grid"), 192))
+    for key in ("display_interpolation", "inference_interpolation"):
+        if data.get(key) in ("nearest", "linear", "area", "cubic"):
+            options[key] = data[key]
+    return options
+
+
+def _resolve_video(source: Optional[str], video_id: Optional[str] = None,
+                   path: Optional[str] = None) -> Optional[str]:
+    """根据来源解析视频路径：demo 按 id 查找，upload 按路径或上传 id 查找"""
+    if source == "demo":
+        found = demo_catalog.path_of(video_id or "")
+        if found:
+            return found
+        # 目录尚未刷新到的新文件
+        for ext in VIDEO_EXTENSIONS:
+            candidate = DEMO_DIR / f"{video_id or ''}{ext}"
+            if candidate.exists():
+                return str(candidate)
+        return None
+    if source == "upload":
+        if path:
+            return path if Path(path).exists() else None
+        if video_id:
+            for candidate in UPLOAD_DIR.glob(f"{Path(video_id).name}.*"):
+                return str(candidate)
+    return None
 
 
 # ============ REST API ============
 
 @app.get("/api/demos")
 async def list_demos():
-    """列出所有可用的 Demo 视频"""
-    demos = []
-    for ext in ["*.mp4", "*.avi", "*.mov", "*.webm"]:
-        for f in DEMO_DIR.glob(ext):
-            demos.append({
-                "id": f.stem,
-                "name": f.stem.replace("_", " ").replace("-", " ").title(),
-                "filename": f.name,
-                "size_mb": round(f.stat().st_size / (1024 * 1024), 1),
-            })
-    return {"demos": demos}
+    """列出所有可用的 Demo 视频（含时长、帧率、分辨率等元数据）"""
+    if demo_catalog.is_stale():
+        await asyncio.to_thread(demo_catalog.refresh, True)
+    return {"demos": demo_catalog.list()}
+
+
+@app.get("/api/demos/{demo_id}/{kind}")
+async def demo_image(demo_id: str, kind: str):
+    """Demo 视频缩略图（thumbnail）或封面帧（poster）"""
+    if kind not in ("thumbnail", "poster"):
+        return JSONResponse(status_code=404, content={"error": "not found"})
+    path = demo_catalog.image_path(demo_id, kind)
+    if path is None:
+        return JSONResponse(status_code=404, content={"error": "not found"})
+    return FileResponse(path, media_type="image/jpeg",
+                        headers={"Cache-Control": "public, max-age=86400"})
 
 
 @app.post("/api/upload")
@@ -83,8 +439,585 @@ async def upload_video(file: UploadFile = File(...)):
     }
 
 
+def _parse_time(value: str) -> float:
+    """解析 Unix 时间戳或 ISO 8601 时间"""
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+@app.get("/api/actions")
+async def query_actions(request: Request):
+    """
+    查询已完成分析中的动作事件
+
+    参数:
+        action, video_id, analysis_id: 精确匹配
+        since, until: 分析完成时间（Unix 时间戳或 ISO 8601）
+        min_<指标> / max_<指标>: 生物力学指标范围，如 min_wrist_speed=8
+        limit: 返回条数上限（默认 500）
+    """
+    params = request.query_params
+    metric_ranges = {}
+    try:
+        for key, value in params.items():
+            for prefix, pos in (("min_", 0), ("max_", 1)):
+                if key.startswith(prefix):
+                    bounds = list(metric_ranges.get(key[len(prefix):], (None, None)))
+                    bounds[pos] = float(value)
+                    metric_ranges[key[len(prefix):]] = tuple(bounds)
+
+        events = await asyncio.to_thread(
+            action_store.query,
+            action=params.get("action"),
+            video_id=params.get("video_id"),
+            analysis_id=params.get("analysis_id"),
+            since=_parse_time(params["since"]) if "since" in params else None,
+            until=_parse_time(params["until"]) if "until" in params else None,
+            metric_ranges=metric_ranges,
+            limit=int(params.get("limit", 500)),
+        )
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+
+    return {"count": len(events), "events": events}
+
+
+# 可剪辑的动作类型（击球动作，不含持续状态）
+ClipAction = Literal[tuple(a for a in ActionRecognizer.ACTIONS if a not in ActionRecognizer.STATES)]
+
+
+class ClipEvent(BaseModel):
+    """待剪辑的动作事件（缺少 timestamp 时按 (frame - 1) / fps 推算）"""
+    action: ClipAction
+    frame: int = Field(..., ge=1)
+    timestamp: Optional[float] = Field(None, ge=0)
+
+
+class ClipRequest(BaseModel):
+    """片段剪辑请求：指定 analysis_id，或直接给出视频路径和事件列表"""
+    analysis_id: Optional[str] = None
+    video_path: Optional[str] = None
+    events: Optional[List[ClipEvent]] = None
+    actions: Optional[list] = None   # 只剪这些动作类型
+    pre: float = 1.0                 # 事件前秒数
+    post: float = 2.0                # 事件后秒数
+    priority: int = 0
+
+
+@app.post("/api/clips")
+async def create_clips(req: ClipRequest):
+    """提交片段剪辑任务（后台排队执行）"""
+    video_path = req.video_path
+    events = [ev.dict() for ev in req.events or []]
+    if req.analysis_id:
+        analysis = await asyncio.to_thread(action_store.get_analysis, req.analysis_id)
+        if not analysis:
+            return JSONResponse(status_code=404, content={"error": "analysis not found"})
+        video_path = analysis["video_path"]
+        events = await asyncio.to_thread(
+            action_store.query, analysis_id=req.analysis_id, limit=100000
+        )
+
+    if not video_path or not Path(video_path).exists():
+        return JSONResponse(status_code=400, content={"error": f"Video not found: {video_path}"})
+    events = [
+        {"action": ev["action"], "frame": ev["frame"], "timestamp": ev.get("timestamp")}
+        for ev in events
+        if not req.actions or ev["action"] in req.actions
+    ]
+    if not events:
+        return JSONResponse(status_code=400, content={"error": "no events to clip"})
+
+    job = clip_jobs.submit({
+        "video_path": video_path,
+        "events": events,
+        "pre": max(0.0, req.pre),
+        "post": max(0.0, req.post),
+    }, priority=req.priority)
+    return job.to_dict()
+
+
+@app.get("/api/clips/{job_id}")
+async def get_clip_job(job_id: str):
+    """查询剪辑任务状态与结果"""
+    job = clip_jobs.get(job_id)
+    if job:
+        return job.to_dict()
+    shared = await asyncio.to_thread(registry.get_job, job_id)
+    if not shared or shared.get("kind") != "clips":
+        return JSONResponse(status_code=404, content={"error": "job not found"})
+    return shared
+
+
+class AnalysisJobRequest(BaseModel):
+    """离线分析任务请求"""
+    source: str = "upload"           # upload | demo
+    id: Optional[str] = None         # 上传 id 或 demo id
+    path: Optional[str] = None       # 上传文件路径（/api/upload 返回的 path）
+    priority: int = 0                # 越小越先执行
+    skip_frames: int = 1
+    inference_stride: int = 1        # 每 N 帧推理一次，中间帧插值
+    adaptive_inference: bool = False
+    smoothing: bool = False
+    inference_size: Optional[int] = None   # 推理输入最长边（0 = 与显示尺寸相同）
+    inference_interpolation: Optional[str] = None
+    heatmap_grid: Optional[int] = None     # 热力图网格列数（8–192，行数按宽高比推算）
+
+
+def _job_response(job: Job, queue: JobQueue) -> dict:
+    data = job.to_dict()
+    data["position"] = queue.queue_position(job.id)
+    data["worker_id"] = WORKER_ID
+    return data
+
+
+def _find_job(job_id: str) -> Optional[dict]:
+    """本 worker 的任务取实时状态，其它 worker 的任务取注册表中最近一次状态变化"""
+    job = analysis_jobs.get(job_id)
+    if job is not None:
+        return _job_response(job, analysis_jobs)
+    shared = registry.get_job(job_id)
+    if shared and shared.get("kind") == "analysis":
+        return shared
+    return None
+
+
+@app.post("/api/jobs")
+async def submit_job(req: AnalysisJobRequest):
+    """提交离线分析任务，不依赖 WebSocket 连接"""
+    video_path = _resolve_video(req.source, req.id, req.path)
+    if not video_path:
+        return JSONResponse(
+            status_code=404,
+            content={"error": f"Video not found: {req.id or req.path}"}
+        )
+    job = analysis_jobs.submit({
+        "video_path": video_path,
+        "video_id": Path(video_path).stem,
+        "skip_frames": max(1, req.skip_frames),
+        "pipeline_options": _pipeline_options(req.dict()),
+    }, priority=req.priority)
+    return _job_response(job, analysis_jobs)
+
+
+@app.get("/api/jobs")
+async def list_jobs():
+    """所有 worker 的分析任务（本 worker 的任务带实时进度）"""
+    local = {job.id: _job_response(job, analysis_jobs) for job in analysis_jobs.jobs.values()}
+    shared = await asyncio.to_thread(registry.list_jobs)
+    jobs = [local.pop(job["id"], job) for job in shared if job.get("kind") == "analysis"]
+    return {"jobs": list(local.values()) + jobs}
+
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str):
+    """查询任务进度"""
+    job = await asyncio.to_thread(_find_job, job_id)
+    if not job:
+        return JSONResponse(status_code=404, content={"error": "job not found"})
+    return job
+
+
+@app.delete("/api/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    if analysis_jobs.get(job_id) is not None:
+        if not analysis_jobs.cancel(job_id):
+            return JSONResponse(status_code=409, content={"error": "job not cancellable"})
+        return _job_response(analysis_jobs.get(job_id), analysis_jobs)
+
+    # 其它 worker 的任务：投递取消命令
+    job = await asyncio.to_thread(_find_job, job_id)
+    if not job:
+        return JSONResponse(status_code=404, content={"error": "job not found"})
+    if job["status"] in (Job.DONE, Job.FAILED, Job.CANCELLED):
+        return JSONResponse(status_code=409, content={"error": "job not cancellable"})
+    await asyncio.to_thread(registry.send_command, job_id, "cancel", job["worker_id"])
+    return JSONResponse(status_code=202, content={**job, "cancel_requested": True})
+
+
+@app.get("/api/jobs/{job_id}/results")
+async def stream_job_results(job_id: str):
+    """以 NDJSON 流式返回任务的逐帧分析结果"""
+    results_path = RESULTS_DIR / f"{Path(job_id).name}.ndjson"
+    job = await asyncio.to_thread(_find_job, job_id)
+    if not results_path.exists() or (job and job["status"] != Job.DONE):
+        return JSONResponse(status_code=404, content={"error": "results not available"})
+
+    def iter_lines():
+        with open(results_path, "rb") as f:
+            for line in f:
+                yield line
+
+    return StreamingResponse(iter_lines(), media_type="application/x-ndjson")
+
+
+@app.get("/api/jobs/{job_id}/archive")
+async def download_job_archive(job_id: str):
+    """下载任务的关键点归档（定长二进制，见 backend/archive.py）"""
+    archive_path = RESULTS_DIR / f"{Path(job_id).name}.kpa"
+    job = await asyncio.to_thread(_find_job, job_id)
+    if not archive_path.exists() or (job and job["status"] != Job.DONE):
+        return JSONResponse(status_code=404, content={"error": "archive not available"})
+    return FileResponse(archive_path, media_type="application/octet-stream",
+                        filename=f"{Path(job_id).name}.kpa")
+
+
+@app.get("/api/sessions")
+async def list_sessions():
+    """实时分析会话与准入状态（本 worker 详情 + 所有 worker 的会话列表）"""
+    now = time.time()
+    cluster_sessions = await asyncio.to_thread(registry.list_sessions)
+    workers = await asyncio.to_thread(registry.live_workers)
+    return {
+        "worker_id": WORKER_ID,
+        "workers": workers,
+        "cluster_sessions": cluster_sessions,
+        "admission": admission.stats(),
+        "sessions": [
+            {
+                "session_id": sid,
+                "running": pipeline.is_running,
+                "paused": pipeline.is_paused,
+                "cpu_seconds": round(pipeline.cpu_seconds, 2),
+                "idle_seconds": round(now - pipeline.last_activity, 1),
+            }
+            for sid, pipeline in active_pipelines.items()
+        ],
+    }
+
+
+@app.post("/api/sessions/{session_id}/stop")
+async def stop_session(session_id: str):
+    """停止会话；会话在其它 worker 上时投递停止命令"""
+    if _stop_local_session(session_id):
+        return {"session_id": session_id, "worker_id": WORKER_ID, "status": "stopped"}
+    session = await asyncio.to_thread(registry.get_session, session_id)
+    if not session:
+        return JSONResponse(status_code=404, content={"error": "session not found"})
+    await asyncio.to_thread(registry.send_command, session_id, "stop", session["worker_id"])
+    return JSONResponse(status_code=202, content={
+        "session_id": session_id,
+        "worker_id": session["worker_id"],
+        "status": "stop_requested",
+    })
+
+
+@app.get("/api/sessions/{session_id}/summary")
+async def get_session_summary(session_id: str):
+    """会话统计摘要：运行中返回当前快照，结束后返回最终结果"""
+    pipeline = active_pipelines.get(session_id)
+    if pipeline is not None and pipeline.analytics is not None:
+        return {"session_id": session_id, "status": "running", **pipeline.analytics.summary()}
+    summary = session_summaries.get(session_id)
+    if summary is not None:
+        return summary
+    session = await asyncio.to_thread(registry.get_session, session_id)
+    if session:
+        return JSONResponse(status_code=409, content={
+            "error": "session is running on another worker",
+            "worker_id": session["worker_id"],
+        })
+    return JSONResponse(status_code=404, content={"error": "session not found"})
+
+
+@app.get("/api/technique")
+async def technique_info():
+    """技术比对模板库状态"""
+    if technique_library is None:
+        return {"loaded": False, "path": str(TECHNIQUE_LIBRARY), "error": technique_error}
+    return {
+        "loaded": True,
+        "path": str(TECHNIQUE_LIBRARY),
+        "templates": len(technique_library),
+        "actions": technique_library.counts(),
+        "samples": technique_library.length,
+        "pre_seconds": technique_library.pre,
+        "post_seconds": technique_library.post,
+        "band": technique_library.radius,
+    }
+
+
+# ============ 管理接口 ============
+
+def _admin_denied(request: Request) -> Optional[JSONResponse]:
+    """管理接口鉴权：配置了令牌时校验 X-Admin-Token，否则只允许本机访问"""
+    if ADMIN_TOKEN:
+        if request.headers.get("x-admin-token") != ADMIN_TOKEN:
+            return JSONResponse(status_code=403, content={"error": "forbidden"})
+        return None
+    host = request.client.host if request.client else ""
+    if host not in ("127.0.0.1", "::1"):
+        return JSONResponse(status_code=403, content={"error": "forbidden"})
+    return None
+
+
+@app.post("/api/admin/sessions/{session_id}/profile")
+async def profile_session(request: Request, session_id: str, seconds: float = 10.0,
+                          interval_ms: float = 5.0, format: str = "collapsed"):
+    """
+    对运行中的会话采样 N 秒
+
+    format:
+        collapsed — 折叠调用栈文本（flamegraph.pl / speedscope）
+        trace     — 阶段时间线（Chrome trace event JSON）
+        summary   — 各阶段耗时统计 + 热点调用栈
+    """
+    denied = _admin_denied(request)
+    if denied:
+        return denied
+    if format not in ("collapsed", "trace", "summary"):
+        return JSONResponse(status_code=400, content={"error": f"Unknown format: {format}"})
+
+    pipeline = active_pipelines.get(session_id)
+    if pipeline is None:
+        session = await asyncio.to_thread(registry.get_session, session_id)
+        if session:
+            return JSONResponse(status_code=409, content={
+                "error": "session is running on another worker",
+                "worker_id": session["worker_id"],
+            })
+        return JSONResponse(status_code=404, content={"error": "session not found"})
+    if pipeline.profiler is not None:
+        return JSONResponse(status_code=409, content={"error": "session is already being profiled"})
+
+    seconds = max(0.5, min(float(seconds), 60.0))
+    profiler = SessionProfiler(interval=max(1.0, min(float(interval_ms), 100.0)) / 1000.0)
+    profiler.start()
+    pipeline.profiler = profiler
+    try:
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline and not pipeline.closed:
+            await asyncio.sleep(min(0.25, deadline - time.monotonic()))
+    finally:
+        pipeline.profiler = None
+        await asyncio.to_thread(profiler.stop)
+
+    filename = f"profile-{session_id}-{int(time.time())}"
+    if format == "collapsed":
+        return PlainTextResponse(profiler.collapsed(), headers={
+            "Content-Disposition": f'attachment; filename="{filename}.folded"',
+            "X-Profile-Samples": str(profiler.samples),
+        })
+    if format == "trace":
+        return JSONResponse(profiler.chrome_trace(), headers={
+            "Content-Disposition": f'attachment; filename="{filename}.trace.json"',
+        })
+    return {"session_id": session_id, "worker_id": WORKER_ID, **profiler.summary()}
+
+
+# ============ 健康检查 ============
+
+@app.get("/healthz")
+async def healthz():
+    """存活探针：进程可响应即返回 200"""
+    return {"alive": True, "serialization": serialization_available(), **warmup.status()}
+
+
+@app.get("/readyz")
+async def readyz():
+    """就绪探针：姿态模型预热完成前返回 503"""
+    status = warmup.status()
+    if not warmup.ready:
+        return JSONResponse(status_code=503, content=status)
+    return status
+
+
 # ============ WebSocket ============
 
+async def _send(websocket: WebSocket, serializer: FrameSerializer, message: dict):
+    """按会话选择的编码发送（msgpack 为二进制帧）"""
+    for payload in serializer.encode(message):
+        if isinstance(payload, bytes):
+            await websocket.send_bytes(payload)
+        else:
+            await websocket.send_text(payload)
+
+
+async def _stream_analysis(websocket: WebSocket, session_id: str, serializer: FrameSerializer,
+                           pipeline: "Pipeline", video_path: str, video_id: str):
+    """后台推送分析帧，直到处理完成、被停止或出错"""
+    try:
+        async for result in pipeline.process_video(
+            video_path,
+            target_fps=20,
+            skip_frames=1
+        ):
+            if "error" in result:
+                await _send(websocket, serializer, {
+                    "type": "error",
+                    "message": result["error"]
+                })
+                return
+
+            await _send(websocket, serializer, {
+                "type": "frame",
+                "data": result,
+            })
+
+        # 处理完成（主动停止时不发送），持久化动作事件
+        if pipeline.completed:
+            # 等待剩余比对完成；结果写入动作事件，整场列表从事件表汇总
+            # （播放过程中已随帧推送的结果也包含在内）
+            if pipeline.technique:
+                await asyncio.to_thread(pipeline.technique.finish)
+            technique = [
+                {"frame": ev["frame"], "action": ev["action"], "timestamp": ev["timestamp"],
+                 **ev["technique"]}
+                for ev in pipeline.action_events if ev.get("technique")
+            ]
+            message = {
+                "type": "complete",
+                "session_id": session_id,
+                "analysis_id": None,
+                "heatmap": pipeline.heatmap.final(),
+                "summary": pipeline.analytics.summary(),
+                "technique": technique,
+            }
+            if pipeline.fully_covered:
+                message["analysis_id"] = await asyncio.to_thread(
+                    action_store.save_analysis,
+                    video_id,
+                    video_path,
+                    pipeline.action_events,
+                    pipeline.video_fps,
+                    pipeline.total_frames,
+                )
+            else:
+                # 向前跳转跳过的区间没有回放：结果只覆盖部分视频，不作为完整分析保存
+                message["partial"] = True
+                message["missing_frames"] = pipeline.coverage.missing(pipeline.skip_frames)
+            await _send(websocket, serializer, message)
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        try:
+            await _send(websocket, serializer, {
+                "type": "error",
+                "message": str(e)
+            })
+        except Exception:
+            pass
+
+
+def _build_pipeline(Pipeline, pose_analyzer, options: dict) -> "Pipeline":
+    """构建会话流水线（线程中运行）；构建失败时关闭已取走的预热分析器"""
+    try:
+        return Pipeline(
+            cpu_budget=SESSION_CPU_SECONDS,
+            memory_budget_mb=SESSION_MEMORY_MB,
+            technique_library=technique_library,
+            pose_analyzer=pose_analyzer,
+            **options,
+        )
+    except BaseException:
+        if pose_analyzer is not None:
+            pose_analyzer.close()
+        raise
+
+
+def _close_abandoned_pipeline(build: asyncio.Future):
+    """会话在流水线构建期间结束：构建完成后立即关闭（连同接管的姿态分析器）"""
+    if not build.cancelled() and build.exception() is None:
+        build.result().close()
+
+
+async def _run_session(websocket: WebSocket, session_id: str, client_id: str,
+                       video_path: str, options: dict, serializer: FrameSerializer):
+    """会话任务：排队准入 → 创建流水线 → 推送分析 → 释放流水线与槽位"""
+
+    async def on_position(position: int):
+        await _send(websocket, serializer, {
+            "type": "queued",
+            "session_id": session_id,
+            "position": position,
+        })
+
+    try:
+        await admission.acquire(session_id, client_id, on_position)
+    except AdmissionRejected as e:
+        try:
+            await _send(websocket, serializer, {
+                "type": "rejected",
+                "session_id": session_id,
+                "message": str(e),
+            })
+        except Exception:
+            pass
+        return
+
+    pipeline: "Optional[Pipeline]" = None
+    build: Optional[asyncio.Future] = None
+    try:
+        # 创建新的 pipeline 并开始处理
+        # 模型加载较慢，在线程中构建；优先复用预热好的姿态分析器
+        Pipeline = await warmup.load_pipeline_class()
+        build = asyncio.ensure_future(asyncio.to_thread(
+            _build_pipeline, Pipeline, warmup.take_analyzer(), options
+        ))
+        # shield：会话被取消时线程仍在构建，由 finally 在构建完成后关闭
+        pipeline = await asyncio.shield(build)
+        active_pipelines[session_id] = pipeline
+        await asyncio.to_thread(registry.register_session, session_id, {
+            "client_id": client_id,
+            "video": video_path,
+        })
+
+        await _send(websocket, serializer, {
+            "type": "started",
+            "session_id": session_id,
+            "worker_id": WORKER_ID,
+            "video": video_path,
+        })
+
+        await _stream_analysis(websocket, session_id, serializer, pipeline,
+                               video_path, Path(video_path).stem)
+        if session_id in _remote_stops:
+            await _send(websocket, serializer, {"type": "stopped", "session_id": session_id})
+    finally:
+        _remote_stops.discard(session_id)
+        if pipeline:
+            pipeline.close()
+            _store_summary(session_id, pipeline)
+        elif build is not None:
+            build.add_done_callback(_close_abandoned_pipeline)
+        active_pipelines.pop(session_id, None)
+        admission.release(session_id)
+        try:
+            await asyncio.to_thread(registry.unregister_session, session_id)
+        except Exception:
+            pass
+
+
+def _store_summary(session_id: str, pipeline: "Pipeline"):
+    """会话结束后保留统计摘要供 REST 查询"""
+    if pipeline.analytics is None:
+        return
+    session_summaries.pop(session_id, None)
+    session_summaries[session_id] = {
+        "session_id": session_id,
+        "status": "completed" if pipeline.completed else "stopped",
+        "finished_at": datetime.now().isoformat(),
+        **pipeline.analytics.summary(),
+    }
+    while len(session_summaries) > SESSION_SUMMARY_LIMIT:
+        session_summaries.popitem(last=False)
+
+
+async def _shutdown_session(session_id: str, session_task: Optional[asyncio.Task]):
+    """停止流水线（或取消排队）并等待会话任务退出"""
+    pipeline = active_pipelines.get(session_id)
+    if pipeline:
+        pipeline.stop()
+    if session_task and not session_task.done():
+        session_task.cancel()
+        try:
+            await session_task
+        except (asyncio.CancelledError, Exception):
+            pass
+
+
 @app.websocket("/ws/analyze")
 async def websocket_analyze(websocket: WebSocket):
     """
@@ -93,94 +1026,134 @@ async def websocket_analyze(websocket: WebSocket):
     客户端发送:
         {"type": "start", "source": "demo", "id": "badminton_rally"}
         {"type": "start", "source": "upload", "path": "/path/to/video"}
+            可选: "inference_stride": 3, "adaptive_inference": true, "smoothing": true
+            可选: "encoding": "json" | "msgpack", "compact": true
+                  （会话消息按所选编码发送；compact 时先推送一次 schema，帧改为紧凑格式）
+        {"type": "pause"}
+        {"type": "resume"}
+        {"type": "seek", "frame": 120}  或  {"type": "seek", "time": 4.5}
+        {"type": "rate", "value": 0.5}
         {"type": "stop"}
 
     服务端推送:
+        {"type": "queued", "position": 2}          # 达到并发上限时排队
+        {"type": "rejected", "message": "..."}     # 超出单客户端上限或队列已满
         {"type": "frame", "data": {...}}
-        {"type": "complete", "summary": {...}}
+        {"type": "schema", ...} + {"type": "f", "d": {...}}  # compact 模式
+        {"type": "paused" | "resumed" | "seeking" | "rate", ...}   # 控制应答始终为 JSON 文本
+        {"type": "complete", "summary": {...}, "technique": [...]}
+            # 跳转跳过部分帧时 analysis_id 为 null，附带 "partial": true 与 "missing_frames"
         {"type": "error", "message": "..."}
     """
     await websocket.accept()
     session_id = str(uuid.uuid4())[:8]
-    pipeline: Optional[Pipeline] = None
+    client_id = websocket.client.host if websocket.client else "unknown"
+    session_task: Optional[asyncio.Task] = None
+    video_path: Optional[str] = None
+    # 帧索引在会话开始时后台构建，按时间跳转不必等待整段扫描
+    index_task: Optional[asyncio.Task] = None
 
     try:
         while True:
-            # 接收客户端消息
+            # 接收客户端消息（处理在后台任务中进行，控制命令可随时到达）
             msg = await websocket.receive_text()
             data = json.loads(msg)
+            msg_type = data.get("type")
 
-            if data.get("type") == "start":
-                # 停止之前的流水线
-                if pipeline:
-                    pipeline.stop()
+            if msg_type == "start":
+                # 停止之前的会话
+                await _shutdown_session(session_id, session_task)
+                session_task = None
 
                 # 确定视频路径
-                video_path = None
-                if data.get("source") == "demo":
-                    demo_id = data.get("id", "")
-                    # 搜索 demo 视频
-                    for ext in [".mp4", ".avi", ".mov", ".webm"]:
-                        candidate = DEMO_DIR / f"{demo_id}{ext}"
-                        if candidate.exists():
-                            video_path = str(candidate)
-                            break
-                elif data.get("source") == "upload":
-                    video_path = data.get("path", "")
-
-                if not video_path or not Path(video_path).exists():
+                video_path = _resolve_video(data.get("source"), data.get("id"), data.get("path"))
+                if not video_path:
                     await websocket.send_json({
                         "type": "error",
-                        "message": f"Video not found: {video_path}"
+                        "message": f"Video not found: {data.get('id') or data.get('path')}"
                     })
                     continue
 
-                # 创建新的 pipeline 并开始处理
-                pipeline = Pipeline()
-                active_pipelines[session_id] = pipeline
-
-                await websocket.send_json({
-                    "type": "started",
-                    "session_id": session_id,
-                    "video": video_path,
-                })
-
-                # 异步处理视频帧
                 try:
-                    async for result in pipeline.process_video(
-                        video_path,
-                        target_fps=20,
-                        skip_frames=1
-                    ):
-                        if "error" in result:
-                            await websocket.send_json({
-                                "type": "error",
-                                "message": result["error"]
-                            })
-                            break
+                    options = _pipeline_options(data)
+                    serializer = FrameSerializer(data.get("encoding", "json"),
+                                                 bool(data.get("compact", False)))
+                except ValueError as e:
+                    await websocket.send_json({"type": "error", "message": str(e)})
+                    continue
 
-                        await websocket.send_json({
-                            "type": "frame",
-                            "data": result,
-                        })
+                index_task = asyncio.create_task(asyncio.to_thread(get_frame_index, video_path))
+
+                # 异步排队并处理视频帧
+                session_task = asyncio.create_task(
+                    _run_session(websocket, session_id, client_id, video_path,
+                                 options, serializer)
+                )
 
-                    # 处理完成
+            elif msg_type == "stop":
+                if session_task and not session_task.done():
+                    await _shutdown_session(session_id, session_task)
+                    session_task = None
                     await websocket.send_json({
-                        "type": "complete",
+                        "type": "stopped",
                         "session_id": session_id,
                     })
-                except Exception as e:
+
+            elif msg_type in ("pause", "resume", "seek", "rate"):
+                pipeline = active_pipelines.get(session_id)
+                if not pipeline or pipeline.closed:
                     await websocket.send_json({
                         "type": "error",
-                        "message": str(e)
+                        "message": f"No active analysis for '{msg_type}'"
+                    })
+                    continue
+
+                if msg_type == "pause":
+                    pipeline.pause()
+                    await websocket.send_json({"type": "paused", "session_id": session_id})
+
+                elif msg_type == "resume":
+                    pipeline.resume()
+                    await websocket.send_json({"type": "resumed", "session_id": session_id})
+
+                elif msg_type == "seek":
+                    try:
+                        if data.get("time") is not None:
+                            seconds = float(data["time"])
+                            if index_task is not None and index_task.done() \
+                                    and not index_task.cancelled() and index_task.exception() is None:
+                                frame_number = index_task.result().frame_at(seconds)
+                            else:
+                                # 索引尚未就绪：按帧率推算（可变帧率视频可能有偏差）
+                                frame_number = int(max(0.0, seconds) * (pipeline.video_fps or 30)) + 1
+                        else:
+                            frame_number = int(data.get("frame", 1))
+                    except (TypeError, ValueError) as e:
+                        await websocket.send_json({
+                            "type": "error",
+                            "message": f"Invalid seek target: {e}"
+                        })
+                        continue
+                    frame_number = pipeline.seek(frame_number)
+                    await websocket.send_json({
+                        "type": "seeking",
+                        "session_id": session_id,
+                        "frame": frame_number,
                     })
 
-            elif data.get("type") == "stop":
-                if pipeline:
-                    pipeline.stop()
+                elif msg_type == "rate":
+                    try:
+                        rate = pipeline.set_rate(data.get("value", 1.0))
+                    except (TypeError, ValueError):
+                        await websocket.send_json({
+                            "type": "error",
+                            "message": f"Invalid rate: {data.get('value')}"
+                        })
+                        continue
                     await websocket.send_json({
-                        "type": "stopped",
+                        "type": "rate",
                         "session_id": session_id,
+                        "value": rate,
                     })
 
     except WebSocketDisconnect:
@@ -191,9 +1164,7 @@ async def websocket_analyze(websocket: WebSocket):
         except Exception:
             pass
     finally:
-        if pipeline:
-            pipeline.close()
-        active_pipelines.pop(session_id, None)
+        await _shutdown_session(session_id, session_task)
 
 
 # ============ 静态文件 ============
@@ -206,6 +1177,14 @@ async def serve_demo_video(filename: str):
         return FileResponse(path)
     return JSONResponse(status_code=404, content={"error": "not found"})
 
+# 剪辑片段访问
+@app.get("/clips/{filename}")
+async def serve_clip(filename: str):
+    path = CLIPS_DIR / Path(filename).name
+    if path.exists():
+        return FileResponse(path)
+    return JSONResponse(status_code=404, content={"error": "not found"})
+
 # 前端静态文件（Vue 构建产物）
 if FRONTEND_DIR.exists():
     @app.get("/")
@@ -5,30 +5,140 @@ Sport Vision — CV 处理流水线
 
 import cv2
 import base64
+import asyncio
 import numpy as np
 import time
 from pathlib import Path
-from typing import Optional, AsyncGenerator
+from typing import Callable, Iterator, Optional, AsyncGenerator
 
 from backend.pose_analyzer import PoseAnalyzer
 from backend.action_recognizer import ActionRecognizer
 from backend.visualizer import Visualizer
+from backend.smoothing import interpolate_landmarks, landmark_motion
+from backend.frame_index import FrameCoverage
+from backend.heatmap import HeatmapAccumulator
+from backend.analytics import SessionAnalytics
+from backend.technique import TechniqueMatcher, TemplateLibrary
+from backend.profiler import SessionProfiler
 
 
 class Pipeline:
     """视频分析流水线"""
 
-    def __init__(self):
-        self.pose_analyzer = PoseAnalyzer()
+    # 播放速率范围
+    MIN_RATE = 0.1
+    MAX_RATE = 4.0
+
+    # 分析坐标系的最大宽度：姿态 / 生物力学 / 动作识别的像素阈值按该尺寸标定，
+    # 与显示尺寸无关；显示尺寸只影响渲染帧和发给客户端的关键点坐标
+    ANALYSIS_WIDTH = 960
+
+    # 缩放插值方式
+    INTERPOLATIONS = {
+        "nearest": cv2.INTER_NEAREST,
+        "linear": cv2.INTER_LINEAR,
+        "area": cv2.INTER_AREA,
+        "cubic": cv2.INTER_CUBIC,
+    }
+
+    def __init__(self, preroll_frames: int = 15,
+                 cpu_budget: float = 0, memory_budget_mb: float = 0,
+                 inference_stride: int = 1, adaptive_inference: bool = False,
+                 motion_threshold: float = 0.01, smoothing: bool = False,
+                 display_width: int = 960, inference_size: int = 512,
+                 display_interpolation: str = "linear",
+                 inference_interpolation: str = "linear",
+                 heatmap_grid: int = 48,
+                 technique_library: Optional[TemplateLibrary] = None,
+                 pose_analyzer: Optional[PoseAnalyzer] = None):
+        """
+        Args:
+            preroll_frames: 跳转时用于预热时序状态的帧数（动作识别窗口 + 去抖动间隔）
+            cpu_budget: 单次会话允许消耗的 CPU 时间（秒，0 = 不限制）
+            memory_budget_mb: 单次会话帧缓冲估算内存上限（MB，0 = 不限制）；
+                只在开始分析时按分辨率估算检查一次，不限制运行中的实际 RSS
+            inference_stride: 每 N 帧运行一次姿态推理，中间帧插值（1 = 逐帧推理）
+            adaptive_inference: 运动剧烈时自动退回逐帧推理
+            motion_threshold: 自适应推理的运动阈值（归一化坐标 / 帧）
+            smoothing: 对关键点做 One-Euro 平滑后再计算生物力学和识别动作
+            display_width: 渲染 / 编码输出的最大宽度，发给客户端的关键点坐标也映射到该尺寸
+                （分析始终在 ANALYSIS_WIDTH 坐标系中进行）
+            inference_size: 推理输入的最长边（0 = 直接使用显示尺寸的帧）；
+                lite 模型检测阶段输入 224、关键点阶段在人体裁剪区域上取 256，
+                默认 512 为裁剪留出余量
+            display_interpolation, inference_interpolation: 缩放插值方式
+                （nearest / linear / area / cubic；area 画质最好，但非整数倍缩小时慢一个数量级）
+            heatmap_grid: 热力图网格列数，行数按分析尺寸的宽高比推算（16:9 时 48 列 × 27 行）
+            technique_library: 参考动作模板库（可在会话间共享；None = 不做技术比对）
+            pose_analyzer: 已加载模型的姿态分析器（如预热时创建的实例，由 Pipeline 接管并负责关闭；
+                None = 新建）
+        """
+        for name in (display_interpolation, inference_interpolation):
+            if name not in self.INTERPOLATIONS:
+                raise ValueError(f"Unknown interpolation: {name}")
+        if pose_analyzer is None:
+            pose_analyzer = PoseAnalyzer(smoothing=smoothing)
+        else:
+            pose_analyzer.reset()
+            pose_analyzer.set_smoothing(smoothing)
+        self.pose_analyzer = pose_analyzer
         self.action_recognizer = ActionRecognizer()
         self.visualizer = Visualizer()
+        self.preroll_frames = preroll_frames
+        self.cpu_budget = cpu_budget
+        self.memory_budget_mb = memory_budget_mb
+        self.inference_stride = max(1, int(inference_stride))
+        self.adaptive_inference = adaptive_inference
+        self.motion_threshold = motion_threshold
+        self.display_width = max(16, int(display_width))
+        self.inference_size = max(0, int(inference_size))
+        self.display_interpolation = self.INTERPOLATIONS[display_interpolation]
+        self.inference_interpolation = self.INTERPOLATIONS[inference_interpolation]
+        self.heatmap_grid = max(1, int(heatmap_grid))
+        self.cpu_seconds = 0.0
+        self.last_activity = time.time()
+        self.closed = False
         self.is_running = False
+        self.is_paused = False
+        self.completed = False
+        self.rate = 1.0
+        # 已处理的帧号（跳转会留下空洞，见 fully_covered）
+        self.coverage = FrameCoverage()
+        self.skip_frames = 1
+        # 本次分析识别到的动作事件（按帧号排序）
+        self.action_events: list = []
+        self._event_keys: set = set()
+        # 由去重后的动作事件得到的计数与最近历史（帧号为视频帧号，跳转后保持不变）
+        self.action_counts: dict = {k: 0 for k in ActionRecognizer.ACTIONS}
+        self._recent_actions: list = []
+        self.video_fps = 0.0
+        self.total_frames = 0
+        # 分析坐标系尺寸及其到显示尺寸的缩放比例（_begin 中确定）
+        self.analysis_size = (0, 0)
+        self.display_scale = 1.0
+        # 整场热力图（尺寸确定后创建）
+        self.heatmap: Optional[HeatmapAccumulator] = None
+        # 整场流式统计（见 backend.analytics）
+        self.analytics: Optional[SessionAnalytics] = None
+        # 技术动作比对（有模板库时每次分析创建）
+        self.technique_library = technique_library
+        self.technique: Optional[TechniqueMatcher] = None
+        # 推理统计
+        self.inferred_frames = 0
+        self.interpolated_frames = 0
+        self._frames_read = 0
+        self._pending_seek: Optional[int] = None
+        # 按需挂载的采样分析器（None = 未挂载，无额外开销）
+        self.profiler: Optional[SessionProfiler] = None
+        # 在事件循环内创建（见 process_video）
+        self._wakeup: Optional[asyncio.Event] = None
 
     async def process_video(self, video_path: str,
                             target_fps: int = 24,
                             skip_frames: int = 1) -> AsyncGenerator[dict, None]:
         """
         处理视频并逐帧 yield 分析结果（异步生成器）
+        处理过程中可通过 pause / resume / seek / set_rate 控制
 
         Yields:
             {
@@ -36,10 +146,12 @@ class Pipeline:
                 "frame_number": int,
                 "total_frames": int,
                 "fps": float,
+                "timestamp": float,        # 帧显示时间（秒）
                 "pose": {...} or None,     # 姿态分析结果
                 "action": {...} or None,   # 动作识别结果
                 "progress": float,         # 0.0 ~ 1.0
-                "heatmap_data": [...],     # 热力图数据点
+                "heatmap": {...},          # 量化占位网格，仅在明显变化时出现
+                "technique": [...],        # 后台完成的技术比对结果，仅在有结果时出现
             }
         """
         cap = cv2.VideoCapture(video_path)
@@ -52,89 +164,452 @@ class Pipeline:
         frame_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
         frame_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
 
-        # 限制输出尺寸（保持比例，最大宽度 960）
-        max_width = 960
-        if frame_width > max_width:
-            scale = max_width / frame_width
-            target_w = max_width
-            target_h = int(frame_height * scale)
-        else:
-            target_w = frame_width
-            target_h = frame_height
+        target_w, target_h = self._output_size(frame_width, frame_height, self.display_width)
+        analysis_size = self._output_size(frame_width, frame_height, self.ANALYSIS_WIDTH)
 
-        self.is_running = True
-        self.pose_analyzer.reset()
-        self.action_recognizer.reset()
-        self.visualizer.reset()
+        estimate_mb = self.estimate_memory_mb(frame_width, frame_height, target_w, target_h)
+        if self.memory_budget_mb and estimate_mb > self.memory_budget_mb:
+            cap.release()
+            yield {"error": f"Video too large for session memory budget "
+                            f"({estimate_mb:.0f} MB > {self.memory_budget_mb:.0f} MB)"}
+            return
 
-        frame_count = 0
-        # 帧间隔控制
-        frame_interval = 1.0 / target_fps
+        self._begin(video_fps, total_frames, analysis_size, (target_w, target_h), skip_frames)
+        self._wakeup = asyncio.Event()
+        frames = self._frames(cap, 0, skip_frames, (target_w, target_h))
 
         try:
             while self.is_running:
-                ret, frame = cap.read()
-                if not ret:
+                await self._wait_if_paused()
+                if not self.is_running:
                     break
 
-                frame_count += 1
-                if frame_count % skip_frames != 0:
-                    continue
+                # 处理跳转请求
+                if self._pending_seek is not None:
+                    target = self._pending_seek
+                    self._pending_seek = None
+                    frame_count = self._seek(cap, target, skip_frames,
+                                             (target_w, target_h))
+                    frames = self._frames(cap, frame_count, skip_frames,
+                                          (target_w, target_h))
 
                 start_time = time.time()
+                cpu_start = time.thread_time()
 
-                # 缩放
-                if frame.shape[1] != target_w:
-                    frame = cv2.resize(frame, (target_w, target_h))
-
-                # RGB 转换（MediaPipe 需要 RGB）
-                frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                # 解码 + 姿态推理（或插值）
+                item = next(frames, None)
+                if item is None:
+                    self.completed = True
+                    break
+                frame_count, timestamp, frame, landmarks = item
+                profiler = self.profiler
 
-                # 1. 姿态分析
-                pose_result = self.pose_analyzer.process_frame(frame_rgb)
+                # 姿态分析 + 动作识别
+                if profiler:
+                    stage_start = profiler.begin("analyze")
+                pose_result, action_result = self._analyze_landmarks(landmarks, timestamp)
 
-                # 2. 动作识别
-                action_result = None
-                if pose_result:
-                    action_result = self.action_recognizer.update(
-                        pose_result["keypoints"],
-                        pose_result["joint_angles"]
-                    )
+                self._track_action(frame_count, timestamp, pose_result, action_result)
+                self.coverage.add(frame_count)
+                self.heatmap.add(frame_count, pose_result)
+                self.analytics.add_frame(frame_count, timestamp, pose_result, action_result)
+                if self.technique:
+                    self.technique.add_frame(timestamp, pose_result)
 
                 # 3. 可视化渲染
-                rendered = self.visualizer.render_frame(frame, pose_result, action_result)
+                if profiler:
+                    profiler.end("analyze", stage_start)
+                    stage_start = profiler.begin("render")
+                display_pose = self._display_pose(pose_result)
+                rendered = self.visualizer.render_frame(frame, display_pose, action_result)
 
                 # 编码为 JPEG base64
+                if profiler:
+                    profiler.end("render", stage_start)
+                    stage_start = profiler.begin("encode")
                 _, buffer = cv2.imencode(".jpg", rendered, [cv2.IMWRITE_JPEG_QUALITY, 80])
                 frame_base64 = base64.b64encode(buffer).decode("utf-8")
+                if profiler:
+                    profiler.end("encode", stage_start)
+
+                # CPU 时间预算（帧处理在事件循环线程内同步执行，线程 CPU 时间可归属到本会话）
+                self.cpu_seconds += time.thread_time() - cpu_start
+                self.last_activity = time.time()
+                if self.cpu_budget and self.cpu_seconds > self.cpu_budget:
+                    yield {"error": f"Session CPU budget exceeded ({self.cpu_budget:.0f}s)"}
+                    break
 
                 # 构建输出
                 progress = frame_count / total_frames if total_frames > 0 else 0
 
-                yield {
+                output = {
                     "frame_base64": frame_base64,
                     "frame_number": frame_count,
                     "total_frames": total_frames,
                     "fps": round(video_fps, 1),
+                    "timestamp": round(timestamp, 3),
                     "width": target_w,
                     "height": target_h,
-                    "pose": self._sanitize_pose(pose_result),
+                    "pose": self._sanitize_pose(display_pose),
                     "action": action_result,
                     "progress": round(min(progress, 1.0), 3),
-                    "heatmap_data": self.pose_analyzer.get_trajectory(),
                 }
+                heatmap = self.heatmap.snapshot()
+                if heatmap:
+                    output["heatmap"] = heatmap
+                if self.technique:
+                    matches = self.technique.poll()
+                    if matches:
+                        output["technique"] = matches
+                yield output
 
-                # 控制帧率
+                # 控制帧率（按播放速率缩放）
+                frame_interval = 1.0 / (target_fps * self.rate)
                 elapsed = time.time() - start_time
                 sleep_time = max(0, frame_interval - elapsed)
                 if sleep_time > 0:
-                    import asyncio
                     await asyncio.sleep(sleep_time)
 
         finally:
             cap.release()
             self.is_running = False
 
+    def analyze_video(self, video_path: str, skip_frames: int = 1,
+                      should_stop: Optional[Callable[[], bool]] = None) -> Iterator[dict]:
+        """
+        离线分析（同步生成器，供后台任务在线程中运行）
+        不渲染、不编码、不限速，只输出分析数据
+
+        Yields:
+            {frame_number, total_frames, fps, timestamp, width, height,
+             pose, action, progress, technique（有比对结果时）}
+        """
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            raise ValueError(f"Cannot open video: {video_path}")
+
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        video_fps = cap.get(cv2.CAP_PROP_FPS) or 30
+        frame_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        frame_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        target_w, target_h = self._output_size(frame_width, frame_height, self.display_width)
+        analysis_size = self._output_size(frame_width, frame_height, self.ANALYSIS_WIDTH)
+
+        self._begin(video_fps, total_frames, analysis_size, (target_w, target_h), skip_frames)
+
+        try:
+            for frame_count, timestamp, _, landmarks in self._frames(
+                cap, 0, skip_frames, (target_w, target_h), render=False
+            ):
+                if not self.is_running or (should_stop and should_stop()):
+                    break
+
+                pose_result, action_result = self._analyze_landmarks(landmarks, timestamp)
+                self._track_action(frame_count, timestamp, pose_result, action_result)
+                self.coverage.add(frame_count)
+                self.heatmap.add(frame_count, pose_result)
+                self.analytics.add_frame(frame_count, timestamp, pose_result, action_result)
+                if self.technique:
+                    self.technique.add_frame(timestamp, pose_result)
+
+                progress = frame_count / total_frames if total_frames > 0 else 0
+                output = {
+                    "frame_number": frame_count,
+                    "total_frames": total_frames,
+                    "fps": round(video_fps, 1),
+                    "timestamp": round(timestamp, 3),
+                    "width": target_w,
+                    "height": target_h,
+                    "pose": self._sanitize_pose(self._display_pose(pose_result)),
+                    "action": action_result,
+                    "progress": round(min(progress, 1.0), 3),
+                }
+                if self.technique:
+                    matches = self.technique.poll()
+                    if matches:
+                        output["technique"] = matches
+                yield output
+            else:
+                self.completed = True
+                # 剩余比对结果写入动作事件（随事件表持久化）
+                if self.technique:
+                    self.technique.finish()
+        finally:
+            cap.release()
+            self.is_running = False
+
+    def _begin(self, video_fps: float, total_frames: int, analysis_size: tuple,
+               display_size: tuple, skip_frames: int = 1):
+        """开始一次新的分析"""
+        self.video_fps = video_fps
+        self.total_frames = total_frames
+        self.skip_frames = skip_frames
+        self.coverage = FrameCoverage(total_frames)
+        self.analysis_size = analysis_size
+        self.display_scale = display_size[0] / analysis_size[0] if analysis_size[0] else 1.0
+        cols = self.heatmap_grid
+        rows = max(1, round(cols * analysis_size[1] / analysis_size[0])) if analysis_size[0] else cols
+        self.heatmap = HeatmapAccumulator(analysis_size[0], analysis_size[1], cols=cols, rows=rows,
+                                          frame_count=total_frames)
+        self.analytics = SessionAnalytics(video_fps, frame_count=total_frames)
+        if self.technique:
+            self.technique.close()
+        self.technique = TechniqueMatcher(self.technique_library, video_fps) \
+            if self.technique_library is not None else None
+        self.action_events = []
+        self._event_keys = set()
+        self.action_counts = {k: 0 for k in ActionRecognizer.ACTIONS}
+        self._recent_actions = []
+        self.cpu_seconds = 0.0
+        self.inferred_frames = 0
+        self.interpolated_frames = 0
+        self.is_running = True
+        self.completed = False
+        self._reset_state()
+
+    @staticmethod
+    def estimate_memory_mb(frame_width: int, frame_height: int,
+                           target_w: int, target_h: int) -> float:
+        """
+        估算单会话帧缓冲内存：解码帧 + 缩放帧、RGB 副本、渲染叠加层及其半透明副本
+        （不含 MediaPipe 模型本身的固定开销）
+        """
+        decoded = frame_width * frame_height * 3
+        working = target_w * target_h * 3 * 5
+        return (decoded + working) / (1024 * 1024)
+
+    @staticmethod
+    def _output_size(frame_width: int, frame_height: int, max_width: int = 960) -> tuple:
+        """限制输出尺寸（保持比例，不超过最大宽度）"""
+        if frame_width > max_width:
+            scale = max_width / frame_width
+            return max_width, int(frame_height * scale)
+        return frame_width, frame_height
+
+    def _inference_frame(self, frame: np.ndarray, display_frame: Optional[np.ndarray],
+                         target_size: tuple) -> np.ndarray:
+        """
+        生成推理输入帧（只缩小不放大）；未设置推理尺寸时使用显示尺寸的帧
+        显示帧不小于推理尺寸时从显示帧缩放，避免对原始大帧做第二次全尺寸缩放
+        """
+        if not self.inference_size:
+            if display_frame is not None:
+                return display_frame
+            if frame.shape[1] == target_size[0]:
+                return frame
+            return cv2.resize(frame, target_size, interpolation=self.display_interpolation)
+        if display_frame is not None and max(display_frame.shape[:2]) >= self.inference_size:
+            frame = display_frame
+        h, w = frame.shape[:2]
+        scale = self.inference_size / max(w, h)
+        if scale >= 1.0:
+            return frame
+        size = (max(1, round(w * scale)), max(1, round(h * scale)))
+        return cv2.resize(frame, size, interpolation=self.inference_interpolation)
+
+    def _frames(self, cap: cv2.VideoCapture, frame_count: int, skip_frames: int,
+                target_size: tuple, end_frame: Optional[int] = None,
+                render: bool = True) -> Iterator[tuple]:
+        """
+        读取、缩放视频帧并获取关键点，逐帧产出 (frame_number, timestamp, frame, landmarks)
+        推理帧与显示帧分别由原始解码帧缩放；关键点为归一化坐标，由 _analyze_landmarks 映射到分析坐标系
+
+        稀疏推理：每 stride 帧推理一次，中间帧暂存，待下一次推理后在两次结果之间插值；
+        因此输出会滞后 stride - 1 帧。任一端未检测到人体时中间帧不插值（landmarks 为 None）
+
+        Args:
+            frame_count: 已读帧数（从此之后开始读）
+            end_frame: 读到该帧号后停止（用于跳转预热）
+            render: False 时不生成显示帧（产出的 frame 为 None）
+        """
+        pending: list = []   # 等待插值的中间帧 (frame_number, timestamp, frame)
+        prev_landmarks: Optional[np.ndarray] = None
+        stride = self.inference_stride
+
+        while end_frame is None or frame_count < end_frame:
+            profiler = self.profiler
+            if profiler:
+                stage_start = profiler.begin("decode")
+            ret, frame = cap.read()
+            if not ret:
+                if profiler:
+                    profiler.end("decode", stage_start)
+                break
+            frame_count += 1
+            self._frames_read = frame_count
+            if frame_count % skip_frames != 0:
+                if profiler:
+                    profiler.end("decode", stage_start)
+                continue
+
+            timestamp = cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+            decoded = frame
+            frame = None
+            if render:
+                frame = decoded
+                if decoded.shape[1] != target_size[0]:
+                    frame = cv2.resize(decoded, target_size,
+                                       interpolation=self.display_interpolation)
+            if profiler:
+                profiler.end("decode", stage_start)
+
+            is_last = end_frame is not None and frame_count >= end_frame
+            if stride > 1 and prev_landmarks is not None and len(pending) + 1 < stride and not is_last:
+                pending.append((frame_count, timestamp, frame))
+                continue
+
+            if profiler:
+                stage_start = profiler.begin("detect")
+            landmarks = self._infer(self._inference_frame(decoded, frame, target_size))
+            if profiler:
+                profiler.end("detect", stage_start)
+            if pending:
+                span = len(pending) + 1
+                for i, (num, ts, fr) in enumerate(pending):
+                    interp = None
+                    if prev_landmarks is not None and landmarks is not None:
+                        interp = interpolate_landmarks(prev_landmarks, landmarks, (i + 1) / span)
+                        self.interpolated_frames += 1
+                    yield num, ts, fr, interp
+                pending = []
+
+                # 自适应：运动剧烈时下一段逐帧推理
+                if self.adaptive_inference and prev_landmarks is not None and landmarks is not None:
+                    motion = landmark_motion(prev_landmarks, landmarks, span)
+                    stride = 1 if motion > self.motion_threshold else self.inference_stride
+            elif self.adaptive_inference and stride == 1 and prev_landmarks is not None \
+                    and landmarks is not None:
+                if landmark_motion(prev_landmarks, landmarks, 1) <= self.motion_threshold:
+                    stride = self.inference_stride
+
+            prev_landmarks = landmarks
+            yield frame_count, timestamp, frame, landmarks
+
+        # 视频结束：剩余中间帧沿用最后一次推理结果
+        for num, ts, fr in pending:
+            yield num, ts, fr, prev_landmarks
+
+    def _infer(self, frame: np.ndarray) -> Optional[np.ndarray]:
+        """RGB 转换（MediaPipe 需要 RGB）并运行姿态推理"""
+        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        self.inferred_frames += 1
+        return self.pose_analyzer.detect(frame_rgb)
+
+    def _analyze_landmarks(self, landmarks: Optional[np.ndarray], timestamp: float) -> tuple:
+        """由关键点计算姿态分析与动作识别结果（分析坐标系），返回 (pose, action)"""
+        # 1. 姿态分析
+        pose_result = None
+        if landmarks is not None:
+            pose_result = self.pose_analyzer.analyze(
+                landmarks, self.analysis_size[0], self.analysis_size[1], timestamp
+            )
+
+        # 2. 动作识别
+        action_result = None
+        if pose_result:
+            action_result = self.action_recognizer.update(
+                pose_result["keypoints"],
+                pose_result["joint_angles"]
+            )
+        return pose_result, action_result
+
+    def _track_action(self, frame_number: int, timestamp: float,
+                      pose_result: Optional[dict], action_result: Optional[dict]):
+        """
+        记录新动作，并用会话级的计数 / 历史替换识别器自身的统计
+        （识别器在跳转时只重置时序窗口，其计数会包含回放帧，帧号也不是视频帧号）
+        """
+        if not action_result:
+            return
+        if action_result["is_new_action"]:
+            self._record_event(frame_number, timestamp, pose_result, action_result)
+        action_result["action_counts"] = dict(self.action_counts)
+        action_result["action_history"] = self._recent_actions
+
+    def _record_event(self, frame_number: int, timestamp: float,
+                      pose_result: dict, action_result: dict):
+        """记录新触发的动作及触发帧的生物力学快照（跳转回放时去重）"""
+        key = (frame_number, action_result["action"])
+        if key in self._event_keys:
+            return
+        self._event_keys.add(key)
+        event = {
+            "action": action_result["action"],
+            "frame": frame_number,
+            "timestamp": round(timestamp, 3),
+            "confidence": action_result["confidence"],
+            "biomechanics": dict(pose_result["biomechanics"]),
+            "joint_angles": dict(pose_result["joint_angles"]),
+        }
+        self.action_events.append(event)
+        self.action_events.sort(key=lambda ev: ev["frame"])
+        self.action_counts[event["action"]] = self.action_counts.get(event["action"], 0) + 1
+        self._recent_actions = [
+            {"action": ev["action"], "frame": ev["frame"], "confidence": ev["confidence"]}
+            for ev in self.action_events[-20:]
+        ]
+        if self.technique:
+            self.technique.add_event(event)
+
+    def _seek(self, cap: cv2.VideoCapture, target: int, skip_frames: int,
+              target_size: tuple) -> int:
+        """
+        跳转到目标帧（下一次 read 返回 target 帧）
+        从 target 之前 preroll_frames 帧开始只做分析不渲染，
+        以恢复动作识别和生物力学所需的时序状态，而不是从头重放
+
+        Returns:
+            跳转后的已读帧计数（target - 1）
+        """
+        target = max(1, target)
+        start = max(1, target - self.preroll_frames)
+        cap.set(cv2.CAP_PROP_POS_FRAMES, start - 1)
+        self._reset_state(seek=True)
+
+        self._frames_read = start - 1
+        for _, timestamp, _, landmarks in self._frames(
+            cap, start - 1, skip_frames, target_size, end_frame=target - 1, render=False
+        ):
+            pose_result = self._display_pose(self._analyze_landmarks(landmarks, timestamp)[0])
+            # 预热帧不输出，但保持可视化轨迹连续
+            if pose_result and pose_result.get("center_of_mass"):
+                self.visualizer.track_point(pose_result["center_of_mass"])
+        return self._frames_read
+
+    def _reset_state(self, seek: bool = False):
+        """重置时序状态；跳转时保留动作计数与历史"""
+        self.pose_analyzer.reset()
+        if seek:
+            self.action_recognizer.reset_window()
+        else:
+            self.action_recognizer.reset()
+        self.visualizer.reset()
+
+    async def _wait_if_paused(self):
+        """暂停时挂起，直到恢复、跳转或停止"""
+        while self.is_paused and self.is_running and self._pending_seek is None:
+            self._wakeup.clear()
+            await self._wakeup.wait()
+
+    def _notify(self):
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _display_pose(self, pose_result: Optional[dict]) -> Optional[dict]:
+        """姿态结果中的像素坐标映射到显示尺寸（显示尺寸与分析坐标系相同时原样返回）"""
+        scale = self.display_scale
+        if not pose_result or scale == 1.0:
+            return pose_result
+        display = dict(pose_result)
+        display["keypoints"] = [
+            dict(kp, x=kp["x"] * scale, y=kp["y"] * scale) for kp in pose_result["keypoints"]
+        ]
+        com = pose_result.get("center_of_mass")
+        if com:
+            display["center_of_mass"] = {"x": round(com["x"] * scale, 1),
+                                         "y": round(com["y"] * scale, 1)}
+        return display
+
     def _sanitize_pose(self, pose_result: Optional[dict]) -> Optional[dict]:
         """清理姿态数据以便 JSON 序列化"""
         if not pose_result:
@@ -148,11 +623,52 @@ class Pipeline:
             "confidence": pose_result["confidence"],
         }
 
+    def pause(self):
+        """暂停处理"""
+        self.is_paused = True
+        self.last_activity = time.time()
+
+    def resume(self):
+        """恢复处理"""
+        self.is_paused = False
+        self.last_activity = time.time()
+        self._notify()
+
+    def seek(self, frame_number: int) -> int:
+        """请求跳转到指定帧（在处理循环中执行），返回限制到 [1, 总帧数] 后的目标帧"""
+        target = max(1, int(frame_number))
+        if self.total_frames > 0:
+            target = min(target, self.total_frames)
+        self._pending_seek = target
+        self.last_activity = time.time()
+        self._notify()
+        return target
+
+    @property
+    def fully_covered(self) -> bool:
+        """
+        播放到结尾时是否处理了每一帧（按 skip_frames 抽样）
+        向前跳转跳过的区间若没有再回放，分析结果只覆盖部分视频
+        """
+        return self.coverage.missing(self.skip_frames) == 0
+
+    def set_rate(self, rate: float) -> float:
+        """设置播放速率，返回实际生效值"""
+        self.rate = min(max(float(rate), self.MIN_RATE), self.MAX_RATE)
+        self.last_activity = time.time()
+        return self.rate
+
     def stop(self):
         """停止处理"""
         self.is_running = False
+        self._notify()
 
     def close(self):
-        """释放所有资源"""
+        """释放所有资源（可重复调用）"""
         self.stop()
+        if self.closed:
+            return
+        self.closed = True
+        if self.technique:
+            self.technique.close()
         self.pose_analyzer.close()
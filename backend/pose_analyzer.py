@@ -12,6 +12,8 @@ from collections import deque
 from pathlib import Path
 from typing import Optional
 
+from backend.smoothing import OneEuroFilter
+
 
 class PoseAnalyzer:
     """封装 MediaPipe PoseLandmarker，提供关键点提取和生物力学分析"""
@@ -59,9 +61,14 @@ class PoseAnalyzer:
         "right_hip": (12, 24, 26),
     }
 
+    # 关键点数组的行顺序（MediaPipe 索引）及反向映射
+    LANDMARK_IDS = list(LANDMARK_NAMES)
+    _ROW = {idx: row for row, idx in enumerate(LANDMARK_IDS)}
+
     def __init__(self, min_detection_confidence: float = 0.5,
                  min_tracking_confidence: float = 0.5,
-                 history_size: int = 30):
+                 history_size: int = 30,
+                 smoothing: bool = False):
 
         # 查找模型文件
         model_path = Path(__file__).resolve().parent.parent / "models" / "pose_landmarker_lite.task"
@@ -89,8 +96,11 @@ class PoseAnalyzer:
         # 重心轨迹
         self.center_of_mass_history: deque = deque(maxlen=history_size * 2)
         self.frame_count = 0
+        # One-Euro 关键点平滑（可选）
+        self.smoother: Optional[OneEuroFilter] = OneEuroFilter() if smoothing else None
 
-    def process_frame(self, frame_rgb: np.ndarray) -> Optional[dict]:
+    def process_frame(self, frame_rgb: np.ndarray,
+                      timestamp: Optional[float] = None) -> Optional[dict]:
         """
         处理单帧，返回分析结果
 
@@ -105,7 +115,19 @@ class PoseAnalyzer:
             }
         """
         h, w = frame_rgb.shape[:2]
+        landmarks = self.detect(frame_rgb)
+        if landmarks is None:
+            return None
+        return self.analyze(landmarks, w, h, timestamp)
+
+    def detect(self, frame_rgb: np.ndarray) -> Optional[np.ndarray]:
+        """
+        只运行模型推理
 
+        Returns:
+            (13, 4) 数组，行顺序同 LANDMARK_NAMES，列为归一化 [x, y, z, visibility]；
+            未检测到人体时返回 None
+        """
         # 创建 MediaPipe Image
         mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=frame_rgb)
 
@@ -116,26 +138,47 @@ class PoseAnalyzer:
             return None
 
         landmarks = result.pose_landmarks[0]  # 第一个人
+        if len(landmarks) <= max(self.LANDMARK_IDS):
+            return None
+
+        arr = np.empty((len(self.LANDMARK_IDS), 4), dtype=np.float64)
+        for row, idx in enumerate(self.LANDMARK_IDS):
+            lm = landmarks[idx]
+            arr[row] = (lm.x, lm.y, lm.z,
+                        lm.visibility if lm.visibility is not None else 0.5)
+        return arr
+
+    def analyze(self, landmarks: np.ndarray, w: int, h: int,
+                timestamp: Optional[float] = None) -> Optional[dict]:
+        """
+        由归一化关键点数组计算关键点、关节角度、重心和生物力学指标
+        landmarks 可以来自推理、插值或平滑；启用平滑时先经过 One-Euro 滤波
+
+        Args:
+            w, h: 输出坐标系尺寸（像素）
+            timestamp: 帧时间（秒），平滑滤波需要；缺省按 30fps 帧序推算
+        """
+        if self.smoother is not None:
+            t = timestamp if timestamp is not None else self.frame_count / 30.0
+            smoothed = landmarks.copy()
+            smoothed[:, :3] = self.smoother(landmarks[:, :3], t)
+            landmarks = smoothed
 
         # 1. 提取关键点（像素坐标）
         keypoints = []
-        for idx in self.LANDMARK_NAMES:
-            if idx < len(landmarks):
-                lm = landmarks[idx]
-                keypoints.append({
-                    "id": idx,
-                    "name": self.LANDMARK_NAMES[idx],
-                    "x": lm.x * w,
-                    "y": lm.y * h,
-                    "z": lm.z,
-                    "visibility": lm.visibility if lm.visibility is not None else 0.5,
-                })
-
-        if not keypoints:
-            return None
+        for row, idx in enumerate(self.LANDMARK_IDS):
+            x, y, z, visibility = landmarks[row]
+            keypoints.append({
+                "id": idx,
+                "name": self.LANDMARK_NAMES[idx],
+                "x": float(x * w),
+                "y": float(y * h),
+                "z": float(z),
+                "visibility": float(visibility),
+            })
 
         # 过滤低置信度
-        avg_visibility = np.mean([kp["visibility"] for kp in keypoints])
+        avg_visibility = float(np.mean(landmarks[:, 3]))
         if avg_visibility < 0.3:
             return None
 
@@ -147,12 +190,10 @@ class PoseAnalyzer:
                 joint_angles[name] = round(angle, 1)
 
         # 3. 计算重心
-        if 23 < len(landmarks) and 24 < len(landmarks):
-            com_x = (landmarks[23].x + landmarks[24].x) / 2 * w
-            com_y = (landmarks[23].y + landmarks[24].y) / 2 * h
-        else:
-            com_x, com_y = w / 2, h / 2
-        center_of_mass = {"x": round(com_x, 1), "y": round(com_y, 1)}
+        left_hip, right_hip = landmarks[self._ROW[23]], landmarks[self._ROW[24]]
+        com_x = (left_hip[0] + right_hip[0]) / 2 * w
+        com_y = (left_hip[1] + right_hip[1]) / 2 * h
+        center_of_mass = {"x": round(float(com_x), 1), "y": round(float(com_y), 1)}
         self.center_of_mass_history.append(center_of_mass)
 
         # 4. 记录关键点历史
@@ -172,23 +213,26 @@ class PoseAnalyzer:
             "confidence": round(avg_visibility, 2),
         }
 
-    def _calculate_angle_from_landmarks(self, landmarks, a_idx, b_idx, c_idx) -> Optional[float]:
+    def _point(self, landmarks: np.ndarray, idx: int) -> np.ndarray:
+        """按 MediaPipe 索引取归一化 (x, y)"""
+        return landmarks[self._ROW[idx], :2]
+
+    def _calculate_angle_from_landmarks(self, landmarks: np.ndarray,
+                                        a_idx, b_idx, c_idx) -> Optional[float]:
         """计算三个关键点形成的角度（以 b 为顶点）"""
         try:
-            if a_idx >= len(landmarks) or b_idx >= len(landmarks) or c_idx >= len(landmarks):
-                return None
-            a = landmarks[a_idx]
-            b = landmarks[b_idx]
-            c = landmarks[c_idx]
-            ba = np.array([a.x - b.x, a.y - b.y])
-            bc = np.array([c.x - b.x, c.y - b.y])
+            a = self._point(landmarks, a_idx)
+            b = self._point(landmarks, b_idx)
+            c = self._point(landmarks, c_idx)
+            ba = a - b
+            bc = c - b
             cosine = np.dot(ba, bc) / (np.linalg.norm(ba) * np.linalg.norm(bc) + 1e-8)
             angle = np.arccos(np.clip(cosine, -1.0, 1.0))
             return math.degrees(angle)
         except Exception:
             return None
 
-    def _analyze_biomechanics(self, landmarks, w: int, h: int) -> dict:
+    def _analyze_biomechanics(self, landmarks: np.ndarray, w: int, h: int) -> dict:
         """运动生物力学分析"""
         result = {
             "wrist_speed": 0.0,
@@ -214,22 +258,18 @@ class PoseAnalyzer:
                 wrist_speeds.append(speed)
         result["wrist_speed"] = round(max(wrist_speeds) if wrist_speeds else 0, 1)
 
+        left_shoulder, right_shoulder = self._point(landmarks, 11), self._point(landmarks, 12)
+        left_hip, right_hip = self._point(landmarks, 23), self._point(landmarks, 24)
+
         # 身体倾斜角（脊柱与垂直线的夹角）
         try:
-            if 11 < len(landmarks) and 12 < len(landmarks) and 23 < len(landmarks) and 24 < len(landmarks):
-                mid_shoulder = np.array([
-                    (landmarks[11].x + landmarks[12].x) / 2,
-                    (landmarks[11].y + landmarks[12].y) / 2
-                ])
-                mid_hip = np.array([
-                    (landmarks[23].x + landmarks[24].x) / 2,
-                    (landmarks[23].y + landmarks[24].y) / 2
-                ])
-                spine = mid_shoulder - mid_hip
-                vertical = np.array([0, -1])
-                cos_angle = np.dot(spine, vertical) / (np.linalg.norm(spine) + 1e-8)
-                lean_angle = math.degrees(math.acos(np.clip(cos_angle, -1.0, 1.0)))
-                result["body_lean"] = round(lean_angle, 1)
+            mid_shoulder = (left_shoulder + right_shoulder) / 2
+            mid_hip = (left_hip + right_hip) / 2
+            spine = mid_shoulder - mid_hip
+            vertical = np.array([0, -1])
+            cos_angle = np.dot(spine, vertical) / (np.linalg.norm(spine) + 1e-8)
+            lean_angle = math.degrees(math.acos(np.clip(cos_angle, -1.0, 1.0)))
+            result["body_lean"] = round(lean_angle, 1)
         except Exception:
             pass
 
@@ -240,7 +280,7 @@ class PoseAnalyzer:
             angle = self._calculate_angle_from_landmarks(landmarks, a_id, b_id, c_id)
             if angle is not None:
                 knee_angles.append(angle)
-        result["knee_bend"] = round(180 - np.mean(knee_angles) if knee_angles else 0, 1)
+        result["knee_bend"] = round(float(180 - np.mean(knee_angles)) if knee_angles else 0, 1)
 
         # 手臂伸展度（肘部角度，越接近 180 越伸展）
         elbow_angles = []
@@ -249,22 +289,14 @@ class PoseAnalyzer:
             angle = self._calculate_angle_from_landmarks(landmarks, a_id, b_id, c_id)
             if angle is not None:
                 elbow_angles.append(angle)
-        result["arm_extension"] = round(np.mean(elbow_angles) if elbow_angles else 0, 1)
+        result["arm_extension"] = round(float(np.mean(elbow_angles)) if elbow_angles else 0, 1)
 
         # 对称性评分（0-100，左右对称性）
-        try:
-            if 11 < len(landmarks) and 12 < len(landmarks) and 23 < len(landmarks) and 24 < len(landmarks):
-                left_shoulder_y = landmarks[11].y
-                right_shoulder_y = landmarks[12].y
-                left_hip_y = landmarks[23].y
-                right_hip_y = landmarks[24].y
-                shoulder_diff = abs(left_shoulder_y - right_shoulder_y)
-                hip_diff = abs(left_hip_y - right_hip_y)
-                asymmetry = (shoulder_diff + hip_diff) / 2
-                symmetry = max(0, 100 - asymmetry * 500)
-                result["symmetry_score"] = round(symmetry, 1)
-        except Exception:
-            result["symmetry_score"] = 0.0
+        shoulder_diff = abs(left_shoulder[1] - right_shoulder[1])
+        hip_diff = abs(left_hip[1] - right_hip[1])
+        asymmetry = (shoulder_diff + hip_diff) / 2
+        symmetry = max(0, 100 - asymmetry * 500)
+        result["symmetry_score"] = round(float(symmetry), 1)
 
         return result
 
@@ -272,11 +304,17 @@ class PoseAnalyzer:
         """返回重心轨迹"""
         return list(self.center_of_mass_history)
 
+    def set_smoothing(self, enabled: bool):
+        """开关 One-Euro 关键点平滑（复用分析器时按会话选项重新配置）"""
+        self.smoother = OneEuroFilter() if enabled else None
+
     def reset(self):
         """重置状态"""
         self.keypoint_history.clear()
         self.center_of_mass_history.clear()
         self.frame_count = 0
+        if self.smoother is not None:
+            self.smoother.reset()
 
     def close(self):
         """释放资源"""
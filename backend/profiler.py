@@ -0,0 +1,142 @@
+"""
+Sport Vision — 会话采样分析模块
+运行中按需挂载到单个流水线：记录各阶段耗时并采样 Python 调用栈，输出火焰图格式
+未挂载时流水线只做一次 None 判断
+"""
+
+import os
+import sys
+import time
+import threading
+from collections import Counter
+from typing import Optional
+
+
+class SessionProfiler:
+    """
+    单个流水线的采样分析器
+    流水线在处理帧时调用 begin / end 标记阶段；采样线程只在阶段进行中采集该线程的调用栈，
+    因此同一事件循环线程上的其它会话不会混入
+    """
+
+    # 流水线阶段（顺序即报告顺序）
+    STAGES = ("decode", "detect", "analyze", "render", "encode")
+
+    def __init__(self, interval: float = 0.005, max_depth: int = 64,
+                 max_trace_events: int = 20000):
+        """
+        Args:
+            interval: 调用栈采样间隔（秒）
+            max_depth: 单个调用栈保留的最大深度
+            max_trace_events: 阶段时间线保留的最大事件数
+        """
+        self.interval = interval
+        self.max_depth = max_depth
+        self.max_trace_events = max_trace_events
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.stage_stats = {stage: [0, 0.0, 0.0] for stage in self.STAGES}  # 次数, 总耗时, 最大耗时
+        self.trace: list = []
+        self.started_at = 0.0
+        self.stopped_at = 0.0
+        self._stage: Optional[str] = None
+        self._thread_id: Optional[int] = None
+        self._stop_event = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+
+    # ---- 流水线侧调用 ----
+    def begin(self, stage: str) -> float:
+        self._thread_id = threading.get_ident()
+        self._stage = stage
+        return time.perf_counter()
+
+    def end(self, stage: str, start: float):
+        now = time.perf_counter()
+        self._stage = None
+        duration = now - start
+        stats = self.stage_stats.setdefault(stage, [0, 0.0, 0.0])
+        stats[0] += 1
+        stats[1] += duration
+        if duration > stats[2]:
+            stats[2] = duration
+        if len(self.trace) < self.max_trace_events:
+            self.trace.append((stage, start, duration))
+
+    # ---- 采样 ----
+    def start(self):
+        self.started_at = time.perf_counter()
+        self._stop_event.clear()
+        self._sampler = threading.Thread(target=self._sample_loop, name="session-profiler",
+                                         daemon=True)
+        self._sampler.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._sampler is not None:
+            self._sampler.join()
+            self._sampler = None
+        self.stopped_at = time.perf_counter()
+
+    def _sample_loop(self):
+        while not self._stop_event.wait(self.interval):
+            stage, thread_id = self._stage, self._thread_id
+            if stage is None or thread_id is None:
+                continue
+            frame = sys._current_frames().get(thread_id)
+            if frame is None:
+                continue
+            names = []
+            while frame is not None and len(names) < self.max_depth:
+                code = frame.f_code
+                names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:"
+                             f"{code.co_firstlineno})")
+                frame = frame.f_back
+            names.append(f"stage:{stage}")
+            self.stacks[";".join(reversed(names))] += 1
+            self.samples += 1
+
+    # ---- 输出 ----
+    def collapsed(self) -> str:
+        """折叠调用栈（flamegraph.pl / speedscope / inferno 可直接读取）"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def chrome_trace(self) -> dict:
+        """阶段时间线（Chrome trace event 格式，可在 Perfetto / chrome://tracing 打开）"""
+        return {
+            "traceEvents": [
+                {
+                    "name": stage,
+                    "ph": "X",
+                    "ts": round((start - self.started_at) * 1e6, 1),
+                    "dur": round(duration * 1e6, 1),
+                    "pid": os.getpid(),
+                    "tid": 1,
+                }
+                for stage, start, duration in self.trace
+            ],
+            "displayTimeUnit": "ms",
+        }
+
+    def summary(self) -> dict:
+        elapsed = (self.stopped_at or time.perf_counter()) - self.started_at
+        stages = {}
+        for stage, (count, total, peak) in self.stage_stats.items():
+            if count == 0:
+                continue
+            stages[stage] = {
+                "count": count,
+                "total_ms": round(total * 1000, 2),
+                "mean_ms": round(total / count * 1000, 3),
+                "max_ms": round(peak * 1000, 3),
+                "share": round(total / elapsed, 4) if elapsed > 0 else 0.0,
+            }
+        return {
+            "duration_seconds": round(elapsed, 3),
+            "samples": self.samples,
+            "interval_ms": self.interval * 1000,
+            "stages": stages,
+            "top_stacks": [
+                {"stack": stack.split(";")[-1], "stage": stack.split(";")[0], "samples": count}
+                for stack, count in self.stacks.most_common(10)
+            ],
+        }
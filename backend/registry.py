@@ -0,0 +1,359 @@
+"""
+Sport Vision — 会话注册表模块
+多 worker 部署时共享会话与任务状态：会话归属（worker 亲和）、跨 worker 控制命令、任务结果索引
+"""
+
+import os
+import json
+import time
+import socket
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Optional
+
+from backend.jobs import Job
+
+
+def default_worker_id() -> str:
+    """当前 worker 标识（可用 SPORT_VISION_WORKER_ID 覆盖）"""
+    return os.environ.get("SPORT_VISION_WORKER_ID") or f"{socket.gethostname()}-{os.getpid()}"
+
+
+class SessionRegistry(ABC):
+    """
+    会话注册表接口
+    会话和任务记录都带 worker_id：只有所属 worker 持有流水线 / 任务，
+    其它 worker 通过 send_command 投递命令，由所属 worker 在 poll_commands 中取走执行
+    """
+
+    def __init__(self, worker_id: Optional[str] = None, heartbeat_ttl: float = 30.0):
+        self.worker_id = worker_id or default_worker_id()
+        self.heartbeat_ttl = heartbeat_ttl
+
+    # ---- 会话 ----
+    @abstractmethod
+    def register_session(self, session_id: str, info: dict):
+        ...
+
+    @abstractmethod
+    def unregister_session(self, session_id: str):
+        ...
+
+    @abstractmethod
+    def get_session(self, session_id: str) -> Optional[dict]:
+        ...
+
+    @abstractmethod
+    def list_sessions(self) -> list:
+        ...
+
+    # ---- 任务 ----
+    @abstractmethod
+    def save_job(self, job: dict):
+        ...
+
+    @abstractmethod
+    def get_job(self, job_id: str) -> Optional[dict]:
+        ...
+
+    @abstractmethod
+    def list_jobs(self, limit: int = 500) -> list:
+        ...
+
+    # ---- 跨 worker 命令 ----
+    @abstractmethod
+    def send_command(self, target_id: str, command: str, worker_id: str):
+        ...
+
+    @abstractmethod
+    def poll_commands(self) -> list:
+        """取走发给本 worker 的命令，返回 [(target_id, command)]"""
+
+    # ---- worker 存活 ----
+    @abstractmethod
+    def heartbeat(self):
+        ...
+
+    @abstractmethod
+    def live_workers(self) -> list:
+        ...
+
+    def close(self):
+        pass
+
+
+class MemorySessionRegistry(SessionRegistry):
+    """单进程实现（不跨 worker 共享）"""
+
+    def __init__(self, worker_id: Optional[str] = None, heartbeat_ttl: float = 30.0):
+        super().__init__(worker_id, heartbeat_ttl)
+        self.sessions: dict = {}
+        self.jobs: dict = {}
+        self.commands: list = []
+        self.workers: dict = {}
+        self._lock = threading.Lock()
+
+    def register_session(self, session_id: str, info: dict):
+        now = time.time()
+        with self._lock:
+            self.sessions[session_id] = {
+                **info,
+                "session_id": session_id,
+                "worker_id": self.worker_id,
+                "started_at": now,
+                "updated_at": now,
+            }
+
+    def unregister_session(self, session_id: str):
+        with self._lock:
+            self.sessions.pop(session_id, None)
+
+    def get_session(self, session_id: str) -> Optional[dict]:
+        session = self.sessions.get(session_id)
+        return dict(session) if session else None
+
+    def list_sessions(self) -> list:
+        return [dict(s) for s in self.sessions.values()]
+
+    def save_job(self, job: dict):
+        with self._lock:
+            self.jobs[job["id"]] = {**job, "worker_id": self.worker_id}
+
+    def get_job(self, job_id: str) -> Optional[dict]:
+        job = self.jobs.get(job_id)
+        return dict(job) if job else None
+
+    def list_jobs(self, limit: int = 500) -> list:
+        jobs = sorted(self.jobs.values(), key=lambda j: j["created_at"], reverse=True)
+        return [dict(j) for j in jobs[:limit]]
+
+    def send_command(self, target_id: str, command: str, worker_id: str):
+        with self._lock:
+            self.commands.append((worker_id, target_id, command))
+
+    def poll_commands(self) -> list:
+        with self._lock:
+            mine = [(t, c) for w, t, c in self.commands if w == self.worker_id]
+            self.commands = [cmd for cmd in self.commands if cmd[0] != self.worker_id]
+        return mine
+
+    def heartbeat(self):
+        self.workers[self.worker_id] = time.time()
+
+    def live_workers(self) -> list:
+        cutoff = time.time() - self.heartbeat_ttl
+        return [w for w, seen in self.workers.items() if seen >= cutoff]
+
+
+class SQLiteSessionRegistry(SessionRegistry):
+    """
+    基于 SQLite 文件的实现：同一主机（或共享卷）上的多个 worker 共用一个数据库
+    心跳超时的 worker 视为已退出，其会话不再列出，未完成的任务标记为失败
+    """
+
+    def __init__(self, db_path: Path, worker_id: Optional[str] = None,
+                 heartbeat_ttl: float = 30.0):
+        super().__init__(worker_id, heartbeat_ttl)
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._init_schema()
+
+    def _connect(self) -> sqlite3.Connection:
+        """每个线程复用一个连接"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), timeout=10)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _init_schema(self):
+        conn = self._connect()
+        with conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS sessions (
+                    session_id TEXT PRIMARY KEY,
+                    worker_id TEXT NOT NULL,
+                    info TEXT NOT NULL,
+                    started_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    worker_id TEXT NOT NULL,
+                    data TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS commands (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    worker_id TEXT NOT NULL,
+                    target_id TEXT NOT NULL,
+                    command TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS workers (
+                    worker_id TEXT PRIMARY KEY,
+                    pid INTEGER,
+                    heartbeat_at REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_commands_worker ON commands (worker_id)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_created ON jobs (created_at)")
+
+    def register_session(self, session_id: str, info: dict):
+        now = time.time()
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO sessions (session_id, worker_id, info, started_at, updated_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (session_id, self.worker_id, json.dumps(info, ensure_ascii=False), now, now),
+            )
+
+    def unregister_session(self, session_id: str):
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+    @staticmethod
+    def _session_row(row) -> dict:
+        return {
+            **json.loads(row["info"]),
+            "session_id": row["session_id"],
+            "worker_id": row["worker_id"],
+            "started_at": row["started_at"],
+            "updated_at": row["updated_at"],
+        }
+
+    def get_session(self, session_id: str) -> Optional[dict]:
+        row = self._connect().execute(
+            "SELECT * FROM sessions WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        return self._session_row(row) if row else None
+
+    def list_sessions(self) -> list:
+        cutoff = time.time() - self.heartbeat_ttl
+        rows = self._connect().execute(
+            "SELECT s.* FROM sessions s JOIN workers w ON w.worker_id = s.worker_id"
+            " WHERE w.heartbeat_at >= ? ORDER BY s.started_at",
+            (cutoff,),
+        ).fetchall()
+        return [self._session_row(row) for row in rows]
+
+    def save_job(self, job: dict):
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO jobs (id, worker_id, data, created_at) VALUES (?, ?, ?, ?)",
+                (job["id"], self.worker_id, json.dumps(job, ensure_ascii=False), job["created_at"]),
+            )
+
+    def get_job(self, job_id: str) -> Optional[dict]:
+        row = self._connect().execute(
+            "SELECT worker_id, data FROM jobs WHERE id = ?", (job_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        return {**json.loads(row["data"]), "worker_id": row["worker_id"]}
+
+    def list_jobs(self, limit: int = 500) -> list:
+        rows = self._connect().execute(
+            "SELECT worker_id, data FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)
+        ).fetchall()
+        return [{**json.loads(row["data"]), "worker_id": row["worker_id"]} for row in rows]
+
+    def send_command(self, target_id: str, command: str, worker_id: str):
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT INTO commands (worker_id, target_id, command, created_at) VALUES (?, ?, ?, ?)",
+                (worker_id, target_id, command, time.time()),
+            )
+
+    def poll_commands(self) -> list:
+        conn = self._connect()
+        with conn:
+            rows = conn.execute(
+                "SELECT id, target_id, command FROM commands WHERE worker_id = ? ORDER BY id",
+                (self.worker_id,),
+            ).fetchall()
+            if rows:
+                conn.execute(
+                    f"DELETE FROM commands WHERE id IN ({','.join('?' * len(rows))})",
+                    [row["id"] for row in rows],
+                )
+        return [(row["target_id"], row["command"]) for row in rows]
+
+    def heartbeat(self):
+        """刷新本 worker 心跳，并清理已失联 worker 遗留的会话、命令和未完成任务"""
+        now = time.time()
+        cutoff = now - self.heartbeat_ttl
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO workers (worker_id, pid, heartbeat_at) VALUES (?, ?, ?)",
+                (self.worker_id, os.getpid(), now),
+            )
+            dead = [row["worker_id"] for row in conn.execute(
+                "SELECT worker_id FROM workers WHERE heartbeat_at < ?", (cutoff,)
+            )]
+            for worker_id in dead:
+                conn.execute("DELETE FROM sessions WHERE worker_id = ?", (worker_id,))
+                conn.execute("DELETE FROM commands WHERE worker_id = ?", (worker_id,))
+                conn.execute("DELETE FROM workers WHERE worker_id = ?", (worker_id,))
+                self._expire_jobs(conn, worker_id, now)
+
+    @staticmethod
+    def _expire_jobs(conn: sqlite3.Connection, worker_id: str, now: float):
+        """worker 已退出：其排队中 / 运行中的任务不会再完成，标记为失败（记录保留供查询）"""
+        rows = conn.execute(
+            "SELECT id, data FROM jobs WHERE worker_id = ?", (worker_id,)
+        ).fetchall()
+        for row in rows:
+            job = json.loads(row["data"])
+            if job.get("status") not in (Job.QUEUED, Job.RUNNING):
+                continue
+            job.update(status=Job.FAILED, error=f"Worker exited: {worker_id}", finished_at=now)
+            conn.execute(
+                "UPDATE jobs SET data = ? WHERE id = ?",
+                (json.dumps(job, ensure_ascii=False), row["id"]),
+            )
+
+    def live_workers(self) -> list:
+        cutoff = time.time() - self.heartbeat_ttl
+        rows = self._connect().execute(
+            "SELECT worker_id FROM workers WHERE heartbeat_at >= ?", (cutoff,)
+        ).fetchall()
+        return [row["worker_id"] for row in rows]
+
+    def close(self):
+        """worker 正常退出：移除自己的会话和心跳，未完成的任务标记为失败"""
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM sessions WHERE worker_id = ?", (self.worker_id,))
+            conn.execute("DELETE FROM workers WHERE worker_id = ?", (self.worker_id,))
+            self._expire_jobs(conn, self.worker_id, time.time())
+
+
+def create_registry(url: str, worker_id: Optional[str] = None) -> SessionRegistry:
+    """
+    按配置创建注册表
+        memory               — 单进程
+        sqlite:///path/to.db — 多 worker 共享（同主机或共享卷）
+    """
+    if url == "memory":
+        return MemorySessionRegistry(worker_id)
+    if url.startswith("sqlite:///"):
+        return SQLiteSessionRegistry(Path(url[len("sqlite:///"):]), worker_id)
+    raise ValueError(f"Unknown session registry: {url}")
@@ -0,0 +1,183 @@
+"""
+Sport Vision — 元数据序列化模块
+逐帧元数据的快速编码：可选 orjson / msgpack（未安装时回退标准库 json）；
+紧凑模式下关键点名称、动作元数据等静态信息每个会话只发送一次，坐标按定点精度量化为整数
+"""
+
+import json
+from typing import Optional, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+from backend.action_recognizer import ActionRecognizer
+from backend.archive import ANGLE_NAMES, BIOMECHANICS_NAMES, KEYPOINT_IDS, KEYPOINT_NAMES
+
+# 紧凑帧格式版本（字段布局变化时递增）
+SCHEMA_VERSION = 1
+
+# 定点量化倍率：传输整数 / 倍率 = 原值
+SCALES = {
+    "xy": 10,           # 像素坐标 0.1 px
+    "z": 1000,
+    "visibility": 100,
+    "angle": 10,        # 关节角度 0.1°
+    "metric": 10,       # 生物力学指标
+    "confidence": 100,
+}
+
+ENCODINGS = ("json", "msgpack")
+
+_KP_ROW = {idx: row for row, idx in enumerate(KEYPOINT_IDS)}
+
+
+def available() -> dict:
+    """当前环境可用的编码实现"""
+    return {
+        "json": "orjson" if orjson is not None else "json",
+        "msgpack": msgpack is not None,
+    }
+
+
+def _default(obj):
+    """numpy 标量 / 数组等非内置类型"""
+    if hasattr(obj, "tolist"):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not serializable")
+
+
+def dumps(obj) -> str:
+    """JSON 文本（orjson 可用时使用 orjson；回退格式与 WebSocket.send_json 一致）"""
+    if orjson is not None:
+        return orjson.dumps(
+            obj, default=_default,
+            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS,
+        ).decode("utf-8")
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=_default)
+
+
+def _quantize(value: Optional[float], scale: int) -> Optional[int]:
+    return None if value is None else int(round(value * scale))
+
+
+class FrameSerializer:
+    """
+    单个会话的消息编码器
+
+    encoding:
+        json    — 文本帧（orjson 或标准库 json）
+        msgpack — 二进制帧
+    compact:
+        frame 消息改为 {"type": "f", "d": {...}}，首帧前先发送一次 schema 消息；
+        其它消息保持原样
+    """
+
+    def __init__(self, encoding: str = "json", compact: bool = False):
+        if encoding not in ENCODINGS:
+            raise ValueError(f"Unknown encoding: {encoding}")
+        if encoding == "msgpack" and msgpack is None:
+            raise ValueError("msgpack encoding is not available (pip install msgpack)")
+        self.encoding = encoding
+        self.compact = compact
+        self._schema_sent = False
+        self._last_counts: Optional[dict] = None
+
+    def dumps(self, message: dict) -> Union[str, bytes]:
+        if self.encoding == "msgpack":
+            return msgpack.packb(message, default=_default, use_bin_type=True)
+        return dumps(message)
+
+    def encode(self, message: dict) -> list:
+        """编码一条消息，返回待发送的负载列表（紧凑模式的首帧前附带 schema）"""
+        if not self.compact or message.get("type") != "frame":
+            return [self.dumps(message)]
+        payloads = []
+        data = message["data"]
+        if not self._schema_sent:
+            payloads.append(self.dumps(self.schema(data)))
+            self._schema_sent = True
+        payloads.append(self.dumps({"type": "f", "d": self.compact_frame(data)}))
+        return payloads
+
+    @staticmethod
+    def schema(data: dict) -> dict:
+        """会话内不变的信息：视频参数、关键点 / 指标顺序、动作元数据、量化倍率"""
+        return {
+            "type": "schema",
+            "version": SCHEMA_VERSION,
+            "total_frames": data["total_frames"],
+            "fps": data["fps"],
+            "width": data["width"],
+            "height": data["height"],
+            "keypoints": [{"id": idx, "name": name}
+                          for idx, name in zip(KEYPOINT_IDS, KEYPOINT_NAMES)],
+            "joint_angles": list(ANGLE_NAMES),
+            "biomechanics": list(BIOMECHANICS_NAMES),
+            "actions": ActionRecognizer.ACTIONS,
+            "scales": SCALES,
+        }
+
+    def compact_frame(self, data: dict) -> dict:
+        """
+        紧凑帧：
+            n / t / p — 帧号、时间戳、进度
+            img       — JPEG base64
+            kp        — 关键点 [x, y, z, visibility] × 13 展平（schema 顺序，缺失为 null）
+            ang / bio — 关节角度 / 生物力学指标（schema 顺序）
+            com, conf — 重心、姿态置信度
+            act       — [动作, 置信度, 是否新动作]
+            cnt       — 动作计数（仅在变化时出现）
+            heatmap, technique — 原样透传
+        """
+        frame = {
+            "n": data["frame_number"],
+            "t": data["timestamp"],
+            "p": data["progress"],
+        }
+        if data.get("frame_base64"):
+            frame["img"] = data["frame_base64"]
+
+        pose = data.get("pose")
+        if pose:
+            xy, z, vis = SCALES["xy"], SCALES["z"], SCALES["visibility"]
+            keypoints: list = [None] * (len(KEYPOINT_IDS) * 4)
+            for kp in pose["keypoints"]:
+                row = _KP_ROW.get(kp["id"])
+                if row is None:
+                    continue
+                base = row * 4
+                keypoints[base] = int(round(kp["x"] * xy))
+                keypoints[base + 1] = int(round(kp["y"] * xy))
+                keypoints[base + 2] = int(round(kp.get("z", 0.0) * z))
+                keypoints[base + 3] = int(round(kp.get("visibility", 1.0) * vis))
+            frame["kp"] = keypoints
+            angles = pose["joint_angles"]
+            frame["ang"] = [_quantize(angles.get(name), SCALES["angle"]) for name in ANGLE_NAMES]
+            metrics = pose["biomechanics"]
+            frame["bio"] = [_quantize(metrics.get(name), SCALES["metric"])
+                            for name in BIOMECHANICS_NAMES]
+            com = pose.get("center_of_mass")
+            frame["com"] = [_quantize(com["x"], xy), _quantize(com["y"], xy)] if com else None
+            frame["conf"] = _quantize(pose["confidence"], SCALES["confidence"])
+
+        action = data.get("action")
+        if action:
+            frame["act"] = [action["action"],
+                            _quantize(action["confidence"], SCALES["confidence"]),
+                            1 if action["is_new_action"] else 0]
+            counts = action.get("action_counts")
+            if counts is not None and counts != self._last_counts:
+                frame["cnt"] = counts
+                self._last_counts = counts
+
+        for key in ("heatmap", "technique"):
+            if key in data:
+                frame[key] = data[key]
+        return frame
@@ -0,0 +1,73 @@
+"""
+Sport Vision — 关键点平滑模块
+向量化 One-Euro 滤波与关键帧间线性插值
+"""
+
+import math
+import numpy as np
+from typing import Optional
+
+
+class OneEuroFilter:
+    """
+    One-Euro 自适应低通滤波器（对整个关键点数组同时滤波）
+    慢速时强平滑去抖动，快速运动时提高截止频率减少滞后
+    """
+
+    def __init__(self, min_cutoff: float = 1.0, beta: float = 10.0,
+                 d_cutoff: float = 1.0, reset_gap: float = 0.5):
+        """
+        Args:
+            min_cutoff: 最小截止频率（Hz），越小越平滑
+            beta: 速度系数，越大快速运动时滞后越小
+            d_cutoff: 速度估计的截止频率（Hz）
+            reset_gap: 两次输入间隔超过该值（秒）时重置状态
+        """
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.reset_gap = reset_gap
+        self._x: Optional[np.ndarray] = None
+        self._dx: Optional[np.ndarray] = None
+        self._t: Optional[float] = None
+
+    @staticmethod
+    def _alpha(dt: float, cutoff):
+        tau = 1.0 / (2 * math.pi * cutoff)
+        return 1.0 / (1.0 + tau / dt)
+
+    def __call__(self, x: np.ndarray, t: float) -> np.ndarray:
+        x = np.asarray(x, dtype=np.float64)
+        if self._x is None or t - self._t > self.reset_gap or t <= self._t:
+            self._x = x.copy()
+            self._dx = np.zeros_like(x)
+            self._t = t
+            return x
+
+        dt = t - self._t
+        dx = (x - self._x) / dt
+        a_d = self._alpha(dt, self.d_cutoff)
+        dx_hat = a_d * dx + (1 - a_d) * self._dx
+
+        cutoff = self.min_cutoff + self.beta * np.abs(dx_hat)
+        a = self._alpha(dt, cutoff)
+        x_hat = a * x + (1 - a) * self._x
+
+        self._x, self._dx, self._t = x_hat, dx_hat, t
+        return x_hat
+
+    def reset(self):
+        self._x = None
+        self._dx = None
+        self._t = None
+
+
+def interpolate_landmarks(prev: np.ndarray, curr: np.ndarray, ratio: float) -> np.ndarray:
+    """两次推理结果之间线性插值，ratio ∈ (0, 1)"""
+    return prev + (curr - prev) * ratio
+
+
+def landmark_motion(prev: np.ndarray, curr: np.ndarray, frames: int) -> float:
+    """两次推理之间关键点的最大平均位移（归一化坐标 / 帧）"""
+    disp = np.linalg.norm(curr[:, :2] - prev[:, :2], axis=1)
+    return float(disp.max()) / max(frames, 1)
@@ -0,0 +1,424 @@
+"""
+Sport Vision — 技术动作比对模块
+动作触发前后的关节角度序列与参考动作模板库比对：
+LB_Keogh 下界在整个模板库上向量化计算并剪枝，只对剩余候选做带约束的 DTW
+
+    python -m backend.technique build traces/*.kpa --out data/templates.npz
+"""
+
+import sys
+import time
+import heapq
+import argparse
+import threading
+import numpy as np
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+# 关节顺序与 PoseAnalyzer.JOINT_ANGLES 一致（不导入视觉栈）
+from backend.archive import ANGLE_NAMES, KeypointArchive
+
+
+def angle_vector(joint_angles: dict) -> np.ndarray:
+    """关节角度字典 → (J,) 向量，缺失为 NaN"""
+    return np.array([joint_angles.get(name, np.nan) for name in ANGLE_NAMES],
+                    dtype=np.float32)
+
+
+def resample_window(timestamps: np.ndarray, angles: np.ndarray, center: float,
+                    pre: float, post: float, samples: int) -> Optional[np.ndarray]:
+    """
+    以 center 为触发时刻，截取 [center - pre, center + post] 并线性重采样为定长序列
+
+    Args:
+        timestamps: (T,) 单调递增的帧时间
+        angles: (T, J) 关节角度，缺失为 NaN
+    Returns:
+        (samples, J) float32；某个关节有效样本不足 2 个时返回 None
+    """
+    t = center + np.linspace(-pre, post, samples)
+    window = np.empty((samples, angles.shape[1]), dtype=np.float32)
+    for j in range(angles.shape[1]):
+        valid = ~np.isnan(angles[:, j])
+        if np.count_nonzero(valid) < 2:
+            return None
+        window[:, j] = np.interp(t, timestamps[valid], angles[valid, j])
+    return window
+
+
+def envelope(series: np.ndarray, radius: int) -> tuple:
+    """LB_Keogh 包络：沿时间轴 ±radius 窗口内的最大 / 最小值，(N, L, J) → 两个 (N, L, J)"""
+    length = series.shape[1]
+    padded = np.pad(series, ((0, 0), (radius, radius), (0, 0)), mode="edge")
+    upper = series.copy()
+    lower = series.copy()
+    for shift in range(2 * radius + 1):
+        window = padded[:, shift:shift + length]
+        np.maximum(upper, window, out=upper)
+        np.minimum(lower, window, out=lower)
+    return upper, lower
+
+
+def banded_dtw(query: np.ndarray, candidates: np.ndarray, radius: int,
+               abandon: float = np.inf) -> tuple:
+    """
+    一批候选上的带约束 DTW（Sakoe-Chiba 带宽 radius），逐格计算在候选维向量化
+    当所有候选在某一行的带内最小值都超过 abandon 时提前放弃
+
+    Args:
+        query: (L, J)
+        candidates: (B, L, J)
+    Returns:
+        (distances (B,), 累积代价矩阵 (B, L + 1, L + 1))
+    """
+    batch, length = candidates.shape[0], candidates.shape[1]
+    # 只计算带内逐点代价：band_cost[:, d + radius, i] = ‖query[i] - candidates[:, i + d]‖²
+    # （关节维平方欧氏距离，即多维依赖 DTW）
+    band_cost = np.full((batch, 2 * radius + 1, length), np.inf, dtype=np.float64)
+    for d in range(-radius, radius + 1):
+        lo, hi = max(0, -d), min(length, length - d)
+        diff = query[None, lo:hi] - candidates[:, lo + d:hi + d]
+        band_cost[:, d + radius, lo:hi] = np.einsum("bij,bij->bi", diff, diff)
+
+    acc = np.full((batch, length + 1, length + 1), np.inf, dtype=np.float64)
+    acc[:, 0, 0] = 0.0
+    for i in range(1, length + 1):
+        lo = max(1, i - radius)
+        hi = min(length, i + radius)
+        # 对角与上方前驱可整段向量化，左侧前驱需逐格递推
+        prev = np.minimum(acc[:, i - 1, lo - 1:hi], acc[:, i - 1, lo:hi + 1])
+        row = acc[:, i]
+        for j in range(lo, hi + 1):
+            row[:, j] = band_cost[:, j - i + radius, i - 1] \
+                + np.minimum(prev[:, j - lo], row[:, j - 1])
+        if abandon < np.inf and row[:, lo:hi + 1].min() >= abandon:
+            return np.full(batch, np.inf), acc
+    return acc[:, length, length].copy(), acc
+
+
+def warping_path(acc: np.ndarray) -> list:
+    """由单个累积代价矩阵 (L + 1, L + 1) 回溯对齐路径 [(i, j), ...]（0 起始）"""
+    i = j = acc.shape[0] - 1
+    path = []
+    while i > 0 and j > 0:
+        path.append((i - 1, j - 1))
+        step = int(np.argmin((acc[i - 1, j - 1], acc[i - 1, j], acc[i, j - 1])))
+        if step == 0:
+            i, j = i - 1, j - 1
+        elif step == 1:
+            i -= 1
+        else:
+            j -= 1
+    path.reverse()
+    return path
+
+
+class TemplateLibrary:
+    """
+    参考动作模板库（只读，可在会话之间共享）
+    所有模板重采样为同一长度 (N, L, J)；包络在加载时计算一次并缓存
+    """
+
+    def __init__(self, series: np.ndarray, actions: list, names: list,
+                 pre: float = 0.8, post: float = 0.4, band: float = 0.1,
+                 workers: int = 2):
+        """
+        Args:
+            series: (N, L, J) 关节角度模板（度）
+            actions: 每个模板的动作类型
+            names: 每个模板的名称（来源）
+            pre, post: 模板覆盖的触发前 / 后时长（秒），比对窗口与之一致
+            band: DTW 带宽占序列长度的比例
+            workers: 后台比对线程数
+        """
+        self.series = np.ascontiguousarray(series, dtype=np.float32)
+        if self.series.ndim != 3 or self.series.shape[2] != len(ANGLE_NAMES):
+            raise ValueError(f"Template series must be (N, L, {len(ANGLE_NAMES)}), "
+                             f"got {self.series.shape}")
+        self.actions = np.asarray(actions, dtype=str)
+        self.names = np.asarray(names, dtype=str)
+        self.pre = pre
+        self.post = post
+        self.length = self.series.shape[1]
+        self.radius = max(1, int(round(band * self.length)))
+        self.upper, self.lower = envelope(self.series, self.radius)
+        self._by_action = {
+            action: np.flatnonzero(self.actions == action)
+            for action in np.unique(self.actions)
+        }
+        self._all = np.arange(len(self.series))
+        self.workers = workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.series)
+
+    @classmethod
+    def load(cls, path: Path, **kwargs) -> "TemplateLibrary":
+        with np.load(path, allow_pickle=False) as data:
+            return cls(data["series"], list(data["actions"]), list(data["names"]),
+                       pre=float(data["pre"]), post=float(data["post"]), **kwargs)
+
+    def save(self, path: Path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "wb") as f:
+            np.savez_compressed(f, series=self.series, actions=self.actions, names=self.names,
+                                pre=self.pre, post=self.post)
+
+    def counts(self) -> dict:
+        return {str(action): len(idx) for action, idx in self._by_action.items()}
+
+    def match(self, query: np.ndarray, action: Optional[str] = None, k: int = 3,
+              batch_size: int = 16, max_batch_size: int = 512) -> dict:
+        """
+        查找与 query 最接近的 k 个模板
+
+        1. LB_Keogh 下界：一次向量化计算所有候选
+        2. 候选按下界升序分批做带约束 DTW，下界不小于当前第 k 名距离的候选直接剪除；
+           首批较小以尽快得到剪枝阈值，之后批量逐次翻倍以摊薄逐格递推的开销
+
+        Returns:
+            {"matches": [{name, action, distance, rms}...],
+             "deviations": {关节: 平均偏差（度，正值 = 角度大于模板）},
+             "candidates": 候选数, "computed": 实际计算 DTW 的模板数, "elapsed_ms"}
+        """
+        start = time.perf_counter()
+        index = self._all if action is None else self._by_action.get(action)
+        if index is None or len(index) == 0:
+            return {"matches": [], "deviations": {}, "candidates": 0, "computed": 0,
+                    "elapsed_ms": 0.0}
+        query = np.asarray(query, dtype=np.float32)
+
+        lower_bound = (np.maximum(query - self.upper[index], 0) ** 2
+                       + np.maximum(self.lower[index] - query, 0) ** 2).sum(axis=(1, 2))
+        order = np.argsort(lower_bound, kind="stable")
+
+        best: list = []  # 最大堆（取负）：(-距离, 模板下标)
+        threshold = np.inf
+        computed = 0
+        offset = 0
+        while offset < len(order):
+            batch = order[offset:offset + batch_size]
+            offset += len(batch)
+            batch_size = min(batch_size * 2, max_batch_size)
+            if lower_bound[batch[0]] >= threshold:
+                break
+            batch = batch[lower_bound[batch] < threshold]
+            distances, _ = banded_dtw(query, self.series[index[batch]], self.radius,
+                                      threshold)
+            computed += len(batch)
+            for pos, distance in zip(batch, distances):
+                if len(best) < k:
+                    heapq.heappush(best, (-distance, int(index[pos])))
+                elif distance < -best[0][0]:
+                    heapq.heapreplace(best, (-distance, int(index[pos])))
+            if len(best) == k:
+                threshold = -best[0][0]
+
+        ranked = sorted((-neg, i) for neg, i in best if np.isfinite(neg))
+        matches = [
+            {
+                "name": str(self.names[i]),
+                "action": str(self.actions[i]),
+                "distance": round(float(distance), 1),
+                # 按序列长度归一化的均方根角度差（度）
+                "rms": round(float(np.sqrt(distance / self.length)), 2),
+            }
+            for distance, i in ranked
+        ]
+        deviations = self.deviations(query, ranked[0][1]) if ranked else {}
+        return {
+            "matches": matches,
+            "deviations": deviations,
+            "candidates": int(len(index)),
+            "computed": computed,
+            "elapsed_ms": round((time.perf_counter() - start) * 1000, 2),
+        }
+
+    def deviations(self, query: np.ndarray, template: int) -> dict:
+        """沿 DTW 对齐路径计算各关节相对模板的平均偏差"""
+        reference = self.series[template]
+        _, acc = banded_dtw(query, reference[None], self.radius)
+        path = warping_path(acc[0])
+        rows = np.array([i for i, _ in path])
+        cols = np.array([j for _, j in path])
+        diff = (query[rows] - reference[cols]).mean(axis=0)
+        return {name: round(float(value), 1) for name, value in zip(ANGLE_NAMES, diff)}
+
+    def submit(self, query: np.ndarray, action: Optional[str] = None, k: int = 3) -> Future:
+        """在后台线程中比对（线程池首次使用时创建，所有会话共享）"""
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                                        thread_name_prefix="technique")
+        return self._executor.submit(self.match, query, action, k)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+class TechniqueMatcher:
+    """
+    单个会话的比对调度
+    缓存最近的关节角度；动作触发后等到触发后 post 秒的帧到达，截取窗口提交到后台比对，
+    处理循环只在每帧轮询已完成的结果，不等待比对
+    """
+
+    # 相邻两帧时间差超过该值（秒）或时间回退时视为跳转，丢弃缓存与待比对动作
+    MAX_GAP = 0.5
+
+    def __init__(self, library: TemplateLibrary, fps: float, k: int = 3):
+        self.library = library
+        self.k = k
+        fps = fps if fps > 0 else 30.0
+        self._timestamps: deque = deque(maxlen=int((library.pre + library.post + 1.0) * fps))
+        self._angles: deque = deque(maxlen=self._timestamps.maxlen)
+        self._waiting: list = []   # 等待触发后帧的动作事件
+        self._running: list = []   # (事件, Future)
+
+    def add_event(self, event: dict):
+        """登记新触发的动作（Pipeline.action_events 中的条目）"""
+        self._waiting.append(event)
+
+    def add_frame(self, timestamp: float, pose_result: Optional[dict]):
+        if self._timestamps:
+            gap = timestamp - self._timestamps[-1]
+            if gap <= 0 or gap > self.MAX_GAP:
+                self._timestamps.clear()
+                self._angles.clear()
+                self._waiting = [ev for ev in self._waiting if ev["timestamp"] >= timestamp]
+        if pose_result:
+            self._timestamps.append(timestamp)
+            self._angles.append(angle_vector(pose_result["joint_angles"]))
+
+        if self._waiting:
+            ready = [ev for ev in self._waiting
+                     if timestamp >= ev["timestamp"] + self.library.post]
+            if ready:
+                self._waiting = [ev for ev in self._waiting
+                                 if timestamp < ev["timestamp"] + self.library.post]
+                for event in ready:
+                    self._dispatch(event)
+
+    def _dispatch(self, event: dict):
+        if len(self._timestamps) < 2 \
+                or self._timestamps[0] > event["timestamp"] - self.library.pre + self.MAX_GAP:
+            return
+        query = resample_window(np.array(self._timestamps), np.array(self._angles),
+                                event["timestamp"], self.library.pre, self.library.post,
+                                self.library.length)
+        if query is not None:
+            self._running.append((event, self.library.submit(query, event["action"], self.k)))
+
+    def poll(self) -> list:
+        """取出已完成的比对结果，并把最佳匹配写入对应动作事件"""
+        if not self._running:
+            return []
+        results = []
+        running = []
+        for event, future in self._running:
+            if not future.done():
+                running.append((event, future))
+                continue
+            try:
+                result = future.result()
+            except Exception:
+                continue
+            if result["matches"]:
+                event["technique"] = {
+                    "template": result["matches"][0]["name"],
+                    "rms": result["matches"][0]["rms"],
+                    "deviations": result["deviations"],
+                }
+            results.append({
+                "frame": event["frame"],
+                "action": event["action"],
+                "timestamp": event["timestamp"],
+                **result,
+            })
+        self._running = running
+        return results
+
+    def finish(self, timeout: float = 5.0) -> list:
+        """视频结束：用已有帧比对剩余动作（窗口末端按最后一帧延伸），等待后台结果"""
+        waiting, self._waiting = self._waiting, []
+        for event in waiting:
+            self._dispatch(event)
+        deadline = time.monotonic() + timeout
+        for _, future in self._running:
+            try:
+                future.result(timeout=max(0.0, deadline - time.monotonic()))
+            except Exception:
+                pass
+        return self.poll()
+
+    def close(self):
+        for _, future in self._running:
+            future.cancel()
+        self._running = []
+        self._waiting = []
+
+
+# ============ 模板库构建 ============
+
+def build_library(archives: list, pre: float = 0.8, post: float = 0.4,
+                  samples: int = 32, actions: Optional[set] = None) -> TemplateLibrary:
+    """从关键点归档及其事件表截取每个动作前后的关节角度序列作为模板"""
+    series, labels, names = [], [], []
+    for path in archives:
+        archive = KeypointArchive(Path(path))
+        records = archive.records
+        present = ~np.isnan(records["confidence"])
+        timestamps = np.asarray(records["timestamp"][present], dtype=np.float64)
+        angles = np.asarray(records["joint_angles"][present], dtype=np.float32)
+        for event in archive.events:
+            if actions and event["action"] not in actions:
+                continue
+            t = event["timestamp"]
+            if len(timestamps) < 2 or timestamps[0] > t - pre or timestamps[-1] < t + post:
+                continue
+            window = resample_window(timestamps, angles, t, pre, post, samples)
+            if window is None:
+                continue
+            series.append(window)
+            labels.append(event["action"])
+            names.append(f"{Path(path).stem}:{event['frame']}")
+        archive.close()
+    if not series:
+        raise ValueError("No usable action events found in archives")
+    return TemplateLibrary(np.stack(series), labels, names, pre=pre, post=post)
+
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(prog="python -m backend.technique",
+                                     description="技术动作模板库")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    build = sub.add_parser("build", help="从关键点归档构建模板库")
+    build.add_argument("archives", nargs="+", type=Path)
+    build.add_argument("--out", type=Path, default=Path("data/templates.npz"))
+    build.add_argument("--pre", type=float, default=0.8, help="触发前时长（秒）")
+    build.add_argument("--post", type=float, default=0.4, help="触发后时长（秒）")
+    build.add_argument("--samples", type=int, default=32, help="模板重采样长度")
+    build.add_argument("--actions", nargs="*", help="只收录这些动作")
+
+    args = parser.parse_args(argv)
+    try:
+        library = build_library(args.archives, args.pre, args.post, args.samples,
+                                set(args.actions) if args.actions else None)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        sys.exit(1)
+    library.save(args.out)
+    print(f"{len(library)} templates → {args.out}  {library.counts()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+"""
+Sport Vision — 动作识别调参工具
+先把视频的关键点轨迹录制为归档（只推理一次），再在进程池中用参数网格批量回放并评分
+
+    python -m backend.tuning record demo_videos/*.mp4 --out traces/
+    python -m backend.tuning sweep --traces traces/ --labels labels/ --grid grid.json
+
+标注文件 labels/<视频名>.json：
+    [{"action": "forehand", "frame": 120}, {"action": "serve", "time": 8.4}, ...]
+
+参数网格 grid.json（省略的参数使用默认值）：
+    {"window_size": [10, 15], "debounce_frames": [8, 10, 12],
+     "thresholds": {"swing_wrist_speed": [6, 8, 10]}}
+"""
+
+import sys
+import json
+import time
+import argparse
+import itertools
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+from backend.action_recognizer import ActionRecognizer
+from backend.archive import ANGLE_NAMES, KeypointArchive, KeypointArchiveWriter
+
+
+# ============ 录制 ============
+
+def record(videos: list, out_dir: Path, skip_frames: int = 1,
+           pipeline_options: Optional[dict] = None) -> list:
+    """逐个视频运行离线分析，写出关键点归档（含流水线识别出的事件）"""
+    from backend.pipeline import Pipeline
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    written = []
+    for video in videos:
+        pipeline = Pipeline(**(pipeline_options or {}))
+        path = out_dir / f"{Path(video).stem}.kpa"
+        writer: Optional[KeypointArchiveWriter] = None
+        start = time.perf_counter()
+        try:
+            for result in pipeline.analyze_video(str(video), skip_frames=skip_frames):
+                if writer is None:
+                    writer = KeypointArchiveWriter(path, result["width"], result["height"],
+                                                   pipeline.video_fps)
+                writer.append(result["frame_number"], result["timestamp"], result["pose"])
+        finally:
+            if writer is not None:
+                writer.close(events=pipeline.action_events)
+            pipeline.close()
+        if writer is not None:
+            written.append(path)
+            print(f"{video}: {writer.frame_count} frames → {path} "
+                  f"({time.perf_counter() - start:.1f}s)")
+    return written
+
+
+# ============ 回放与评分 ============
+
+class Trace:
+    """一段录制轨迹：只保留检测到人体的帧（与实时识别的输入一致）"""
+
+    def __init__(self, archive_path: Path, labels: list):
+        archive = KeypointArchive(archive_path)
+        records = archive.records
+        present = ~np.isnan(records["confidence"])
+        self.name = archive_path.stem
+        self.frames = np.asarray(records["frame"][present], dtype=np.int64)
+        self.keypoints = np.asarray(records["keypoints"][present][:, :, :2], dtype=np.float64)
+        angles = records["joint_angles"][present]
+        self.joint_angles = {name: np.asarray(angles[:, i], dtype=np.float64)
+                             for i, name in enumerate(ANGLE_NAMES)}
+        self.fps = archive.fps
+        self.labels = self._normalize_labels(labels, archive.fps)
+
+    @staticmethod
+    def _normalize_labels(labels: list, fps: float) -> list:
+        events = []
+        for label in labels:
+            if "frame" in label:
+                frame = int(label["frame"])
+            else:
+                frame = int(round(float(label["time"]) * fps)) + 1
+            events.append((label["action"], frame))
+        return sorted(events, key=lambda ev: ev[1])
+
+
+def match_events(predicted: list, labels: list, tolerance: int) -> dict:
+    """
+    按动作分别贪心匹配：预测事件与同类标注在 ±tolerance 帧内配对，每个标注只匹配一次
+    Returns: {动作: [tp, fp, fn]}
+    """
+    counts: dict = {}
+    actions = {a for a, _ in predicted} | {a for a, _ in labels}
+    for action in actions:
+        pred = sorted(f for a, f in predicted if a == action)
+        truth = sorted(f for a, f in labels if a == action)
+        used = [False] * len(truth)
+        tp = 0
+        j = 0
+        for frame in pred:
+            while j < len(truth) and truth[j] < frame - tolerance:
+                j += 1
+            best = None
+            k = j
+            while k < len(truth) and truth[k] <= frame + tolerance:
+                if not used[k] and (best is None or abs(truth[k] - frame) < abs(truth[best] - frame)):
+                    best = k
+                k += 1
+            if best is not None:
+                used[best] = True
+                tp += 1
+        counts[action] = [tp, len(pred) - tp, len(truth) - tp]
+    return counts
+
+
+def _prf(tp: int, fp: int, fn: int) -> dict:
+    precision = tp / (tp + fp) if tp + fp else 0.0
+    recall = tp / (tp + fn) if tp + fn else 0.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return {"precision": round(precision, 4), "recall": round(recall, 4), "f1": round(f1, 4),
+            "tp": tp, "fp": fp, "fn": fn}
+
+
+# 进程池 worker 内的轨迹（initializer 中加载一次，参数组之间复用）
+_TRACES: list = []
+_TOLERANCE = 5
+
+
+def _init_worker(trace_specs: list, tolerance: int):
+    global _TRACES, _TOLERANCE
+    _TRACES = [Trace(Path(path), labels) for path, labels in trace_specs]
+    _TOLERANCE = tolerance
+
+
+def evaluate(params: dict) -> dict:
+    """用一组参数回放所有轨迹并评分"""
+    totals: dict = {}
+    frames = 0
+    elapsed = 0.0
+    for trace in _TRACES:
+        recognizer = ActionRecognizer(
+            window_size=params.get("window_size", 15),
+            debounce_frames=params.get("debounce_frames", 10),
+            thresholds=params.get("thresholds"),
+        )
+        start = time.perf_counter()
+        result = recognizer.recognize_batch(trace.keypoints, trace.joint_angles)
+        elapsed += time.perf_counter() - start
+        frames += len(trace.frames)
+        predicted = [(ev["action"], int(trace.frames[ev["frame"] - 1])) for ev in result["events"]]
+        for action, (tp, fp, fn) in match_events(predicted, trace.labels, _TOLERANCE).items():
+            acc = totals.setdefault(action, [0, 0, 0])
+            acc[0] += tp
+            acc[1] += fp
+            acc[2] += fn
+
+    overall = [sum(v[i] for v in totals.values()) for i in range(3)]
+    return {
+        "params": params,
+        **_prf(*overall),
+        "per_action": {action: _prf(*v) for action, v in sorted(totals.items())},
+        "frames": frames,
+        "frames_per_second": round(frames / elapsed) if elapsed > 0 else None,
+    }
+
+
+def expand_grid(grid: dict) -> list:
+    """参数网格展开为参数组列表（笛卡尔积）"""
+    axes = []
+    for key in ("window_size", "debounce_frames"):
+        if key in grid:
+            axes.append([(key, v) for v in grid[key]])
+    thresholds = grid.get("thresholds", {})
+    unknown = set(thresholds) - set(ActionRecognizer.DEFAULT_THRESHOLDS)
+    if unknown:
+        raise ValueError(f"Unknown thresholds: {sorted(unknown)}")
+    for name, values in sorted(thresholds.items()):
+        axes.append([(("thresholds", name), v) for v in values])
+
+    combos = []
+    for combo in itertools.product(*axes):
+        params: dict = {"thresholds": {}}
+        for key, value in combo:
+            if isinstance(key, tuple):
+                params["thresholds"][key[1]] = value
+            else:
+                params[key] = value
+        combos.append(params)
+    return combos
+
+
+def default_grid() -> dict:
+    """默认网格：去抖动间隔 + 挥拍相关阈值在默认值上下浮动"""
+    t = ActionRecognizer.DEFAULT_THRESHOLDS
+    return {
+        "debounce_frames": [6, 8, 10, 12, 15],
+        "thresholds": {
+            "swing_wrist_speed": [t["swing_wrist_speed"] * s for s in (0.6, 0.8, 1.0, 1.25, 1.5)],
+            "forehand_lateral_speed": [t["forehand_lateral_speed"] * s for s in (0.5, 1.0, 1.5)],
+            "backhand_lateral_speed": [t["backhand_lateral_speed"] * s for s in (0.5, 1.0, 1.5)],
+        },
+    }
+
+
+def load_trace_specs(traces_dir: Path, labels_dir: Path) -> list:
+    """匹配轨迹与同名标注文件；没有标注的轨迹跳过"""
+    specs = []
+    for archive_path in sorted(traces_dir.glob("*.kpa")):
+        label_path = labels_dir / f"{archive_path.stem}.json"
+        if not label_path.exists():
+            print(f"skip {archive_path.name}: no labels at {label_path}", file=sys.stderr)
+            continue
+        with open(label_path, encoding="utf-8") as f:
+            labels = json.load(f)
+        if isinstance(labels, dict):
+            labels = labels.get("events", [])
+        specs.append((str(archive_path), labels))
+    return specs
+
+
+def sweep(trace_specs: list, combos: list, workers: Optional[int] = None,
+          tolerance: int = 5) -> list:
+    """在进程池中评估所有参数组，按 F1（其次精确率）降序返回"""
+    chunksize = max(1, len(combos) // ((workers or 4) * 4))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(trace_specs, tolerance)) as pool:
+        results = list(pool.map(evaluate, combos, chunksize=chunksize))
+    results.sort(key=lambda r: (r["f1"], r["precision"]), reverse=True)
+    return results
+
+
+# ============ 命令行 ============
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(prog="python -m backend.tuning",
+                                     description="动作识别参数调优")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    rec = sub.add_parser("record", help="录制关键点轨迹（运行一次姿态推理）")
+    rec.add_argument("videos", nargs="+")
+    rec.add_argument("--out", type=Path, default=Path("traces"))
+    rec.add_argument("--skip-frames", type=int, default=1)
+    rec.add_argument("--smoothing", action="store_true")
+
+    sw = sub.add_parser("sweep", help="用参数网格回放轨迹并评分")
+    sw.add_argument("--traces", type=Path, default=Path("traces"))
+    sw.add_argument("--labels", type=Path, default=Path("labels"))
+    sw.add_argument("--grid", type=Path, help="参数网格 JSON（缺省使用内置网格）")
+    sw.add_argument("--workers", type=int, default=None)
+    sw.add_argument("--tolerance", type=int, default=5, help="事件匹配容差（帧）")
+    sw.add_argument("--top", type=int, default=10)
+    sw.add_argument("--report", type=Path, help="完整结果写入 JSON")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "record":
+        record(args.videos, args.out, args.skip_frames, {"smoothing": args.smoothing})
+        return
+
+    specs = load_trace_specs(args.traces, args.labels)
+    if not specs:
+        parser.error(f"no labelled traces in {args.traces}")
+    if args.grid:
+        with open(args.grid, encoding="utf-8") as f:
+            grid = json.load(f)
+    else:
+        grid = default_grid()
+    combos = expand_grid(grid)
+
+    start = time.perf_counter()
+    results = sweep(specs, combos, args.workers, args.tolerance)
+    elapsed = time.perf_counter() - start
+
+    baseline = evaluate_baseline(specs, args.tolerance)
+    print(f"{len(combos)} parameter sets × {len(specs)} traces in {elapsed:.1f}s")
+    print(f"baseline: P={baseline['precision']:.3f} R={baseline['recall']:.3f} "
+          f"F1={baseline['f1']:.3f}")
+    for rank, r in enumerate(results[:args.top], 1):
+        print(f"{rank:>3}. P={r['precision']:.3f} R={r['recall']:.3f} F1={r['f1']:.3f} "
+              f"{r['frames_per_second'] or 0:>10,} fps  {json.dumps(r['params'])}")
+
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump({"baseline": baseline, "elapsed_seconds": round(elapsed, 3),
+                       "results": results}, f, ensure_ascii=False, indent=2)
+
+
+def evaluate_baseline(trace_specs: list, tolerance: int) -> dict:
+    """默认参数的得分（在当前进程中计算）"""
+    _init_worker(trace_specs, tolerance)
+    return evaluate({})
+
+
+if __name__ == "__main__":
+    main()
@@ -105,11 +105,7 @@ class Visualizer:
     def _draw_trajectory(self, frame: np.ndarray, center_of_mass: Optional[dict]):
         """绘制重心运动轨迹"""
         if center_of_mass:
-            self.trajectory_points.append(
-                (int(center_of_mass["x"]), int(center_of_mass["y"]))
-            )
-            if len(self.trajectory_points) > self.max_trajectory:
-                self.trajectory_points = self.trajectory_points[-self.max_trajectory:]
+            self.track_point(center_of_mass)
 
         if len(self.trajectory_points) > 1:
             for i in range(1, len(self.trajectory_points)):
@@ -123,6 +119,14 @@ class Visualizer:
                 cv2.line(frame, self.trajectory_points[i - 1],
                          self.trajectory_points[i], color, thickness, cv2.LINE_AA)
 
+    def track_point(self, center_of_mass: dict):
+        """记录一个重心轨迹点（不绘制）"""
+        self.trajectory_points.append(
+            (int(center_of_mass["x"]), int(center_of_mass["y"]))
+        )
+        if len(self.trajectory_points) > self.max_trajectory:
+            self.trajectory_points = self.trajectory_points[-self.max_trajectory:]
+
     def _draw_joint_angles(self, frame: np.ndarray, analysis: dict):
         """在关键点旁绘制关节角度"""
         kp_map = {kp["id"]: kp for kp in analysis["keypoints"]}
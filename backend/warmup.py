@@ -0,0 +1,109 @@
+"""
+Sport Vision — 预热模块
+按需加载视觉依赖（cv2 / MediaPipe），启动后在后台完成模型加载与一次空推理
+"""
+
+import time
+import asyncio
+import importlib
+import threading
+from typing import Optional
+
+
+class Warmup:
+    """
+    视觉栈懒加载与预热状态
+    backend.pipeline 只在首次需要时导入，导入由 import 锁保证只执行一次
+    """
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.ready = False
+        self.error: Optional[str] = None
+        # 各阶段耗时（秒）
+        self.timings: dict = {}
+        self._lock = threading.Lock()
+        self._pipeline_module = None
+        # 预热时加载好的姿态分析器，留给第一个会话直接使用
+        self._analyzer = None
+        self._task: Optional[asyncio.Task] = None
+
+    def pipeline_class(self):
+        """返回 Pipeline 类（首次调用时导入，会阻塞，事件循环中请用 load_pipeline_class）"""
+        if self._pipeline_module is None:
+            with self._lock:
+                if self._pipeline_module is None:
+                    start = time.perf_counter()
+                    module = importlib.import_module("backend.pipeline")
+                    self.timings.setdefault("import_seconds",
+                                            round(time.perf_counter() - start, 3))
+                    self._pipeline_module = module
+        return self._pipeline_module.Pipeline
+
+    async def load_pipeline_class(self):
+        """在线程中导入视觉栈，避免阻塞事件循环"""
+        if self._pipeline_module is not None:
+            return self._pipeline_module.Pipeline
+        return await asyncio.to_thread(self.pipeline_class)
+
+    def _warm_sync(self):
+        """导入视觉栈 + 加载姿态模型 + 空白帧推理一次"""
+        self.pipeline_class()
+        import numpy as np
+        from backend.pose_analyzer import PoseAnalyzer
+
+        start = time.perf_counter()
+        analyzer = PoseAnalyzer()
+        self.timings["model_load_seconds"] = round(time.perf_counter() - start, 3)
+        try:
+            start = time.perf_counter()
+            analyzer.detect(np.zeros((256, 256, 3), dtype=np.uint8))
+            self.timings["first_inference_seconds"] = round(time.perf_counter() - start, 3)
+        except Exception:
+            analyzer.close()
+            raise
+        with self._lock:
+            self._analyzer = analyzer
+
+    def take_analyzer(self):
+        """取走预热好的姿态分析器（只能取一次，之后返回 None，由调用方负责关闭）"""
+        with self._lock:
+            analyzer, self._analyzer = self._analyzer, None
+        return analyzer
+
+    def close(self):
+        """释放未被取走的姿态分析器"""
+        analyzer = self.take_analyzer()
+        if analyzer is not None:
+            analyzer.close()
+
+    async def _run(self):
+        start = time.perf_counter()
+        try:
+            await asyncio.to_thread(self._warm_sync)
+        except Exception as e:
+            self.error = f"{type(e).__name__}: {e}"
+        else:
+            self.ready = True
+        self.timings["warmup_seconds"] = round(time.perf_counter() - start, 3)
+
+    def start(self):
+        """启动后台预热（需在事件循环中调用）"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    def status(self) -> dict:
+        if self.ready:
+            state = "ready"
+        elif self.error:
+            state = "failed"
+        else:
+            state = "warming"
+        result = {
+            "status": state,
+            "uptime_seconds": round(time.time() - self.started_at, 1),
+            "timings": dict(self.timings),
+        }
+        if self.error:
+            result["error"] = self.error
+        return result
@@ -5,18 +5,23 @@ export function useAnalysis() {
   const statusText = ref('就绪')
   const isAnalyzing = ref(false)
   const analysisComplete = ref(false)
+  // 服务端整场统计（complete 消息携带）
+  const summary = ref(null)
   const frameData = reactive({
     frameBase64: null,
     progress: 0,
     pose: null,
     action: null,
-    heatmapData: [],
+    heatmap: null,
     width: 960,
     height: 540,
     frameNumber: 0,
   })
 
   let ws = null
+  // 紧凑帧格式的会话 schema 与最近一次动作计数
+  let schema = null
+  let actionCounts = {}
 
   function setStatus(type, text) {
     status.value = type
@@ -62,8 +67,11 @@ export function useAnalysis() {
     frameData.progress = 0
     frameData.pose = null
     frameData.action = null
-    frameData.heatmapData = []
+    frameData.heatmap = null
     frameData.frameNumber = 0
+    summary.value = null
+    schema = null
+    actionCounts = {}
     isAnalyzing.value = true
     analysisComplete.value = false
 
@@ -77,6 +85,10 @@ export function useAnalysis() {
       const msg = { type: 'start', source }
       if (source === 'demo') msg.id = id
       if (source === 'upload') msg.path = path
+      // 小屏设备请求更小的输出分辨率，减少编码和传输量
+      msg.display_width = Math.min(960, Math.round(window.innerWidth * (window.devicePixelRatio || 1)))
+      // 紧凑帧：静态信息只发送一次，坐标量化为整数
+      msg.compact = true
       ws.send(JSON.stringify(msg))
     }
 
@@ -100,14 +112,29 @@ export function useAnalysis() {
 
   function handleMessage(msg) {
     switch (msg.type) {
+      case 'queued':
+        setStatus('processing', `排队中（第 ${msg.position} 位）...`)
+        break
+      case 'rejected':
+        setStatus('ready', `服务繁忙: ${msg.message}`)
+        isAnalyzing.value = false
+        break
       case 'started':
         setStatus('processing', '分析中...')
         break
+      case 'schema':
+        schema = msg
+        break
       case 'frame':
         onFrame(msg.data)
         break
+      case 'f':
+        if (schema) onFrame(expandFrame(msg.d))
+        break
       case 'complete':
-        setStatus('active', '分析完成')
+        summary.value = msg.summary || null
+        // 跳转跳过的区间未回放时，结果只覆盖部分视频（服务端不保存）
+        setStatus('active', msg.partial ? `分析完成（缺 ${msg.missing_frames} 帧，未保存）` : '分析完成')
         isAnalyzing.value = false
         analysisComplete.value = true
         break
@@ -122,6 +149,64 @@ export function useAnalysis() {
     }
   }
 
+  // 紧凑帧还原为完整帧的结构
+  function expandFrame(d) {
+    const sc = schema.scales
+    const data = {
+      frame_base64: d.img,
+      frame_number: d.n,
+      timestamp: d.t,
+      progress: d.p,
+      total_frames: schema.total_frames,
+      fps: schema.fps,
+      width: schema.width,
+      height: schema.height,
+      heatmap: d.heatmap,
+      technique: d.technique,
+      pose: null,
+      action: null,
+    }
+    const fromList = (names, values, scale) => {
+      const out = {}
+      names.forEach((name, i) => {
+        if (values[i] != null) out[name] = values[i] / scale
+      })
+      return out
+    }
+    if (d.kp) {
+      const keypoints = []
+      schema.keypoints.forEach((kp, i) => {
+        if (d.kp[i * 4] == null) return
+        keypoints.push({
+          id: kp.id,
+          name: kp.name,
+          x: d.kp[i * 4] / sc.xy,
+          y: d.kp[i * 4 + 1] / sc.xy,
+          z: d.kp[i * 4 + 2] / sc.z,
+          visibility: d.kp[i * 4 + 3] / sc.visibility,
+        })
+      })
+      data.pose = {
+        keypoints,
+        joint_angles: fromList(schema.joint_angles, d.ang, sc.angle),
+        biomechanics: fromList(schema.biomechanics, d.bio, sc.metric),
+        center_of_mass: d.com ? { x: d.com[0] / sc.xy, y: d.com[1] / sc.xy } : null,
+        confidence: d.conf / sc.confidence,
+      }
+    }
+    if (d.act) {
+      if (d.cnt) actionCounts = d.cnt
+      data.action = {
+        action: d.act[0],
+        action_info: schema.actions[d.act[0]],
+        confidence: d.act[1] / sc.confidence,
+        is_new_action: d.act[2] === 1,
+        action_counts: actionCounts,
+      }
+    }
+    return data
+  }
+
   function onFrame(data) {
     if (data.frame_base64) frameData.frameBase64 = data.frame_base64
     frameData.progress = data.progress || 0
@@ -130,7 +215,7 @@ export function useAnalysis() {
     frameData.frameNumber = data.frame_number || 0
     if (data.pose) frameData.pose = data.pose
     if (data.action) frameData.action = data.action
-    if (data.heatmap_data) frameData.heatmapData = data.heatmap_data
+    if (data.heatmap) frameData.heatmap = data.heatmap
   }
 
   function stopAnalysis() {
@@ -157,6 +242,7 @@ export function useAnalysis() {
     statusText,
     isAnalyzing,
     analysisComplete,
+    summary,
     frameData,
     startAnalysis,
     stopAnalysis,
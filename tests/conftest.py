@@ -0,0 +1,65 @@
+"""
+Sport Vision — 测试公共配置
+"""
+
+import os
+import sys
+from collections import deque
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+# 导入 backend.main 时不在仓库 data/ 下创建共享注册表
+os.environ.setdefault("SPORT_VISION_SESSION_REGISTRY", "memory")
+
+
+class StubPoseAnalyzer:
+    """不加载模型的姿态分析器：detect 返回 None，analyze 沿用真实实现"""
+
+    def __new__(cls):
+        from backend.pose_analyzer import PoseAnalyzer
+
+        analyzer = PoseAnalyzer.__new__(PoseAnalyzer)
+        analyzer.history_size = 30
+        analyzer.keypoint_history = deque(maxlen=30)
+        analyzer.center_of_mass_history = deque(maxlen=60)
+        analyzer.frame_count = 0
+        analyzer.smoother = None
+        analyzer.detect = lambda frame_rgb: None
+        analyzer.close = lambda: None
+        return analyzer
+
+
+@pytest.fixture
+def make_pipeline():
+    """构建不依赖 MediaPipe 模型文件的 Pipeline"""
+    from backend.pipeline import Pipeline
+
+    created = []
+
+    def factory(**kwargs):
+        pipeline = Pipeline(pose_analyzer=StubPoseAnalyzer(), **kwargs)
+        created.append(pipeline)
+        return pipeline
+
+    yield factory
+    for pipeline in created:
+        pipeline.close()
+
+
+@pytest.fixture
+def sample_video(tmp_path):
+    """生成一段纯色渐变的短视频，返回 (路径, 帧数, fps)"""
+    import cv2
+    import numpy as np
+
+    path = tmp_path / "sample.avi"
+    fps, frames = 25.0, 40
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), fps, (64, 48))
+    for i in range(frames):
+        writer.write(np.full((48, 64, 3), i * 5 % 256, dtype=np.uint8))
+    writer.release()
+    return str(path), frames, fps
@@ -0,0 +1,94 @@
+import numpy as np
+import pytest
+
+from backend.action_recognizer import ActionRecognizer
+
+
+def _synthetic_sequence(T=400, seed=0):
+    """随机游走的关键点序列：手腕大幅摆动以触发各类挥拍，夹杂缺失帧"""
+    rng = np.random.default_rng(seed)
+    n = len(ActionRecognizer.KEYPOINT_NAMES)
+    base = np.array([[480.0, 200.0]] * n)
+    keypoints = base + rng.normal(0, 2, (T, n, 2)).cumsum(axis=0) * 0.2
+    wrist = ActionRecognizer.KEYPOINT_NAMES.index("right_wrist")
+    keypoints[:, wrist] += rng.normal(0, 15, (T, 2))
+    hip = ActionRecognizer.KEYPOINT_NAMES.index("right_hip")
+    keypoints[::37, hip] += 40
+    gaps = rng.random((T, n)) < 0.03
+    keypoints[gaps] = np.nan
+    joint_angles = {
+        "right_elbow": rng.uniform(60, 180, T),
+        "right_shoulder": rng.uniform(30, 170, T),
+    }
+    joint_angles["right_elbow"][::11] = np.nan
+    return keypoints, joint_angles
+
+
+def _stream(recognizer, keypoints, joint_angles):
+    actions = []
+    for t in range(len(keypoints)):
+        kps = [
+            {"name": name, "x": float(keypoints[t, i, 0]), "y": float(keypoints[t, i, 1])}
+            for i, name in enumerate(ActionRecognizer.KEYPOINT_NAMES)
+            if not np.isnan(keypoints[t, i]).any()
+        ]
+        angles = {k: float(v[t]) for k, v in joint_angles.items() if not np.isnan(v[t])}
+        actions.append(recognizer.update(kps, angles)["action"])
+    return actions
+
+
+@pytest.mark.parametrize("seed,debounce", [(0, 10), (1, 3), (2, 1)])
+def test_batch_matches_streaming(seed, debounce):
+    keypoints, joint_angles = _synthetic_sequence(seed=seed)
+    streaming = ActionRecognizer(debounce_frames=debounce)
+    actions = _stream(streaming, keypoints, joint_angles)
+
+    batch = ActionRecognizer(debounce_frames=debounce).recognize_batch(keypoints, joint_angles)
+    assert list(batch["actions"]) == actions
+    assert batch["action_counts"] == streaming.action_counts
+    assert [(e["action"], e["frame"]) for e in batch["events"]] == \
+        [(e["action"], e["frame"]) for e in streaming.action_history]
+    # 序列足够长，至少触发若干挥拍事件，避免比较的是两个空列表
+    assert len(batch["events"]) >= 3
+
+
+def test_poses_to_arrays_skips_missing_frames():
+    poses = [
+        {"keypoints": [{"name": "nose", "x": 1.0, "y": 2.0},
+                       {"name": "left_eye", "x": 9.0, "y": 9.0}],
+         "joint_angles": {"right_elbow": 120.0}},
+        None,
+        {"keypoints": [{"name": "right_wrist", "x": 3.0, "y": 4.0}],
+         "joint_angles": {}},
+    ]
+    keypoints, angles = ActionRecognizer.poses_to_arrays(poses)
+    assert keypoints.shape == (2, len(ActionRecognizer.KEYPOINT_NAMES), 2)
+    assert tuple(keypoints[0, 0]) == (1.0, 2.0)
+    wrist = ActionRecognizer.KEYPOINT_NAMES.index("right_wrist")
+    assert tuple(keypoints[1, wrist]) == (3.0, 4.0)
+    assert np.isnan(keypoints[1, 0]).all()
+    assert angles["right_elbow"][0] == 120.0 and np.isnan(angles["right_elbow"][1])
+
+
+def test_reset_window_keeps_counts_and_restarts_debounce():
+    keypoints, joint_angles = _synthetic_sequence(T=200, seed=3)
+    recognizer = ActionRecognizer()
+    _stream(recognizer, keypoints, joint_angles)
+    counts = dict(recognizer.action_counts)
+    history = list(recognizer.action_history)
+    frame_count = recognizer.frame_count
+
+    recognizer.reset_window()
+    assert recognizer.action_counts == counts
+    assert recognizer.action_history == history
+    assert len(recognizer.keypoint_buffer) == 0
+    assert recognizer.last_action_frame == frame_count - recognizer.debounce_frames
+
+    recognizer.reset()
+    assert sum(recognizer.action_counts.values()) == 0
+    assert recognizer.frame_count == 0
+
+
+def test_unknown_threshold_rejected():
+    with pytest.raises(ValueError):
+        ActionRecognizer(thresholds={"nope": 1})
@@ -0,0 +1,64 @@
+import pytest
+
+from backend.action_store import ActionStore
+
+
+def _event(action, frame, wrist_speed):
+    return {
+        "action": action,
+        "frame": frame,
+        "timestamp": frame / 30.0,
+        "confidence": 0.9,
+        "biomechanics": {"wrist_speed": wrist_speed, "body_lean": 5.0},
+        "joint_angles": {"right_elbow": 120.0},
+    }
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ActionStore(tmp_path / "actions.db")
+    store.save_analysis("rally", "/videos/rally.mp4", [
+        _event("serve", 10, 5.0),
+        _event("forehand", 40, 25.0),
+        _event("forehand", 80, 40.0),
+        _event("backhand", 120, 15.0),
+    ], fps=30.0, total_frames=150)
+    return store
+
+
+def test_round_trip_and_filters(store):
+    events = store.query()
+    assert [ev["frame"] for ev in events] == [10, 40, 80, 120]
+    assert events[0]["joint_angles"] == {"right_elbow": 120.0}
+    assert events[0]["biomechanics"]["wrist_speed"] == 5.0
+    assert events[0]["biomechanics"]["knee_bend"] is None
+
+    assert [ev["frame"] for ev in store.query(action="forehand")] == [40, 80]
+    assert store.query(video_id="other") == []
+
+    analysis = store.get_analysis(events[0]["analysis_id"])
+    assert analysis["total_frames"] == 150
+    assert len(store.query(analysis_id=analysis["id"])) == 4
+
+
+def test_metric_ranges(store):
+    frames = [ev["frame"] for ev in store.query(metric_ranges={"wrist_speed": (10, 30)})]
+    assert frames == [40, 120]
+    frames = [ev["frame"] for ev in store.query(metric_ranges={"wrist_speed": (None, 10)})]
+    assert frames == [10]
+    with pytest.raises(ValueError):
+        store.query(metric_ranges={"wrist_speed; DROP TABLE action_events": (0, 1)})
+
+
+def test_limit_is_clamped(store):
+    assert len(store.query(limit=2)) == 2
+    assert len(store.query(limit=0)) == 1
+    assert len(store.query(limit=-1)) == 1
+    assert len(store.query(limit=10 ** 9)) == 4
+
+
+def test_metric_filter_uses_index(store):
+    plan = store._connect().execute(
+        "EXPLAIN QUERY PLAN SELECT * FROM action_events WHERE wrist_speed >= ?", (10,)
+    ).fetchall()
+    assert any("idx_events_wrist_speed" in row["detail"] for row in plan)
@@ -0,0 +1,135 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from backend.admission import AdmissionController, AdmissionRejected
+
+
+def test_acquire_release_and_per_client_limit():
+    async def scenario():
+        admission = AdmissionController(max_global=2, max_per_client=1)
+        await admission.acquire("s1", "alice")
+        await admission.acquire("s1", "alice")       # 重复申请不占新槽位
+        with pytest.raises(AdmissionRejected):
+            await admission.acquire("s2", "alice")
+        await admission.acquire("s3", "bob")
+        assert admission.stats()["active"] == 2
+        admission.release("s1")
+        admission.release("s1")
+        assert set(admission.active) == {"s3"}
+
+    asyncio.run(scenario())
+
+
+def test_queue_positions_and_fifo_admission():
+    async def scenario():
+        admission = AdmissionController(max_global=1, max_per_client=5, max_queue=2)
+        await admission.acquire("s1", "a")
+        positions = {"s2": [], "s3": []}
+
+        def reporter(session_id):
+            async def on_position(position):
+                positions[session_id].append(position)
+            return on_position
+
+        t2 = asyncio.create_task(admission.acquire("s2", "b", reporter("s2")))
+        await asyncio.sleep(0)
+        t3 = asyncio.create_task(admission.acquire("s3", "c", reporter("s3")))
+        await asyncio.sleep(0.01)
+        with pytest.raises(AdmissionRejected):
+            await admission.acquire("s4", "d")          # 队列已满
+
+        admission.release("s1")
+        await t2
+        assert "s2" in admission.active and not t3.done()
+        admission.release("s2")
+        await t3
+        return positions
+
+    positions = asyncio.run(scenario())
+    assert positions["s2"] == [1]
+    assert positions["s3"] == [2, 1]
+
+
+def test_cancelled_waiter_leaves_queue_and_timeout_rejects():
+    async def scenario():
+        admission = AdmissionController(max_global=1, max_queue=4, queue_timeout=0.05)
+        await admission.acquire("s1", "a")
+        waiting = asyncio.create_task(admission.acquire("s2", "b"))
+        await asyncio.sleep(0.01)
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        assert not admission.waiters
+
+        with pytest.raises(AdmissionRejected):
+            await admission.acquire("s3", "c")
+        assert not admission.waiters and set(admission.active) == {"s1"}
+
+    asyncio.run(scenario())
+
+
+class _FakeSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def send_text(self, text):
+        self.sent.append(text)
+
+    async def send_bytes(self, data):
+        self.sent.append(data)
+
+
+def test_session_cancelled_during_pipeline_build_closes_it(monkeypatch):
+    import backend.main as main
+    from backend.serialization import FrameSerializer
+
+    built = threading.Event()
+    closed = []
+
+    class SlowPipeline:
+        def __init__(self, **kwargs):
+            time.sleep(0.1)
+            self.analyzer = kwargs["pose_analyzer"]
+            built.set()
+
+        def close(self):
+            closed.append(self.analyzer)
+
+    async def load_pipeline_class():
+        return SlowPipeline
+
+    monkeypatch.setattr(main.warmup, "load_pipeline_class", load_pipeline_class)
+    monkeypatch.setattr(main.warmup, "take_analyzer", lambda: "warm-analyzer")
+
+    async def scenario():
+        task = asyncio.create_task(main._run_session(
+            _FakeSocket(), "sess-build", "client", "video.mp4", {}, FrameSerializer()
+        ))
+        await asyncio.sleep(0.02)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert "sess-build" not in main.admission.active
+        # 等待线程中的构建完成，回调关闭流水线
+        for _ in range(100):
+            if closed:
+                break
+            await asyncio.sleep(0.01)
+
+    asyncio.run(scenario())
+    assert built.is_set()
+    assert closed == ["warm-analyzer"]
+
+
+def test_pipeline_options_are_clamped_and_validated():
+    from backend.main import _pipeline_options
+
+    options = _pipeline_options({"inference_stride": "30", "display_width": 50,
+                                 "inference_size": -1, "display_interpolation": "bogus"})
+    assert options == {"inference_stride": 10, "display_width": 160, "inference_size": 0}
+    for bad in ({"display_width": "wide"}, {"inference_stride": [2]}):
+        with pytest.raises(ValueError):
+            _pipeline_options(bad)
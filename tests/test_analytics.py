@@ -0,0 +1,116 @@
+import numpy as np
+import pytest
+
+from backend.analytics import MetricSummary, P2Quantile, RunningStats, SessionAnalytics
+
+
+@pytest.mark.parametrize("dist", ["normal", "uniform", "exponential"])
+@pytest.mark.parametrize("p", [0.1, 0.5, 0.9])
+def test_p2_quantile_accuracy(dist, p):
+    rng = np.random.default_rng(42)
+    data = getattr(rng, dist)(size=20000)
+    estimator = P2Quantile(p)
+    for x in data:
+        estimator.add(float(x))
+    spread = np.percentile(data, 95) - np.percentile(data, 5)
+    assert abs(estimator.value() - np.percentile(data, p * 100)) < 0.02 * spread
+
+
+def test_p2_quantile_small_samples():
+    estimator = P2Quantile(0.5)
+    assert estimator.value() is None
+    for x in (5.0, 1.0, 3.0):
+        estimator.add(x)
+    assert estimator.value() == 3.0
+
+
+def test_running_stats_matches_numpy():
+    rng = np.random.default_rng(1)
+    data = rng.normal(100, 15, 5000)
+    stats = RunningStats()
+    for x in data:
+        stats.add(float(x))
+    assert stats.mean == pytest.approx(data.mean())
+    assert stats.std == pytest.approx(data.std(ddof=1))
+    assert (stats.min, stats.max) == (data.min(), data.max())
+    assert RunningStats().to_dict() == {"count": 0}
+
+    summary = MetricSummary((0.5,))
+    for x in data:
+        summary.add(float(x))
+    assert set(summary.to_dict()) == {"count", "mean", "std", "min", "max", "p50"}
+
+
+def _pose(elbow):
+    return {"joint_angles": {"right_elbow": elbow, "left_elbow": None},
+            "biomechanics": {"wrist_speed": elbow / 10}}
+
+
+def _action(name="ready", new=False):
+    return {"action": name, "is_new_action": new, "confidence": 0.8}
+
+
+def _play(analytics, frames, fps=30.0, shots=()):
+    for n in frames:
+        action = _action("forehand", True) if n in shots else _action()
+        analytics.add_frame(n, (n - 1) / fps, _pose(float(n)), action)
+
+
+def test_seek_forward_then_back_counts_gap_frames():
+    analytics = SessionAnalytics(30.0, frame_count=400)
+    _play(analytics, range(1, 51))
+    _play(analytics, range(300, 401))       # 向前跳转
+    _play(analytics, range(60, 300))        # 向后跳回
+    _play(analytics, range(1, 401))         # 完整重放：只补上 51–59
+    assert analytics.frames == 400
+    assert analytics.pose_frames == 400
+    assert analytics.joint_angles["right_elbow"].stats.count == 400
+    assert analytics.joint_angles["right_elbow"].stats.mean == pytest.approx(200.5)
+    # 跳转造成的时间戳跳变按帧间隔计时
+    assert analytics.duration == pytest.approx(400 / 30.0)
+
+
+def test_rallies_with_out_of_order_shots():
+    fps = 30.0
+    # 击球时刻（秒）：0, 1, 2 | 10, 11 | 20
+    shot_frames = {int(t * fps) + 1 for t in (0, 1, 2, 10, 11, 20)}
+    ordered = SessionAnalytics(fps)
+    _play(ordered, range(1, 700), shots=shot_frames)
+
+    shuffled = SessionAnalytics(fps)
+    _play(shuffled, range(400, 700), shots=shot_frames)    # 先看后半段
+    _play(shuffled, range(1, 400), shots=shot_frames)      # 再跳回开头
+
+    for analytics in (ordered, shuffled):
+        summary = analytics.summary()
+        rallies = summary["rallies"]
+        assert rallies["count"] == 3
+        assert rallies["active_seconds"] == pytest.approx(3.0)
+        assert rallies["shots"]["max"] == 3 and rallies["shots"]["min"] == 1
+        assert summary["idle"]["count"] == 2
+        assert summary["idle"]["duration"]["min"] == pytest.approx(8.0)
+        assert summary["idle"]["duration"]["max"] == pytest.approx(9.0)
+        assert summary["actions"]["forehand"]["count"] == 6
+    # 分位数估计与到达顺序有关，其余统计与顺序无关
+    for key in ("frames", "rallies", "idle", "actions"):
+        assert ordered.summary()[key] == shuffled.summary()[key]
+
+
+def test_summary_contents():
+    analytics = SessionAnalytics(25.0, quantiles=(0.5,))
+    analytics.add_frame(1, 0.0, None, None)
+    analytics.add_frame(2, 0.04, _pose(90.0), _action("moving", True))   # 状态不计为击球
+    analytics.add_frame(3, 0.08, _pose(120.0), _action("serve", True))
+    summary = analytics.summary()
+
+    assert summary["frames"] == 3 and summary["pose_frames"] == 2
+    assert summary["detection_rate"] == pytest.approx(0.667)
+    assert summary["duration_seconds"] == pytest.approx(0.12)
+    assert summary["joint_angles"]["right_elbow"]["p50"] in (90.0, 120.0)
+    assert "left_elbow" not in summary["joint_angles"]
+    assert set(summary["actions"]) == {"serve"}
+    assert summary["actions"]["serve"]["biomechanics"]["wrist_speed"]["mean"] == 12.0
+    assert summary["state_seconds"] == {"none": 0.04, "moving": 0.04, "serve": 0.04}
+    assert summary["rallies"]["count"] == 1 and summary["idle"]["count"] == 0
+    # 快照不改变内部状态
+    assert analytics.summary() == summary
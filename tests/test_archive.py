@@ -0,0 +1,97 @@
+import numpy as np
+import pytest
+
+from backend.archive import (
+    ANGLE_NAMES, HEADER_SIZE, KEYPOINT_IDS, KEYPOINT_NAMES, RECORD_DTYPE,
+    KeypointArchive, KeypointArchiveWriter, events_path,
+)
+
+
+def _pose(i):
+    return {
+        "keypoints": [
+            {"id": idx, "name": name, "x": 10.0 * row + i, "y": 5.0 * row, "z": 0.25,
+             "visibility": 0.75}
+            for row, (idx, name) in enumerate(zip(KEYPOINT_IDS, KEYPOINT_NAMES))
+            if idx != 0          # 鼻子缺失
+        ],
+        "joint_angles": {"right_elbow": 120.5, "unknown_joint": 1.0},
+        "biomechanics": {"wrist_speed": 3.5, "symmetry_score": None},
+        "center_of_mass": {"x": 100.0 + i, "y": 200.0},
+        "confidence": 0.9,
+    }
+
+
+def _write(path, frames=600, batch_size=256, events=None):
+    with KeypointArchiveWriter(path, 960, 540, 30.0, batch_size=batch_size) as writer:
+        for n in range(1, frames + 1):
+            writer.append(n, (n - 1) / 30.0, None if n % 7 == 0 else _pose(n))
+        writer.close(events)
+
+
+def test_round_trip(tmp_path):
+    path = tmp_path / "a.svkp"
+    events = [{"action": "forehand", "frame": 12, "confidence": 0.75}]
+    _write(path, events=events)
+
+    archive = KeypointArchive(path)
+    assert len(archive) == 600
+    assert (archive.width, archive.height, archive.fps) == (960, 540, 30.0)
+    assert archive.events == events
+    assert events_path(path).exists()
+
+    pose = archive.pose(0)
+    original = _pose(1)
+    assert [kp["id"] for kp in pose["keypoints"]] == [kp["id"] for kp in original["keypoints"]]
+    assert pose["keypoints"][0]["x"] == original["keypoints"][0]["x"]
+    assert pose["keypoints"][0]["visibility"] == 0.75
+    assert pose["joint_angles"] == {"right_elbow": 120.5}
+    assert pose["biomechanics"] == {"wrist_speed": 3.5}
+    assert pose["center_of_mass"] == {"x": 101.0, "y": 200.0}
+    assert pose["confidence"] == 0.9
+    assert archive.pose(6) is None          # 第 7 帧无人体
+
+    frame, timestamp, first = next(archive.iter_frames())
+    assert (frame, timestamp) == (1, 0.0) and first == pose
+
+
+def test_frame_slice_and_batch_arrays(tmp_path):
+    path = tmp_path / "a.svkp"
+    _write(path, frames=100, batch_size=16)
+    archive = KeypointArchive(path)
+
+    part = archive.frame_slice(10, 19)
+    assert list(part["frame"]) == list(range(10, 20))
+    assert len(archive.frame_slice(95)) == 6
+    assert isinstance(archive.records, np.memmap)
+
+    xy = archive.keypoints_xy()
+    assert xy.shape == (100, len(KEYPOINT_IDS), 2)
+    assert np.isnan(xy[:, 0]).all()
+    angles = archive.joint_angle_arrays()
+    assert set(angles) == set(ANGLE_NAMES)
+    assert angles["right_elbow"][0] == pytest.approx(120.5)
+    assert np.isnan(angles["right_elbow"][6])
+
+
+def test_unclosed_archive_reads_flushed_records(tmp_path):
+    path = tmp_path / "a.svkp"
+    writer = KeypointArchiveWriter(path, 64, 48, 25.0, batch_size=8)
+    for n in range(1, 21):
+        writer.append(n, n / 25.0, _pose(n))
+    writer.flush()
+    # 头部帧数尚未回填，但记录已在磁盘上
+    assert len(KeypointArchive(path)) == 20
+    writer.close()
+    assert path.stat().st_size == HEADER_SIZE + 20 * RECORD_DTYPE.itemsize
+
+
+def test_rejects_foreign_files(tmp_path):
+    bogus = tmp_path / "bogus.svkp"
+    bogus.write_bytes(b"NOPE" + bytes(100))
+    with pytest.raises(ValueError):
+        KeypointArchive(bogus)
+    short = tmp_path / "short.svkp"
+    short.write_bytes(b"SV")
+    with pytest.raises(ValueError):
+        KeypointArchive(short)
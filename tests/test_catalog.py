@@ -0,0 +1,85 @@
+import os
+import shutil
+
+from backend.catalog import DemoCatalog
+
+
+def _catalog(tmp_path, **kwargs):
+    kwargs.setdefault("check_interval", 0)
+    return DemoCatalog(tmp_path / "demos", tmp_path / "cache", [".mp4", ".avi"],
+                       thumbnail_width=32, **kwargs)
+
+
+def _demo_dir(tmp_path, sample_video):
+    demos = tmp_path / "demos"
+    demos.mkdir()
+    shutil.copy(sample_video[0], demos / "rally_one.avi")
+    return demos
+
+
+def test_refresh_probes_metadata_and_images(tmp_path, sample_video):
+    _demo_dir(tmp_path, sample_video)
+    catalog = _catalog(tmp_path)
+    catalog.refresh()
+
+    (item,) = catalog.list()
+    assert item["id"] == "rally_one" and item["name"] == "Rally One"
+    assert item["frame_count"] == sample_video[1]
+    assert (item["width"], item["height"]) == (64, 48)
+    assert item["fps"] == sample_video[2]
+    assert item["thumbnail_url"] == "/api/demos/rally_one/thumbnail"
+    assert catalog.path_of("rally_one").endswith("rally_one.avi")
+
+    import cv2
+    thumb = cv2.imread(str(catalog.image_path("rally_one", "thumbnail")))
+    poster = cv2.imread(str(catalog.image_path("rally_one", "poster")))
+    assert thumb.shape[1] == 32 and poster.shape[1] == 64
+    assert catalog.get("missing") is None and catalog.path_of("missing") is None
+
+
+def test_extension_priority_and_incremental_refresh(tmp_path, sample_video, monkeypatch):
+    demos = _demo_dir(tmp_path, sample_video)
+    catalog = _catalog(tmp_path)
+    catalog.refresh()
+    assert not catalog.is_stale()
+
+    # 同名 .mp4 优先于 .avi；mtime 调整确保目录变化可见
+    shutil.copy(sample_video[0], demos / "rally_one.mp4")
+    shutil.copy(sample_video[0], demos / "serve.avi")
+    (demos / "notes.txt").write_text("ignored")
+    stat = demos.stat()
+    os.utime(demos, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert catalog.is_stale()
+
+    probed = []
+    original = catalog._probe
+
+    def recording_probe(path, st):
+        probed.append(path.name)
+        return original(path, st)
+
+    monkeypatch.setattr(catalog, "_probe", recording_probe)
+    catalog.refresh()
+    assert sorted(probed) == ["rally_one.mp4", "serve.avi"]
+    assert catalog.get("rally_one")["filename"] == "rally_one.mp4"
+    assert sorted(catalog.entries) == ["rally_one", "serve"]
+
+
+def test_index_cache_reused_across_instances(tmp_path, sample_video, monkeypatch):
+    _demo_dir(tmp_path, sample_video)
+    _catalog(tmp_path).refresh()
+    assert (tmp_path / "cache" / "index.json").exists()
+
+    def no_probe(path, st):
+        raise AssertionError(f"unexpected probe: {path}")
+
+    fresh = _catalog(tmp_path)
+    monkeypatch.setattr(fresh, "_probe", no_probe)
+    fresh.refresh()
+    assert fresh.get("rally_one")["frame_count"] == sample_video[1]
+
+
+def test_missing_directory(tmp_path):
+    catalog = _catalog(tmp_path)
+    catalog.refresh()
+    assert catalog.list() == []
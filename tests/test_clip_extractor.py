@@ -0,0 +1,109 @@
+import subprocess
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from backend.clip_extractor import ClipExtractor
+
+H264_HIGH = {"codec_name": "h264", "profile": "High", "level": 41,
+             "pix_fmt": "yuv420p", "time_base": "1/15360"}
+
+
+@pytest.fixture
+def extractor(tmp_path):
+    return ClipExtractor(tmp_path / "clips", ffmpeg="ffmpeg", ffprobe="ffprobe")
+
+
+def test_clip_filename_cannot_escape_output_dir():
+    name = ClipExtractor.clip_filename("job1", 3, "../../x", 42)
+    assert name == "job1_003_x_42.mp4"
+    assert "/" not in ClipExtractor.clip_filename("a/b", 0, "..", 1)
+
+
+def test_missing_timestamp_derived_from_one_based_frame(extractor, monkeypatch):
+    monkeypatch.setattr(extractor, "_probe_timing", lambda path: (25.0, 100.0))
+    cuts = []
+    monkeypatch.setattr(extractor, "cut",
+                        lambda path, start, end, out: cuts.append((start, end)) or "copy")
+    clips = extractor.extract("v.mp4", [
+        {"action": "serve", "frame": 51, "timestamp": None},
+        {"action": "lob", "frame": 1, "timestamp": 0.0},
+    ], "job", pre_seconds=1.0, post_seconds=2.0)
+    # 第 51 帧的显示时间为 50 / 25 = 2.0 秒；timestamp 0.0 是有效值
+    assert cuts == [(1.0, 4.0), (0.0, 2.0)]
+    assert [clip["filename"] for clip in clips] == ["job_000_serve_51.mp4", "job_001_lob_1.mp4"]
+
+
+def test_smart_cut_only_for_x264_compatible_sources():
+    assert ClipExtractor.smart_compatible(H264_HIGH)
+    assert ClipExtractor.smart_compatible({**H264_HIGH, "profile": "Constrained Baseline"})
+    assert not ClipExtractor.smart_compatible({**H264_HIGH, "profile": "High 10"})
+    assert not ClipExtractor.smart_compatible({**H264_HIGH, "pix_fmt": "yuv422p"})
+    assert not ClipExtractor.smart_compatible({**H264_HIGH, "codec_name": "hevc"})
+    assert not ClipExtractor.smart_compatible(None)
+
+
+def test_head_tail_encode_matches_source_stream(extractor):
+    args = extractor._encode_args("v.mp4", 1.0, 2.0, Path("head.ts"), H264_HIGH)
+    assert args[args.index("-profile:v") + 1] == "high"
+    assert args[args.index("-level:v") + 1] == "4.1"
+    assert args[args.index("-pix_fmt") + 1] == "yuv420p"
+    assert args[args.index("-f") + 1] == "mpegts"
+    assert ClipExtractor._timescale_args(H264_HIGH) == ["-video_track_timescale", "15360"]
+    assert ClipExtractor._timescale_args({}) == []
+
+
+def _stub_ffmpeg(extractor, monkeypatch, verified):
+    runs = []
+    monkeypatch.setattr(extractor, "_keyframes", lambda path: np.array([0.0, 2.0, 4.0]))
+    monkeypatch.setattr(extractor, "_probe_stream", lambda path: H264_HIGH)
+    monkeypatch.setattr(extractor, "_run_ffmpeg", lambda args: runs.append(args))
+    monkeypatch.setattr(extractor, "_verify", lambda path, duration: verified.pop(0))
+    return runs
+
+
+def test_failed_verification_falls_back_to_reencode(extractor, monkeypatch, tmp_path):
+    runs = _stub_ffmpeg(extractor, monkeypatch, [False, True])
+    method = extractor.cut("v.mp4", 1.0, 3.0, tmp_path / "out.mp4")
+    assert method == "reencode"
+    assert "-profile:v" not in runs[-1] and runs[-1][-1].endswith("out.mp4")
+
+
+def test_verified_smart_cut_and_final_failure(extractor, monkeypatch, tmp_path):
+    _stub_ffmpeg(extractor, monkeypatch, [True])
+    assert extractor.cut("v.mp4", 1.0, 3.0, tmp_path / "out.mp4") == "smart"
+
+    _stub_ffmpeg(extractor, monkeypatch, [False, False])
+    with pytest.raises(RuntimeError):
+        extractor.cut("v.mp4", 1.0, 3.0, tmp_path / "out.mp4")
+
+
+def test_smart_cut_failure_in_ffmpeg_falls_back(extractor, monkeypatch, tmp_path):
+    _stub_ffmpeg(extractor, monkeypatch, [True])
+
+    def fail(*args, **kwargs):
+        raise subprocess.CalledProcessError(1, "ffmpeg")
+    monkeypatch.setattr(extractor, "_smart_cut", fail)
+    assert extractor.cut("v.mp4", 1.0, 3.0, tmp_path / "out.mp4") == "reencode"
+
+
+def test_opencv_fallback_without_ffmpeg(tmp_path, sample_video):
+    path, frames, fps = sample_video
+    extractor = ClipExtractor(tmp_path / "clips", ffmpeg="", ffprobe="")
+    extractor.ffmpeg = extractor.ffprobe = None
+    clips = extractor.extract(path, [{"action": "serve", "frame": 20, "timestamp": None}],
+                              "job", pre_seconds=0.2, post_seconds=0.2)
+    assert clips[0]["method"] == "opencv"
+    assert (tmp_path / "clips" / clips[0]["filename"]).stat().st_size > 0
+
+
+def test_clip_event_rejects_unknown_action_and_bad_frame():
+    from pydantic import ValidationError
+    from backend.main import ClipEvent
+
+    assert ClipEvent(action="serve", frame=1).timestamp is None
+    for bad in ({"action": "../../x", "frame": 3}, {"action": "ready", "frame": 3},
+                {"action": "serve", "frame": 0}):
+        with pytest.raises(ValidationError):
+            ClipEvent(**bad)
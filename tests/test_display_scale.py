@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+from backend.pipeline import Pipeline
+
+
+@pytest.fixture
+def hd_video(tmp_path):
+    """1280x720 短视频：分析坐标系（960 宽）与原始尺寸不同"""
+    import cv2
+
+    path = tmp_path / "hd.avi"
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), 30.0, (1280, 720))
+    for i in range(12):
+        writer.write(np.full((720, 1280, 3), i * 10, dtype=np.uint8))
+    writer.release()
+    return str(path)
+
+
+def _detector(pipeline):
+    calls = []
+
+    def detect(frame_rgb):
+        calls.append(frame_rgb.shape)
+        landmarks = np.zeros((33, 4))
+        landmarks[:, 0] = np.linspace(0.2, 0.8, 33) + 0.005 * len(calls)
+        landmarks[:, 1] = np.linspace(0.1, 0.9, 33)
+        landmarks[:, 3] = 1.0
+        return landmarks
+
+    pipeline.pose_analyzer.detect = detect
+    return calls
+
+
+def test_output_size():
+    assert Pipeline._output_size(1920, 1080, 960) == (960, 540)
+    assert Pipeline._output_size(640, 480, 960) == (640, 480)
+    assert Pipeline._output_size(1280, 720, 480) == (480, 270)
+
+
+def test_analysis_independent_of_display_width(make_pipeline, hd_video):
+    results = {}
+    for width in (480, 960):
+        pipeline = make_pipeline(display_width=width, inference_size=0)
+        _detector(pipeline)
+        results[width] = (pipeline, list(pipeline.analyze_video(hd_video)))
+
+    small_pipeline, small = results[480]
+    full_pipeline, full = results[960]
+    assert small_pipeline.analysis_size == full_pipeline.analysis_size == (960, 540)
+    assert small_pipeline.display_scale == 0.5 and full_pipeline.display_scale == 1.0
+    assert (small[0]["width"], small[0]["height"]) == (480, 270)
+
+    for a, b in zip(small, full):
+        assert a["pose"]["joint_angles"] == b["pose"]["joint_angles"]
+        assert a["pose"]["biomechanics"] == b["pose"]["biomechanics"]
+        assert a["action"]["action"] == b["action"]["action"]
+        for ka, kb in zip(a["pose"]["keypoints"], b["pose"]["keypoints"]):
+            assert ka["x"] == pytest.approx(kb["x"] * 0.5)
+            assert ka["y"] == pytest.approx(kb["y"] * 0.5)
+        com_a, com_b = a["pose"]["center_of_mass"], b["pose"]["center_of_mass"]
+        assert com_a["x"] == pytest.approx(com_b["x"] * 0.5, abs=0.1)
+
+    # 热力图在分析坐标系中累加，两种显示宽度结果相同
+    assert small_pipeline.heatmap.width == 960
+    assert np.array_equal(small_pipeline.heatmap.grid, full_pipeline.heatmap.grid)
+    assert small_pipeline.analytics.summary() == full_pipeline.analytics.summary()
+
+
+def test_display_pose_identity_and_copy(make_pipeline):
+    pipeline = make_pipeline()
+    pose = {"keypoints": [{"id": 0, "x": 100.0, "y": 50.0}],
+            "center_of_mass": {"x": 10.0, "y": 20.0}}
+    pipeline.display_scale = 1.0
+    assert pipeline._display_pose(pose) is pose
+    assert pipeline._display_pose(None) is None
+
+    pipeline.display_scale = 2.0
+    display = pipeline._display_pose(pose)
+    assert display["keypoints"][0]["x"] == 200.0
+    assert display["center_of_mass"] == {"x": 20.0, "y": 40.0}
+    assert pose["keypoints"][0]["x"] == 100.0       # 原始分析结果不被修改
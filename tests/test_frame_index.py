@@ -0,0 +1,93 @@
+import asyncio
+
+import numpy as np
+
+from backend.frame_index import FrameCoverage, FrameIndex
+
+
+def test_frame_index_lookup_and_clamp():
+    index = FrameIndex(np.arange(10, dtype=np.float64) / 10.0, fps=10.0)
+    assert index.frame_count == 10
+    assert index.frame_at(0.0) == 1
+    assert index.frame_at(0.25) == 3
+    assert index.frame_at(99.0) == 10
+    assert index.frame_at(-1.0) == 1
+    assert index.time_of(4) == 0.3
+    assert index.clamp(0) == 1 and index.clamp(11) == 10
+    assert abs(index.duration - 1.0) < 1e-9
+
+
+def test_frame_index_build_and_roundtrip(sample_video, tmp_path):
+    path, frames, fps = sample_video
+    index = FrameIndex.build(path)
+    assert index.frame_count == frames
+    assert np.all(np.diff(index.timestamps) >= 0)
+
+    saved = tmp_path / "index.npz"
+    index.save(saved)
+    loaded = FrameIndex.load(saved)
+    assert loaded.fps == index.fps
+    assert np.array_equal(loaded.timestamps, index.timestamps)
+
+
+def test_coverage_counts_gap_frames_after_forward_then_backward_seek():
+    coverage = FrameCoverage(400)
+    assert all(coverage.add(n) for n in range(1, 51))
+    for n in range(300, 321):
+        coverage.add(n)
+    assert coverage.missing() == 249
+
+    # 向后跳到 60：此前从未处理过的帧必须计入，已处理的帧不重复
+    assert coverage.add(60)
+    assert not coverage.add(60)
+    assert not coverage.add(300)
+    for n in range(61, 300):
+        coverage.add(n)
+    assert coverage.missing() == 9          # 51..59 仍未处理
+    assert 55 not in coverage and 59 not in coverage and 60 in coverage
+
+
+def test_coverage_missing_respects_skip_and_grows():
+    coverage = FrameCoverage(2)
+    for n in (2, 4, 8):
+        coverage.add(n)
+    assert coverage.last == 8
+    assert coverage.missing(step=2) == 1     # 6
+    assert coverage.missing(step=2, end=4) == 0
+    assert not coverage.add(0)
+
+
+def _play(pipeline, path, seeks):
+    """播放视频；seeks: {在该帧之后: 跳转目标}"""
+    async def run():
+        async for result in pipeline.process_video(path, target_fps=10000):
+            target = seeks.pop(result["frame_number"], None)
+            if target is not None:
+                pipeline.seek(target)
+    asyncio.run(run())
+
+
+def test_seek_forward_leaves_analysis_partial(make_pipeline, sample_video):
+    path, frames, _ = sample_video
+    pipeline = make_pipeline()
+    _play(pipeline, path, {10: 30})
+    assert pipeline.completed
+    assert not pipeline.fully_covered
+    assert pipeline.coverage.missing() == 19
+
+
+def test_seek_back_over_gap_restores_full_coverage(make_pipeline, sample_video):
+    path, frames, _ = sample_video
+    pipeline = make_pipeline()
+    _play(pipeline, path, {10: 30, frames: 11})
+    assert pipeline.completed
+    assert pipeline.fully_covered
+    assert pipeline.coverage.count == frames
+
+
+def test_seek_target_is_clamped(make_pipeline, sample_video):
+    path, frames, _ = sample_video
+    pipeline = make_pipeline()
+    pipeline.total_frames = frames
+    assert pipeline.seek(-5) == 1
+    assert pipeline.seek(10 ** 6) == frames
@@ -0,0 +1,84 @@
+import base64
+
+import pytest
+
+from backend.heatmap import HeatmapAccumulator
+
+
+def _pose(x, y):
+    return {
+        "keypoints": [{"id": 16, "x": x, "y": y, "visibility": 0.9}],
+        "center_of_mass": {"x": x, "y": y},
+    }
+
+
+def _play(heatmap, frames):
+    for n in frames:
+        heatmap.add(n, _pose(10.0, 10.0))
+
+
+def test_seek_forward_then_back_counts_skipped_frames():
+    heatmap = HeatmapAccumulator(960, 540, frame_count=400)
+    _play(heatmap, range(1, 51))
+    _play(heatmap, range(300, 401))       # 向前跳转
+    _play(heatmap, range(60, 300))        # 向后跳回，60–299 从未计入
+    assert heatmap.samples == 50 + 101 + 240
+    assert heatmap.grid[0].sum() == heatmap.samples
+
+    _play(heatmap, range(1, 401))         # 再完整回放一遍：不重复计数
+    assert heatmap.samples == 50 + 101 + 240 + 9   # 只补上 51–59
+
+
+def test_reset_clears_seen_frames():
+    heatmap = HeatmapAccumulator(960, 540)
+    _play(heatmap, range(1, 11))
+    heatmap.reset()
+    _play(heatmap, range(1, 11))
+    assert heatmap.samples == 10
+
+
+def test_cells_and_invisible_wrist():
+    heatmap = HeatmapAccumulator(100, 100, cols=10, rows=10)
+    pose = _pose(55.0, 15.0)
+    pose["keypoints"][0]["visibility"] = 0.2
+    heatmap.add(1, pose)
+    heatmap.add(2, _pose(500.0, 500.0))    # 超出画面
+    assert heatmap.grid[0, 1, 5] == 1
+    assert heatmap.grid[2].sum() == 0
+    assert heatmap.samples == 2
+
+
+def test_snapshot_throttling():
+    heatmap = HeatmapAccumulator(100, 100, cols=10, rows=10, check_interval=5)
+    assert heatmap.snapshot() is None              # 尚无数据
+    _play(heatmap, range(1, 5))
+    assert heatmap.snapshot() is None              # 未到检查间隔
+    _play(heatmap, range(5, 6))
+    snap = heatmap.snapshot()
+    assert snap["cols"] == 10 and snap["rows"] == 10
+    assert len(base64.b64decode(snap["channels"]["center_of_mass"])) == 100
+
+    _play(heatmap, range(6, 11))                   # 同一格继续累加：量化结果不变
+    assert heatmap.snapshot() is None
+    assert heatmap.snapshot(force=True) is not None
+
+
+@pytest.mark.parametrize("grid,analysis,expected", [
+    (48, (960, 540), (48, 27)),
+    (64, (960, 720), (64, 48)),
+])
+def test_pipeline_heatmap_grid(make_pipeline, grid, analysis, expected):
+    pipeline = make_pipeline(heatmap_grid=grid)
+    pipeline._begin(30.0, 100, analysis, analysis)
+    assert (pipeline.heatmap.cols, pipeline.heatmap.rows) == expected
+    assert pipeline.heatmap.grid.shape == (3, expected[1], expected[0])
+
+
+def test_heatmap_grid_option_validation():
+    from backend.main import _pipeline_options
+
+    assert _pipeline_options({"heatmap_grid": "64"}) == {"heatmap_grid": 64}
+    assert _pipeline_options({"heatmap_grid": 1})["heatmap_grid"] == 8
+    assert _pipeline_options({"heatmap_grid": 10000})["heatmap_grid"] == 192
+    with pytest.raises(ValueError):
+        _pipeline_options({"heatmap_grid": "wide"})
@@ -0,0 +1,108 @@
+import asyncio
+
+from backend.jobs import Job, JobQueue
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+def test_priority_order_and_results():
+    order = []
+
+    async def handler(job):
+        order.append(job.params["name"])
+        return {"name": job.params["name"]}
+
+    async def scenario():
+        queue = JobQueue("test", handler, workers=1)
+        low = queue.submit({"name": "low"}, priority=5)
+        high = queue.submit({"name": "high"}, priority=0)
+        same = queue.submit({"name": "high-2"}, priority=0)
+        assert queue.queue_position(high.id) == 1
+        assert queue.queue_position(same.id) == 2
+        assert queue.queue_position(low.id) == 3
+        queue.start()
+        while not all(job.finished for job in queue.jobs.values()):
+            await asyncio.sleep(0.01)
+        await queue.stop()
+        return low
+
+    low = _run(scenario())
+    assert order == ["high", "high-2", "low"]
+    assert low.status == Job.DONE and low.progress == 1.0 and low.result == {"name": "low"}
+
+
+def test_cancel_queued_and_running_and_failure():
+    async def handler(job):
+        if job.params.get("fail"):
+            raise ValueError("boom")
+        while not job.cancel_requested:
+            await asyncio.sleep(0.01)
+        return {}
+
+    async def scenario():
+        queue = JobQueue("test", handler, workers=1)
+        running = queue.submit({})
+        queued = queue.submit({})
+        failing = queue.submit({"fail": True})
+        queue.start()
+        await asyncio.sleep(0.05)
+        assert running.status == Job.RUNNING
+        assert queue.cancel(queued.id)
+        assert queued.status == Job.CANCELLED
+        assert queue.cancel(running.id)
+        while not failing.finished:
+            await asyncio.sleep(0.01)
+        await queue.stop()
+        assert not queue.cancel(running.id)
+        return running, failing
+
+    running, failing = _run(scenario())
+    assert running.status == Job.CANCELLED
+    assert failing.status == Job.FAILED and failing.error == "boom"
+
+
+def test_progress_is_published_while_running():
+    published = []
+
+    async def handler(job):
+        for step in range(1, 6):
+            await asyncio.sleep(0.03)
+            job.progress = step / 5
+        return {}
+
+    async def scenario():
+        queue = JobQueue("test", handler, workers=1, progress_interval=0.02,
+                         on_change=lambda job: published.append((job.status, job.progress)))
+        job = queue.submit({})
+        queue.start()
+        while not job.finished:
+            await asyncio.sleep(0.01)
+        await queue.stop()
+
+    _run(scenario())
+    running = [progress for status, progress in published if status == Job.RUNNING]
+    # 运行期间至少发布过一次中间进度，且进度单调不减
+    assert any(0 < progress < 1 for progress in running)
+    assert running == sorted(running)
+    assert published[-1] == (Job.DONE, 1.0)
+
+
+def test_history_is_trimmed_to_finished_jobs():
+    async def handler(job):
+        return {}
+
+    async def scenario():
+        queue = JobQueue("test", handler, workers=2, max_history=2)
+        queue.start()
+        for _ in range(5):
+            queue.submit({})
+            await asyncio.sleep(0.02)
+        queue.submit({})
+        await queue.stop()
+        return queue
+
+    queue = _run(scenario())
+    finished = [job for job in queue.jobs.values() if job.finished]
+    assert len(finished) <= 2
@@ -0,0 +1,76 @@
+import time
+from types import SimpleNamespace
+
+import backend.main
+from backend.profiler import SessionProfiler
+
+
+def _busy_stage(seconds):
+    deadline = time.perf_counter() + seconds
+    total = 0
+    while time.perf_counter() < deadline:
+        total += 1
+    return total
+
+
+def test_samples_only_inside_stages():
+    profiler = SessionProfiler(interval=0.001)
+    profiler.start()
+    try:
+        _busy_stage(0.05)                       # 阶段外：不采样
+        start = profiler.begin("detect")
+        _busy_stage(0.1)
+        profiler.end("detect", start)
+    finally:
+        profiler.stop()
+
+    assert profiler.samples > 0
+    assert all(stack.startswith("stage:detect;") for stack in profiler.stacks)
+    assert any("_busy_stage" in stack for stack in profiler.stacks)
+    assert profiler.collapsed().splitlines()[0].rsplit(" ", 1)[1].isdigit()
+
+    summary = profiler.summary()
+    detect = summary["stages"]["detect"]
+    assert detect["count"] == 1 and detect["total_ms"] >= 100
+    assert 0 < detect["share"] < 1
+    assert "decode" not in summary["stages"]
+    assert summary["top_stacks"][0]["stage"] == "stage:detect"
+
+    (event,) = profiler.chrome_trace()["traceEvents"]
+    assert event["name"] == "detect" and event["ph"] == "X" and event["dur"] >= 1e5
+
+
+def test_trace_is_bounded():
+    profiler = SessionProfiler(max_trace_events=3)
+    for _ in range(5):
+        profiler.end("render", profiler.begin("render"))
+    assert len(profiler.trace) == 3
+    assert profiler.stage_stats["render"][0] == 5
+
+
+def test_pipeline_reports_stages(make_pipeline, sample_video):
+    path, frames, _ = sample_video
+    pipeline = make_pipeline()
+    pipeline.profiler = SessionProfiler()
+    list(pipeline.analyze_video(path))
+    stats = pipeline.profiler.stage_stats
+    assert stats["decode"][0] == frames + 1     # 最后一次读取到达文件末尾
+    assert stats["detect"][0] == frames
+
+
+def _request(host, token=None):
+    headers = {"x-admin-token": token} if token else {}
+    return SimpleNamespace(client=SimpleNamespace(host=host) if host else None, headers=headers)
+
+
+def test_admin_access(monkeypatch):
+    monkeypatch.setattr(backend.main, "ADMIN_TOKEN", "")
+    assert backend.main._admin_denied(_request("127.0.0.1")) is None
+    assert backend.main._admin_denied(_request("::1")) is None
+    assert backend.main._admin_denied(_request("10.0.0.8")).status_code == 403
+    assert backend.main._admin_denied(_request(None)).status_code == 403
+
+    monkeypatch.setattr(backend.main, "ADMIN_TOKEN", "secret")
+    assert backend.main._admin_denied(_request("10.0.0.8", "secret")) is None
+    assert backend.main._admin_denied(_request("127.0.0.1")).status_code == 403
+    assert backend.main._admin_denied(_request("127.0.0.1", "wrong")).status_code == 403
@@ -0,0 +1,140 @@
+import threading
+import time
+
+import pytest
+
+from backend.jobs import Job
+from backend.registry import (
+    MemorySessionRegistry, SessionRegistry, SQLiteSessionRegistry, create_registry,
+)
+
+
+def _job(job_id, status, created_at=1.0):
+    return {"id": job_id, "status": status, "created_at": created_at, "progress": 0.0}
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def registry(request, tmp_path):
+    if request.param == "memory":
+        registry = MemorySessionRegistry("worker-a")
+    else:
+        registry = SQLiteSessionRegistry(tmp_path / "registry.db", "worker-a")
+    yield registry
+    registry.close()
+
+
+def test_sessions_jobs_and_commands(registry):
+    registry.heartbeat()
+    assert registry.live_workers() == ["worker-a"]
+
+    registry.register_session("s1", {"video": "demo"})
+    session = registry.get_session("s1")
+    assert session["worker_id"] == "worker-a" and session["video"] == "demo"
+    assert [s["session_id"] for s in registry.list_sessions()] == ["s1"]
+
+    registry.save_job(_job("j1", Job.RUNNING, 1.0))
+    registry.save_job(_job("j2", Job.QUEUED, 2.0))
+    assert registry.get_job("j1")["worker_id"] == "worker-a"
+    assert [j["id"] for j in registry.list_jobs()] == ["j2", "j1"]
+    assert [j["id"] for j in registry.list_jobs(limit=1)] == ["j2"]
+
+    registry.send_command("s1", "pause", "worker-a")
+    registry.send_command("s9", "stop", "worker-b")
+    assert registry.poll_commands() == [("s1", "pause")]
+    assert registry.poll_commands() == []
+
+    registry.unregister_session("s1")
+    assert registry.get_session("s1") is None
+
+
+def test_sqlite_commands_across_workers(tmp_path):
+    db = tmp_path / "registry.db"
+    a = SQLiteSessionRegistry(db, "worker-a")
+    b = SQLiteSessionRegistry(db, "worker-b")
+    a.heartbeat()
+    b.heartbeat()
+    a.register_session("s1", {})
+    assert b.get_session("s1")["worker_id"] == "worker-a"
+    assert sorted(b.live_workers()) == ["worker-a", "worker-b"]
+
+    # b 收到对 a 的会话的控制请求，投递给所属 worker
+    b.send_command("s1", "pause", "worker-a")
+    b.send_command("s1", "resume", "worker-a")
+    assert b.poll_commands() == []
+    assert a.poll_commands() == [("s1", "pause"), ("s1", "resume")]
+    b.close()
+    a.close()
+
+
+def test_sqlite_expires_dead_worker(tmp_path):
+    db = tmp_path / "registry.db"
+    a = SQLiteSessionRegistry(db, "worker-a", heartbeat_ttl=30)
+    b = SQLiteSessionRegistry(db, "worker-b", heartbeat_ttl=30)
+    a.heartbeat()
+    a.register_session("s1", {})
+    a.save_job(_job("running", Job.RUNNING))
+    a.save_job(_job("queued", Job.QUEUED))
+    a.save_job(_job("done", Job.DONE))
+    b.send_command("s1", "stop", "worker-a")
+
+    # worker-a 心跳停止超过 TTL
+    conn = a._connect()
+    with conn:
+        conn.execute("UPDATE workers SET heartbeat_at = ? WHERE worker_id = 'worker-a'",
+                     (time.time() - 60,))
+    assert b.list_sessions() == []              # 失联 worker 的会话不再列出
+    b.heartbeat()
+
+    assert b.live_workers() == ["worker-b"]
+    assert b.get_session("s1") is None
+    assert a.poll_commands() == []
+    for job_id in ("running", "queued"):
+        job = b.get_job(job_id)
+        assert job["status"] == Job.FAILED
+        assert job["error"] == "Worker exited: worker-a"
+        assert job["finished_at"] is not None
+    assert b.get_job("done")["status"] == Job.DONE
+    b.close()
+
+
+def test_sqlite_close_fails_own_unfinished_jobs(tmp_path):
+    db = tmp_path / "registry.db"
+    a = SQLiteSessionRegistry(db, "worker-a")
+    b = SQLiteSessionRegistry(db, "worker-b")
+    a.heartbeat()
+    a.register_session("s1", {})
+    a.save_job(_job("j1", Job.RUNNING))
+    a.close()
+    assert b.get_session("s1") is None
+    assert b.get_job("j1")["status"] == Job.FAILED
+    assert b.live_workers() == []
+
+
+def test_sqlite_connection_per_thread(tmp_path):
+    registry = SQLiteSessionRegistry(tmp_path / "registry.db", "worker-a")
+    errors = []
+
+    def worker(n):
+        try:
+            for i in range(20):
+                registry.save_job(_job(f"{n}-{i}", Job.QUEUED, float(i)))
+        except Exception as e:      # 失败时在主线程断言
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
+    assert len(registry.list_jobs()) == 80
+
+
+def test_create_registry_and_interface(tmp_path):
+    assert isinstance(create_registry("memory", "w"), MemorySessionRegistry)
+    registry = create_registry(f"sqlite:///{tmp_path / 'r.db'}", "w")
+    assert isinstance(registry, SQLiteSessionRegistry) and registry.worker_id == "w"
+    with pytest.raises(ValueError):
+        create_registry("redis://localhost")
+    with pytest.raises(TypeError):
+        SessionRegistry("w")
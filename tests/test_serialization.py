@@ -0,0 +1,107 @@
+import json
+
+import numpy as np
+import pytest
+
+from backend import serialization
+from backend.archive import ANGLE_NAMES, BIOMECHANICS_NAMES, KEYPOINT_IDS
+from backend.serialization import SCALES, FrameSerializer
+
+
+def _frame(n=1, counts=None, pose=True):
+    data = {
+        "frame_base64": "AAAA",
+        "frame_number": n,
+        "total_frames": 100,
+        "fps": 30.0,
+        "timestamp": round((n - 1) / 30, 3),
+        "width": 960,
+        "height": 540,
+        "progress": n / 100,
+        "pose": {
+            "keypoints": [{"id": 16, "name": "right_wrist", "x": 123.46, "y": 78.91,
+                           "z": -0.1234, "visibility": 0.876},
+                          {"id": 99, "name": "extra", "x": 1.0, "y": 1.0}],
+            "joint_angles": {"right_elbow": 145.26},
+            "biomechanics": {"wrist_speed": 3.14},
+            "center_of_mass": {"x": 480.0, "y": 300.05},
+            "confidence": 0.912,
+        } if pose else None,
+        "action": {"action": "forehand", "confidence": 0.75, "is_new_action": True,
+                   "action_counts": counts or {"forehand": 1}},
+    }
+    return {"type": "frame", "data": data}
+
+
+def test_compact_frame_quantization():
+    serializer = FrameSerializer(compact=True)
+    frame = serializer.compact_frame(_frame()["data"])
+    row = KEYPOINT_IDS.index(16)
+    kp = frame["kp"][row * 4:row * 4 + 4]
+    assert len(frame["kp"]) == len(KEYPOINT_IDS) * 4
+    assert kp[0] / SCALES["xy"] == pytest.approx(123.46, abs=0.05)
+    assert kp[2] / SCALES["z"] == pytest.approx(-0.1234, abs=5e-4)
+    assert kp[3] / SCALES["visibility"] == pytest.approx(0.876, abs=5e-3)
+    assert frame["kp"][0] is None                      # 鼻子缺失
+    assert frame["ang"][ANGLE_NAMES.index("right_elbow")] == 1453
+    assert frame["ang"][ANGLE_NAMES.index("left_knee")] is None
+    assert frame["bio"][BIOMECHANICS_NAMES.index("wrist_speed")] == 31
+    assert frame["com"] == [4800, 3000]
+    assert frame["conf"] == 91
+    assert frame["act"] == ["forehand", 75, 1]
+    assert (frame["n"], frame["img"]) == (1, "AAAA")
+
+
+def test_schema_once_and_counts_only_on_change():
+    serializer = FrameSerializer(compact=True)
+    first = [json.loads(p) for p in serializer.encode(_frame(1))]
+    assert [m["type"] for m in first] == ["schema", "f"]
+    schema = first[0]
+    assert schema["version"] == serialization.SCHEMA_VERSION
+    assert [kp["id"] for kp in schema["keypoints"]] == list(KEYPOINT_IDS)
+    assert schema["scales"] == SCALES and schema["total_frames"] == 100
+    assert first[1]["d"]["cnt"] == {"forehand": 1}
+
+    (second,) = serializer.encode(_frame(2))
+    assert "cnt" not in json.loads(second)["d"]
+    (third,) = serializer.encode(_frame(3, counts={"forehand": 2}))
+    assert json.loads(third)["d"]["cnt"] == {"forehand": 2}
+
+    no_pose = json.loads(serializer.encode(_frame(4, pose=False))[0])["d"]
+    assert "kp" not in no_pose
+
+    status = {"type": "status", "message": "paused"}
+    assert [json.loads(p) for p in serializer.encode(status)] == [status]
+
+
+def test_plain_json_keeps_message_shape():
+    message = _frame()
+    (payload,) = FrameSerializer().encode(message)
+    assert json.loads(payload) == message
+
+
+def test_dumps_handles_numpy(monkeypatch):
+    value = {"a": np.float32(1.5), "b": np.arange(3), "c": "中文"}
+    expected = {"a": 1.5, "b": [0, 1, 2], "c": "中文"}
+    assert json.loads(serialization.dumps(value)) == expected
+    monkeypatch.setattr(serialization, "orjson", None)        # 标准库回退
+    assert json.loads(serialization.dumps(value)) == expected
+    with pytest.raises(TypeError):
+        serialization.dumps({"x": object()})
+
+
+def test_encoding_validation(monkeypatch):
+    with pytest.raises(ValueError):
+        FrameSerializer("xml")
+    monkeypatch.setattr(serialization, "msgpack", None)
+    assert serialization.available()["msgpack"] is False
+    with pytest.raises(ValueError):
+        FrameSerializer("msgpack")
+
+
+def test_msgpack_round_trip():
+    msgpack = pytest.importorskip("msgpack")
+    serializer = FrameSerializer("msgpack", compact=True)
+    schema, frame = (msgpack.unpackb(p, raw=False) for p in serializer.encode(_frame()))
+    assert schema["type"] == "schema"
+    assert frame["d"]["act"] == ["forehand", 75, 1]
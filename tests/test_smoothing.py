@@ -0,0 +1,74 @@
+import numpy as np
+
+from backend.smoothing import OneEuroFilter, interpolate_landmarks, landmark_motion
+
+
+def test_one_euro_passthrough_then_smooths_jitter():
+    rng = np.random.default_rng(0)
+    f = OneEuroFilter(min_cutoff=1.0, beta=0.0)
+    truth = np.full((13, 3), 0.5)
+    first = truth + 0.01
+    assert np.array_equal(f(first, 0.0), first)
+
+    noisy = [truth + rng.normal(0, 0.01, truth.shape) for _ in range(60)]
+    out = [f(x, (i + 1) / 30) for i, x in enumerate(noisy)]
+    raw_err = np.std([x - truth for x in noisy[30:]])
+    smooth_err = np.std([x - truth for x in out[30:]])
+    assert smooth_err < raw_err * 0.6
+
+
+def test_one_euro_resets_on_gap_and_backwards_time():
+    f = OneEuroFilter()
+    f(np.zeros(3), 0.0)
+    f(np.zeros(3), 0.033)
+    jump = np.ones(3)
+    assert np.array_equal(f(jump, 5.0), jump)       # 超过 reset_gap
+    assert np.array_equal(f(np.zeros(3), 1.0), np.zeros(3))   # 时间回退（跳转）
+
+
+def test_interpolation_and_motion():
+    prev = np.zeros((13, 4))
+    curr = np.zeros((13, 4))
+    curr[:, 0] = 0.3
+    curr[2, 1] = 0.4
+    mid = interpolate_landmarks(prev, curr, 1 / 3)
+    assert np.allclose(mid[:, 0], 0.1)
+    assert abs(landmark_motion(prev, curr, 5) - 0.1) < 1e-9
+    assert landmark_motion(prev, prev, 0) == 0.0
+
+
+def _moving_detector(pipeline):
+    calls = []
+
+    def detect(frame_rgb):
+        calls.append(1)
+        landmarks = np.full((13, 4), 0.5)
+        landmarks[:, 3] = 1.0
+        landmarks[:, 0] = 0.2 + 0.01 * len(calls)
+        return landmarks
+
+    pipeline.pose_analyzer.detect = detect
+    return calls
+
+
+def test_sparse_inference_interpolates_every_frame(make_pipeline, sample_video):
+    path, frames, _ = sample_video
+    pipeline = make_pipeline(inference_stride=3)
+    calls = _moving_detector(pipeline)
+    results = list(pipeline.analyze_video(path))
+
+    assert [r["frame_number"] for r in results] == list(range(1, frames + 1))
+    assert all(r["pose"] is not None for r in results)
+    assert len(calls) == pipeline.inferred_frames < frames / 2
+    assert pipeline.interpolated_frames > 0
+    xs = [r["pose"]["keypoints"][0]["x"] for r in results]
+    assert xs == sorted(xs)                  # 插值帧位于两次推理结果之间
+
+
+def test_adaptive_inference_falls_back_to_every_frame(make_pipeline, sample_video):
+    path, frames, _ = sample_video
+    pipeline = make_pipeline(inference_stride=4, adaptive_inference=True, motion_threshold=0.0)
+    calls = _moving_detector(pipeline)
+    list(pipeline.analyze_video(path))
+    # 运动始终超过阈值：第一段之后逐帧推理
+    assert len(calls) >= frames - 4
@@ -0,0 +1,169 @@
+import numpy as np
+import pytest
+
+from backend.archive import ANGLE_NAMES, KeypointArchiveWriter
+from backend.technique import (
+    TechniqueMatcher, TemplateLibrary, banded_dtw, build_library, envelope,
+    resample_window, warping_path,
+)
+
+J = len(ANGLE_NAMES)
+
+
+def _reference_dtw(a, b, radius):
+    """逐格实现的带约束 DTW（对照用）"""
+    n = len(a)
+    acc = np.full((n + 1, n + 1), np.inf)
+    acc[0, 0] = 0.0
+    for i in range(1, n + 1):
+        for j in range(max(1, i - radius), min(n, i + radius) + 1):
+            cost = float(((a[i - 1] - b[j - 1]) ** 2).sum())
+            acc[i, j] = cost + min(acc[i - 1, j - 1], acc[i - 1, j], acc[i, j - 1])
+    return acc[n, n]
+
+
+def _library(n=60, length=24, seed=0):
+    """三类动作，每类围绕各自的基准曲线加噪声"""
+    rng = np.random.default_rng(seed)
+    t = np.linspace(0, 1, length)[:, None]
+    bases = {
+        "forehand": 90 + 40 * np.sin(2 * np.pi * t + np.arange(J)),
+        "backhand": 90 + 40 * np.cos(2 * np.pi * t + np.arange(J)),
+        "serve": 120 + 30 * t * np.ones(J),
+    }
+    series, actions, names = [], [], []
+    for i in range(n):
+        action = list(bases)[i % 3]
+        series.append(bases[action] + rng.normal(0, 5, (length, J)))
+        actions.append(action)
+        names.append(f"{action}-{i}")
+    return TemplateLibrary(np.stack(series), actions, names), bases
+
+
+def test_banded_dtw_matches_reference_and_lower_bound():
+    rng = np.random.default_rng(1)
+    query = rng.normal(0, 1, (20, J)).astype(np.float32)
+    candidates = rng.normal(0, 1, (6, 20, J)).astype(np.float32)
+    distances, acc = banded_dtw(query, candidates, radius=3)
+    for b in range(6):
+        assert distances[b] == pytest.approx(_reference_dtw(query, candidates[b], 3), rel=1e-5)
+
+    upper, lower = envelope(candidates, 3)
+    bound = (np.maximum(query - upper, 0) ** 2 + np.maximum(lower - query, 0) ** 2).sum(axis=(1, 2))
+    assert np.all(bound <= distances + 1e-6)
+
+    path = warping_path(acc[0])
+    assert path[0] == (0, 0) and path[-1] == (19, 19)
+    assert all(0 <= i2 - i1 <= 1 and 0 <= j2 - j1 <= 1
+               for (i1, j1), (i2, j2) in zip(path, path[1:]))
+
+    # 提前放弃：所有候选都超过阈值
+    abandoned, _ = banded_dtw(query, candidates, radius=3, abandon=1e-3)
+    assert np.all(np.isinf(abandoned))
+
+
+def test_match_equals_brute_force_and_prunes():
+    library, bases = _library()
+    rng = np.random.default_rng(7)
+    query = (bases["forehand"] + rng.normal(0, 5, bases["forehand"].shape)).astype(np.float32)
+
+    result = library.match(query, k=3)
+    brute, _ = banded_dtw(query, library.series, library.radius)
+    expected = [str(library.names[i]) for i in np.argsort(brute)[:3]]
+    assert [m["name"] for m in result["matches"]] == expected
+    assert all(m["action"] == "forehand" for m in result["matches"])
+    assert result["candidates"] == 60
+    assert result["computed"] < 60                 # LB_Keogh 剪枝生效
+
+    only_serve = library.match(query, action="serve", k=2)
+    assert only_serve["candidates"] == 20
+    assert all(m["action"] == "serve" for m in only_serve["matches"])
+    assert library.match(query, action="lob")["matches"] == []
+
+
+def test_deviations_along_path():
+    library, _ = _library(n=3)
+    query = library.series[0].copy()
+    query[:, ANGLE_NAMES.index("right_elbow")] += 12.0
+    deviations = library.deviations(query, 0)
+    assert deviations["right_elbow"] == pytest.approx(12.0, abs=0.1)
+    assert deviations["left_knee"] == pytest.approx(0.0, abs=0.1)
+
+
+def test_library_save_load_and_validation(tmp_path):
+    library, _ = _library(n=9)
+    path = tmp_path / "templates.npz"
+    library.save(path)
+    loaded = TemplateLibrary.load(path)
+    assert len(loaded) == 9 and loaded.counts() == {"backhand": 3, "forehand": 3, "serve": 3}
+    assert np.array_equal(loaded.series, library.series)
+    assert (loaded.pre, loaded.post) == (library.pre, library.post)
+    with pytest.raises(ValueError):
+        TemplateLibrary(np.zeros((2, 10, J + 1)), ["a", "b"], ["a", "b"])
+
+
+def test_resample_window():
+    timestamps = np.arange(0, 2, 0.1)
+    angles = np.stack([timestamps * 10] * J, axis=1)
+    window = resample_window(timestamps, angles, center=1.0, pre=0.5, post=0.5, samples=11)
+    assert np.allclose(window[:, 0], np.linspace(5, 15, 11))
+    angles[:-1, 3] = np.nan
+    assert resample_window(timestamps, angles, 1.0, 0.5, 0.5, 11) is None
+
+
+def _pose_at(t):
+    return {"joint_angles": {name: 90 + 40 * np.sin(2 * np.pi * t + j)
+                             for j, name in enumerate(ANGLE_NAMES)}}
+
+
+def test_matcher_dispatches_after_post_window():
+    library, _ = _library()
+    fps = 30.0
+    matcher = TechniqueMatcher(library, fps)
+    event = {"action": "forehand", "frame": 31, "timestamp": 1.0}
+    try:
+        for n in range(1, 31):
+            matcher.add_frame((n - 1) / fps, _pose_at((n - 1) / fps))
+        matcher.add_event(event)
+        for n in range(31, 60):
+            matcher.add_frame((n - 1) / fps, _pose_at((n - 1) / fps))
+        results = matcher.finish()
+    finally:
+        library.close()
+    (result,) = results
+    assert result["frame"] == 31 and result["matches"]
+    assert event["technique"]["template"] == result["matches"][0]["name"]
+    assert set(event["technique"]["deviations"]) == set(ANGLE_NAMES)
+
+
+def test_matcher_drops_pending_events_on_seek():
+    library, _ = _library(n=6)
+    matcher = TechniqueMatcher(library, 30.0)
+    for n in range(30):
+        matcher.add_frame(n / 30, _pose_at(n / 30))
+    matcher.add_event({"action": "forehand", "frame": 30, "timestamp": 0.97})
+    matcher.add_frame(10.0, _pose_at(10.0))      # 向前跳转：缓存与待比对动作丢弃
+    assert matcher.finish() == []
+    library.close()
+
+
+def test_build_library_from_archive(tmp_path):
+    fps = 30.0
+    path = tmp_path / "trace.kpa"
+    events = [
+        {"action": "forehand", "frame": 31, "timestamp": 1.0},
+        {"action": "serve", "frame": 61, "timestamp": 2.0},
+        {"action": "forehand", "frame": 3, "timestamp": 0.07},     # 触发前数据不足
+    ]
+    with KeypointArchiveWriter(path, 960, 540, fps) as writer:
+        for n in range(1, 91):
+            t = (n - 1) / fps
+            writer.append(n, t, {**_pose_at(t), "confidence": 0.9})
+        writer.close(events)
+
+    library = build_library([path], samples=16)
+    assert len(library) == 2 and library.length == 16
+    assert list(library.names) == ["trace:31", "trace:61"]
+    assert len(build_library([path], actions={"serve"})) == 1
+    with pytest.raises(ValueError):
+        build_library([path], actions={"lob"})
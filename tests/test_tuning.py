@@ -0,0 +1,101 @@
+import json
+
+import numpy as np
+import pytest
+
+from backend import tuning
+from backend.action_recognizer import ActionRecognizer
+from backend.archive import KEYPOINT_IDS, KEYPOINT_NAMES, KeypointArchiveWriter
+from test_action_recognizer import _synthetic_sequence
+
+
+def test_match_events_greedy_within_tolerance():
+    predicted = [("forehand", 10), ("forehand", 12), ("forehand", 40), ("serve", 5)]
+    labels = [("forehand", 11), ("forehand", 30), ("lob", 50)]
+    counts = tuning.match_events(predicted, labels, tolerance=3)
+    assert counts["forehand"] == [1, 2, 1]      # 11 只能匹配一次
+    assert counts["serve"] == [0, 1, 0]
+    assert counts["lob"] == [0, 0, 1]
+
+    score = tuning._prf(1, 2, 1)
+    assert score["precision"] == pytest.approx(1 / 3, abs=1e-4)
+    assert score["recall"] == 0.5
+    assert tuning._prf(0, 0, 0)["f1"] == 0.0
+
+
+def test_expand_grid():
+    combos = tuning.expand_grid({"debounce_frames": [8, 10],
+                                 "thresholds": {"swing_wrist_speed": [6, 8, 10]}})
+    assert len(combos) == 6
+    assert {"debounce_frames": 8, "thresholds": {"swing_wrist_speed": 6}} in combos
+    assert tuning.expand_grid({}) == [{"thresholds": {}}]
+    assert len(tuning.expand_grid(tuning.default_grid())) == 5 * 5 * 3 * 3
+    with pytest.raises(ValueError):
+        tuning.expand_grid({"thresholds": {"nope": [1]}})
+
+
+def _record_trace(path, seed=0, fps=30.0):
+    """把合成序列写成关键点归档，每 50 帧中有一帧（26, 76, ...）未检测到人体"""
+    keypoints, joint_angles = _synthetic_sequence(seed=seed)
+    with KeypointArchiveWriter(path, 960, 540, fps) as writer:
+        for t in range(len(keypoints)):
+            pose = None
+            if t % 50 != 25:
+                pose = {
+                    "keypoints": [
+                        {"id": idx, "name": name, "x": float(keypoints[t, row, 0]),
+                         "y": float(keypoints[t, row, 1])}
+                        for row, (idx, name) in enumerate(zip(KEYPOINT_IDS, KEYPOINT_NAMES))
+                        if not np.isnan(keypoints[t, row]).any()
+                    ],
+                    "joint_angles": {k: float(v[t]) for k, v in joint_angles.items()
+                                     if not np.isnan(v[t])},
+                    "confidence": 0.9,
+                }
+            writer.append(t + 1, t / fps, pose)
+    return path
+
+
+def test_trace_drops_missing_frames_and_normalizes_labels(tmp_path):
+    path = _record_trace(tmp_path / "a.kpa")
+    trace = tuning.Trace(path, [{"action": "serve", "time": 1.0},
+                                {"action": "lob", "frame": 3}])
+    assert len(trace.frames) == 400 - 8
+    assert 26 not in trace.frames
+    assert trace.keypoints.shape == (len(trace.frames), len(KEYPOINT_IDS), 2)
+    assert trace.labels == [("lob", 3), ("serve", 31)]
+
+
+def test_evaluate_scores_against_labels(tmp_path):
+    path = _record_trace(tmp_path / "a.kpa")
+    trace = tuning.Trace(path, [])
+    events = ActionRecognizer().recognize_batch(trace.keypoints, trace.joint_angles)["events"]
+    labels = [{"action": ev["action"], "frame": int(trace.frames[ev["frame"] - 1])}
+              for ev in events]
+    assert labels
+
+    tuning._init_worker([(str(path), labels)], tolerance=0)
+    perfect = tuning.evaluate({})
+    assert perfect["f1"] == 1.0 and perfect["frames"] == len(trace.frames)
+
+    tuning._init_worker([(str(path), labels[1:])], tolerance=0)
+    missing_one = tuning.evaluate({})
+    assert missing_one["fp"] == 1 and missing_one["recall"] == 1.0
+
+
+def test_load_specs_and_sweep(tmp_path):
+    traces, labels = tmp_path / "traces", tmp_path / "labels"
+    traces.mkdir()
+    labels.mkdir()
+    path = _record_trace(traces / "a.kpa")
+    _record_trace(traces / "unlabelled.kpa", seed=1)
+    (labels / "a.json").write_text(json.dumps({"events": [{"action": "forehand", "frame": 50}]}))
+
+    specs = tuning.load_trace_specs(traces, labels)
+    assert specs == [(str(path), [{"action": "forehand", "frame": 50}])]
+
+    combos = tuning.expand_grid({"debounce_frames": [5, 10, 20]})
+    results = tuning.sweep(specs, combos, workers=1)
+    assert len(results) == 3
+    assert [r["f1"] for r in results] == sorted((r["f1"] for r in results), reverse=True)
+    assert {r["params"]["debounce_frames"] for r in results} == {5, 10, 20}
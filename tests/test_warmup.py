@@ -0,0 +1,98 @@
+import asyncio
+
+import pytest
+
+import backend.pose_analyzer
+from backend.warmup import Warmup
+from conftest import StubPoseAnalyzer
+
+
+class FakeAnalyzer:
+    fail = False
+
+    def __init__(self, *args, **kwargs):
+        self.closed = False
+        self.detected = 0
+
+    def detect(self, frame_rgb):
+        if self.fail:
+            raise RuntimeError("no model")
+        self.detected += 1
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def fake_analyzer(monkeypatch):
+    created = []
+
+    class Recording(FakeAnalyzer):
+        def __init__(self, *args, **kwargs):
+            super().__init__()
+            created.append(self)
+
+    monkeypatch.setattr(backend.pose_analyzer, "PoseAnalyzer", Recording)
+    return Recording, created
+
+
+def _warm(warmup):
+    async def scenario():
+        warmup.start()
+        warmup.start()              # 重复调用不会启动第二次预热
+        await warmup._task
+    asyncio.run(scenario())
+
+
+def test_warmup_ready_and_take_once(fake_analyzer):
+    _, created = fake_analyzer
+    warmup = Warmup()
+    assert warmup.status()["status"] == "warming"
+    _warm(warmup)
+
+    status = warmup.status()
+    assert status["status"] == "ready"
+    assert {"model_load_seconds", "first_inference_seconds", "warmup_seconds"} <= set(status["timings"])
+    assert len(created) == 1 and created[0].detected == 1
+
+    analyzer = warmup.take_analyzer()
+    assert analyzer is created[0]
+    assert warmup.take_analyzer() is None
+    warmup.close()
+    assert not analyzer.closed      # 已取走的分析器由调用方负责关闭
+
+
+def test_close_releases_untaken_analyzer(fake_analyzer):
+    _, created = fake_analyzer
+    warmup = Warmup()
+    _warm(warmup)
+    warmup.close()
+    assert created[0].closed
+    assert warmup.take_analyzer() is None
+
+
+def test_failed_warmup_closes_analyzer(fake_analyzer):
+    cls, created = fake_analyzer
+    cls.fail = True
+    warmup = Warmup()
+    _warm(warmup)
+    status = warmup.status()
+    assert status["status"] == "failed"
+    assert status["error"] == "RuntimeError: no model"
+    assert created[0].closed
+    assert warmup.take_analyzer() is None
+
+
+def test_pipeline_reuses_given_analyzer():
+    from backend.pipeline import Pipeline
+
+    analyzer = StubPoseAnalyzer()
+    analyzer.frame_count = 7
+    analyzer.keypoint_history.append({})
+    pipeline = Pipeline(pose_analyzer=analyzer, smoothing=True)
+    try:
+        assert pipeline.pose_analyzer is analyzer
+        assert analyzer.frame_count == 0 and not analyzer.keypoint_history
+        assert analyzer.smoother is not None
+    finally:
+        pipeline.close()